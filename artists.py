@@ -0,0 +1,343 @@
+import datetime as datetime_now
+
+from flask import Blueprint, current_app, jsonify, render_template, request, flash, redirect, url_for, abort, \
+    stream_with_context
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+
+from browse import browse, browse_filters, browse_version, filters_changed
+from cache import page_cache
+from conditional import conditional_get
+from counters import refresh_counters, awaiting_sweep
+from edits import apply_edit, touch
+from exports import export_shows, ical_calendar
+from genres import genre_exists, resolve_genres
+from instrumentation import query_budget
+from models import db, Venue, Artist, Show
+from pagination import keyset_page
+from read_models import ARTIST_LISTING, ARTIST_DETAIL, ARTIST_SHOWS, rows, genre_names
+from routing import read_only
+from search import search
+from typeahead import typeahead
+from versions import version_columns
+
+bp = Blueprint('artists', __name__)
+
+
+# Artist fields rendered by the artists listing, and by the shows listing and venue pages.
+LISTED_FIELDS = {'name'}
+SHOWN_FIELDS = {'name', 'image_link'}
+# Artist fields the browse pages filter on.
+FILTERED_FIELDS = {'state', 'seeking_venue', 'genres'}
+
+
+def artist_pages(artist_id, changed=None):
+    # Pages rendering the `changed` fields of an artist, all of them by default:
+    # the listings, its own page and its venues' pages.
+    pages = ['artist:%d' % artist_id]
+    if changed is None or changed & LISTED_FIELDS:
+        pages.append('artists')
+    if changed is None or changed & SHOWN_FIELDS:
+        venue_ids = db.session.query(Show.venue_id).filter_by(artist_id=artist_id).distinct()
+        pages += ['shows'] + ['venue:%d' % row_id for row_id, in venue_ids]
+    return pages
+
+
+def artists_version():
+    # Every write to Artist, deletes included, bumps its table version.
+    version, changed_at = db.session.query(*version_columns('Artist')).one()
+    return str(version), changed_at
+
+
+def artist_version(artist_id):
+    # Writes changing an artist page bump the artist row.
+    row = db.session.query(Artist.updated_at, Artist.next_show_date).filter(Artist.id == artist_id).first()
+    if row is None or awaiting_sweep(row.next_show_date):
+        return None
+    return str(row.updated_at), row.updated_at
+
+
+def artist_form_values():
+    return {
+        "name": request.form.get('name'),
+        "city": request.form.get('city'),
+        "state": request.form.get('state'),
+        "phone": request.form.get('phone'),
+        "image_link": request.form.get('image_link'),
+        "facebook_link": request.form.get('facebook_link'),
+        "website": request.form.get('website_link'),
+        "seeking_venue": request.form.get('seeking_venue') == "y",
+        "seeking_description": request.form.get('seeking_description'),
+    }
+
+
+#  Artists
+#  ----------------------------------------------------------------
+
+@bp.route('/artists')
+@read_only
+@query_budget(2)
+@conditional_get.validated(artists_version)
+@page_cache.cached('artists')
+def artists():
+    artist_rows, previous_cursor, next_cursor = keyset_page(
+        rows(ARTIST_LISTING),
+        [Artist.name, Artist.id],
+        current_app.config['LISTING_PAGE_SIZE'],
+        after=request.args.get('after'),
+        before=request.args.get('before')
+    )
+    return render_template('pages/artists.html', artists=artist_rows,
+                           previous_cursor=previous_cursor, next_cursor=next_cursor)
+
+
+@bp.route('/artists/search', methods=['GET', 'POST'])
+@read_only
+@query_budget(2)
+def search_artists():
+    # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
+    # search for "band" should return "The Wild Sax Band".
+    search_term = request.values.get('search_term', '').strip()
+    response = search(Artist, search_term,
+                      page=request.args.get('page', 1, type=int),
+                      per_page=current_app.config['SEARCH_PAGE_SIZE'])
+    return render_template('pages/search_artists.html', results=response,
+                           search_term=search_term)
+
+
+@bp.route('/artists/typeahead')
+@read_only
+@query_budget(4)
+def typeahead_artists():
+    # The artists with a word of their name starting with q, from the in-process index.
+    matches = typeahead.lookup(Artist, request.args.get('q', ''), request.args.get('limit', type=int))
+    return jsonify(results=[{"id": row_id, "name": name} for row_id, name in matches])
+
+
+def browse_artists_version(genre_name=None):
+    return browse_version(Artist)
+
+
+@bp.route('/artists/browse')
+@bp.route('/genres/<genre_name>/artists')
+@read_only
+@query_budget(5)
+@conditional_get.validated(browse_artists_version)
+def browse_artists(genre_name=None):
+    # Artists by genres, all or any of them, state and seeking_venue, e.g.
+    # /artists/browse?genre=Jazz&genre=Blues&match=any&state=CA&seeking=y
+    from forms import ArtistForm
+    if genre_name is not None and not genre_exists(genre_name):
+        abort(404)
+    filters = browse_filters(request.args, genre_name)
+    response = browse(Artist, page_size=current_app.config['LISTING_PAGE_SIZE'],
+                      after=request.args.get('after'), before=request.args.get('before'), **filters)
+    page_args = dict(request.view_args, **{key: values for key, values in request.args.lists()
+                                           if key not in ('after', 'before')})
+    return render_template('pages/browse_artists.html', results=response, filters=filters, genre_name=genre_name,
+                           page_args=page_args,
+                           genre_choices=[name for name, _ in ArtistForm.genres.kwargs['choices']],
+                           state_choices=[name for name, _ in ArtistForm.state.kwargs['choices']])
+
+
+@bp.route('/artists/<int:artist_id>')
+@read_only
+@query_budget(4)
+@conditional_get.validated(artist_version)
+@page_cache.cached('artist:{artist_id}')
+def show_artist(artist_id):
+    data = {}
+    try:
+        artist = rows(ARTIST_DETAIL).filter(Artist.id == artist_id).first()
+        current_time = datetime_now.datetime.utcnow()
+        # Get past and upcoming shows lists in a single pass
+        past_shows_list = []
+        upcoming_shows_list = []
+        artist_shows = rows(ARTIST_SHOWS) \
+            .join(Venue, Show.venue_id == Venue.id) \
+            .filter(Show.artist_id == artist_id) \
+            .order_by(Show.date) \
+            .all()
+        for show in artist_shows:
+            if show.start_time < current_time:
+                past_shows_list.append(show)
+            elif show.start_time > current_time:
+                upcoming_shows_list.append(show)
+
+        if upcoming_shows_list:
+            page_cache.expire_at(upcoming_shows_list[0].start_time)
+        data = dict(
+            artist._asdict(),
+            genres=genre_names(Artist, artist_id),
+            past_shows=past_shows_list,
+            upcoming_shows=upcoming_shows_list,
+            past_shows_count=len(past_shows_list),
+            upcoming_shows_count=len(upcoming_shows_list)
+        )
+    except:
+        current_app.logger.exception('Could not load artist %s', artist_id)
+        abort(500)
+    finally:
+        db.session.close()
+    return render_template('pages/show_artist.html', artist=data)
+
+
+@bp.route('/artists/<int:artist_id>/shows.ics')
+@read_only
+@query_budget(3)
+@conditional_get.validated(artist_version)
+def artist_calendar(artist_id):
+    # Every show of the artist as calendar events, streamed from the database.
+    artist = db.session.query(Artist.name).filter(Artist.id == artist_id).first()
+    if artist is None:
+        abort(404)
+    events = ical_calendar(artist.name, export_shows(Show.artist_id == artist_id), request.host)
+    return current_app.response_class(stream_with_context(events), mimetype='text/calendar')
+
+
+#  Delete
+#  ----------------------------------------------------------------
+
+def delete_artists(artist_ids):
+    """Delete artists in one statement, the database cascading to their shows
+    and genre links. Returns the number of deleted artists."""
+    artist_ids = list(artist_ids)
+    # Their venues' pages change, and so do the counters of those with upcoming shows by them.
+    venue_shows = db.session.query(Show.venue_id, func.max(Show.date)) \
+        .filter(Show.artist_id.in_(artist_ids)) \
+        .group_by(Show.venue_id) \
+        .all()
+    current_time = datetime_now.datetime.utcnow()
+    deleted = db.session.query(Artist).filter(Artist.id.in_(artist_ids)).delete(synchronize_session=False)
+    filters_changed(Artist)
+    touch(Venue, [venue_id for venue_id, _ in venue_shows])
+    refresh_counters(Venue, [venue_id for venue_id, last_show in venue_shows if last_show > current_time])
+    db.session.commit()
+    typeahead.discard(Artist, artist_ids)
+    page_cache.invalidate('venues', 'artists', 'shows', *['artist:%d' % artist_id for artist_id in artist_ids] +
+                          ['venue:%d' % venue_id for venue_id, _ in venue_shows])
+    return deleted
+
+
+@bp.route('/artists/<int:artist_id>', methods=['DELETE'])
+def delete_artist(artist_id):
+    try:
+        name = db.session.query(Artist.name).filter_by(id=artist_id).scalar()
+        if name is not None:
+            delete_artists([artist_id])
+            flash(name + " artist has been deleted.")
+        else:
+            flash("This artist doesn't exist.")
+    except:
+        db.session.rollback()
+        current_app.logger.exception('Could not delete artist %s', artist_id)
+        flash("An error occurred. Artist could not be deleted.")
+    finally:
+        db.session.close()
+    return redirect(url_for("index"))
+
+
+@bp.route('/artists/delete', methods=['POST'])
+def delete_artist_batch():
+    # Deletes every artist of the artist_id form values.
+    try:
+        deleted = delete_artists(request.form.getlist('artist_id', type=int))
+        flash("{} artists have been deleted.".format(deleted))
+    except:
+        db.session.rollback()
+        current_app.logger.exception('Could not delete artists')
+        flash("An error occurred. Artists could not be deleted.")
+    finally:
+        db.session.close()
+    return redirect(url_for("index"))
+
+
+#  Update
+#  ----------------------------------------------------------------
+
+@bp.route('/artists/<int:artist_id>/edit', methods=['GET'])
+@query_budget(2)
+def edit_artist(artist_id):
+    from forms import ArtistForm
+    form = ArtistForm()
+    artist_data = Artist.query.filter_by(id=artist_id).first()  # type: Artist
+    # Get genres list
+    genres_list = []
+    for genre in artist_data.genres:
+        genres_list.append(genre.name)
+    artist = {
+        "id": artist_id,
+        "name": artist_data.name,
+        "genres": genres_list,
+        "city": artist_data.city,
+        "state": artist_data.state,
+        "phone": artist_data.phone,
+        "website": artist_data.website,
+        "facebook_link": artist_data.facebook_link,
+        "seeking_venue": artist_data.seeking_venue,
+        "seeking_description": artist_data.seeking_description,
+        "image_link": artist_data.image_link
+    }
+    return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+
+@bp.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+    # artist record with ID <artist_id> using the new attributes
+    try:
+        # The artist and its genres in one query; only what changed is written.
+        artist = Artist.query.options(joinedload(Artist.genres)).filter_by(id=artist_id).first()
+        values = artist_form_values()
+        changed = apply_edit(artist, values, request.form.getlist('genres'))
+        if changed:
+            if changed & FILTERED_FIELDS:
+                filters_changed(Artist)
+            if changed & SHOWN_FIELDS:
+                # Its venues' pages render it too.
+                touch(Venue, db.session.query(Show.venue_id).filter_by(artist_id=artist_id))
+            pages = artist_pages(artist_id, changed)
+            db.session.commit()
+            if 'name' in changed:
+                typeahead.add(Artist, artist_id, values['name'])
+            page_cache.invalidate(*pages)
+            flash("Artist " + request.form.get('name') + " has been updated.")
+        else:
+            flash("Artist " + request.form.get('name') + " has no changes to save.")
+    except:
+        flash('An error occurred. Artist could not be updated.')
+        db.session.rollback()
+        current_app.logger.exception('Could not edit artist %s', artist_id)
+    finally:
+        db.session.close()
+    return redirect(url_for('artists.show_artist', artist_id=artist_id))
+
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+@bp.route('/artists/create', methods=['GET'])
+def create_artist_form():
+    from forms import ArtistForm
+    form = ArtistForm()
+    return render_template('forms/new_artist.html', form=form)
+
+
+@bp.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+    try:
+        newArtist = Artist(**artist_form_values())
+        db.session.add(newArtist)
+        newArtist.genres = resolve_genres(request.form.getlist('genres'))
+        filters_changed(Artist)
+        db.session.commit()
+        typeahead.add(Artist, newArtist.id, newArtist.name)
+        page_cache.invalidate('artists')
+        # on successful db insert, flash success
+        flash('Artist ' + newArtist.name + ' was successfully listed!')
+    except:
+        flash('An error occurred. Artist ' + request.form.get('name') + ' could not be listed.')
+        db.session.rollback()
+        current_app.logger.exception('Could not create artist')
+    finally:
+        db.session.close()
+    return render_template('pages/home.html')
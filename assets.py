@@ -0,0 +1,185 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+
+from flask import current_app, request, send_from_directory, url_for
+
+# ----------------------------------------------------------------------------#
+# Static assets.
+# ----------------------------------------------------------------------------#
+
+# `flask build-assets` copies every static file to static/dist under a name
+# carrying a hash of its content, concatenates the BUNDLES, and writes gzip
+# and brotli variants next to the compressible ones. Templates link assets
+# with asset_url() and asset_urls(), which resolve to those copies once they
+# are built (and to the plain files until then). As a fingerprinted file never
+# changes, it is served with an immutable far-future Cache-Control, in the
+# smallest encoding the browser accepts.
+
+# The stylesheets and deferred scripts each layout loads, in order.
+BUNDLES = {
+    'bundles/main.css': ['css/bootstrap.min.css', 'css/layout.main.css', 'css/main.css',
+                         'css/main.responsive.css', 'css/main.quickfix.css'],
+    'bundles/form.css': ['css/layout.main.css', 'css/main.css', 'css/main.responsive.css',
+                         'css/main.quickfix.css'],
+    'bundles/head.js': ['js/libs/modernizr-2.8.2.min.js', 'js/libs/moment.min.js'],
+    'bundles/main.js': ['js/script.js', 'js/libs/bootstrap-3.1.1.min.js', 'js/plugins.js'],
+    'bundles/form.js': ['js/libs/bootstrap-3.1.1.min.js', 'js/plugins.js', 'js/script.js'],
+}
+
+BUILD_DIRECTORY = 'dist'
+MANIFEST = 'manifest.json'
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.eot', '.otf', '.ttf', '.json', '.txt')
+# Preferred first.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+def _fingerprinted(path, content):
+    root, extension = posixpath.splitext(path)
+    return '{}/{}.{}{}'.format(BUILD_DIRECTORY, root, hashlib.sha256(content).hexdigest()[:12], extension)
+
+
+def _rewrite_css_urls(content, source_path, assets, static_url_path):
+    # Relative url()s of a stylesheet point at the fingerprinted copies, by
+    # absolute URL so they survive the move to dist/ and into bundles.
+    def replace(match):
+        url = match.group(2)
+        if re.match(r'^(?:[a-z]+:|/|#)', url, re.IGNORECASE):
+            return match.group(0)
+        target, suffix = re.match(r'^([^?#]*)(.*)$', url).groups()
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(source_path), target))
+        if target not in assets:
+            return match.group(0)
+        return 'url("{}/{}{}")'.format(static_url_path, assets[target], suffix)
+    return _CSS_URL.sub(replace, content.decode('utf-8')).encode('utf-8')
+
+
+def _write(static_folder, path, content):
+    destination = os.path.join(static_folder, *path.split('/'))
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    with open(destination, 'wb') as out:
+        out.write(content)
+
+
+def _precompress(static_folder, path, content, brotli):
+    """Write the encoded variants of `path` that are smaller than it."""
+    encodings = []
+    variants = [('gzip', '.gz', gzip.compress(content, 9, mtime=0))]
+    if brotli is not None:
+        variants.insert(0, ('br', '.br', brotli.compress(content, quality=11)))
+    for encoding, suffix, encoded in variants:
+        if len(encoded) < len(content):
+            _write(static_folder, path + suffix, encoded)
+            encodings.append(encoding)
+    return encodings
+
+
+def build_assets(static_folder, static_url_path='/static', bundle=True):
+    """Fingerprint, bundle and precompress the files of `static_folder`.
+
+    Returns the manifest, also written to dist/manifest.json. Brotli variants
+    need the optional brotli package.
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    sources = {}
+    for directory, subdirectories, files in os.walk(static_folder):
+        relative = os.path.relpath(directory, static_folder)
+        if relative == BUILD_DIRECTORY:
+            subdirectories[:] = []
+            continue
+        for name in files:
+            if not name.startswith('.'):
+                path = posixpath.normpath(posixpath.join(relative.replace(os.sep, '/'), name))
+                with open(os.path.join(directory, name), 'rb') as source:
+                    sources[path] = source.read()
+
+    # Stylesheets last, they embed the fingerprinted names of what they link.
+    assets = {}
+    contents = {}
+    for path in sorted(sources, key=lambda path: path.endswith('.css')):
+        content = sources[path]
+        if path.endswith('.css'):
+            content = _rewrite_css_urls(content, path, assets, static_url_path)
+        assets[path] = _fingerprinted(path, content)
+        contents[path] = content
+    if bundle:
+        for path, members in BUNDLES.items():
+            content = b'\n'.join(contents[member] for member in members)
+            assets[path] = _fingerprinted(path, content)
+            contents[path] = content
+
+    encodings = {}
+    for path, content in contents.items():
+        _write(static_folder, assets[path], content)
+        encodings[assets[path]] = _precompress(static_folder, assets[path], content, brotli) \
+            if path.endswith(COMPRESSIBLE) else []
+    manifest = {'assets': assets, 'encodings': encodings}
+    _write(static_folder, '{}/{}'.format(BUILD_DIRECTORY, MANIFEST), json.dumps(manifest, indent=1).encode())
+    return manifest
+
+
+class Assets(object):
+    """Template helpers for the built assets and their static file view."""
+
+    def __init__(self, app=None):
+        self.assets = {}
+        self.encodings = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ASSETS_MAX_AGE', 365 * 24 * 3600)
+        app.extensions['assets'] = self
+        self.load_manifest(app.static_folder)
+        app.add_template_global(self.asset_url)
+        app.add_template_global(self.asset_urls)
+        app.view_functions['static'] = self.send_static_file
+
+    def load_manifest(self, static_folder):
+        path = os.path.join(static_folder, BUILD_DIRECTORY, MANIFEST)
+        if os.path.exists(path):
+            with open(path) as source:
+                manifest = json.load(source)
+            self.assets, self.encodings = manifest['assets'], manifest['encodings']
+
+    def asset_url(self, path):
+        """URL of the fingerprinted copy of the static file `path`."""
+        return url_for('static', filename=self.assets.get(path, path))
+
+    def asset_urls(self, path):
+        """URLs to load for `path`: the bundle when it is built, its files otherwise."""
+        if path in BUNDLES and path not in self.assets:
+            return [self.asset_url(member) for member in BUNDLES[path]]
+        return [self.asset_url(path)]
+
+    def send_static_file(self, filename):
+        if filename not in self.encodings:
+            return current_app.send_static_file(filename)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        available = self.encodings[filename]
+        for encoding, suffix in ENCODINGS:
+            if encoding in available and request.accept_encodings[encoding]:
+                response = send_from_directory(current_app.static_folder, filename + suffix,
+                                               mimetype=mimetype, max_age=current_app.config['ASSETS_MAX_AGE'])
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_from_directory(current_app.static_folder, filename,
+                                           mimetype=mimetype, max_age=current_app.config['ASSETS_MAX_AGE'])
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+assets = Assets()
@@ -0,0 +1,230 @@
+"""Load test the app with concurrent readers and writers.
+
+Seeds a database, starts benchmarks.serve with the requested number of
+worker processes (or targets --url), then runs --concurrency client threads
+for --duration seconds with a --write-ratio share of writes. Requests/s,
+latency percentiles, error rate and database pool saturation are reported
+per interval and for the whole run.
+
+    python -m benchmarks.load --scale 100k --workers 4 --concurrency 32 --write-ratio 0.1
+    python -m benchmarks.load --url http://127.0.0.1:8000 --scale 100k --duration 60
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+
+from benchmarks.routes import percentile
+from benchmarks.seed import SCALES
+
+POOL_TIMING = re.compile(r'pool;desc="checkedout=(\d+) capacity=(\d+)"')
+SEARCH_TERMS = ['music', 'hop', 'band', 'park', 'live', 'a', 'the', 'sax']
+
+
+def read_requests(rng, num_venues, num_artists):
+    choice = rng.random()
+    if choice < 0.2:
+        return 'GET', '/venues', None
+    if choice < 0.4:
+        return 'GET', '/shows', None
+    if choice < 0.5:
+        return 'GET', '/artists', None
+    if choice < 0.65:
+        return 'GET', '/venues/{}'.format(rng.randint(1, num_venues)), None
+    if choice < 0.8:
+        return 'GET', '/artists/{}'.format(rng.randint(1, num_artists)), None
+    if choice < 0.9:
+        return 'POST', '/venues/search', {'search_term': rng.choice(SEARCH_TERMS)}
+    return 'POST', '/artists/search', {'search_term': rng.choice(SEARCH_TERMS)}
+
+
+def write_requests(rng, num_venues, num_artists):
+    choice = rng.random()
+    if choice < 0.6:
+        return 'POST', '/shows/create', {
+            'venue_id': rng.randint(1, num_venues),
+            'artist_id': rng.randint(1, num_artists),
+            'start_time': '2035-{:02d}-{:02d} 20:00:00'.format(rng.randint(1, 12), rng.randint(1, 28)),
+        }
+    if choice < 0.8:
+        venue_id = rng.randint(1, num_venues)
+        return 'POST', '/venues/{}/edit'.format(venue_id), {
+            'name': 'Venue {}'.format(venue_id), 'city': 'Austin', 'state': 'TX', 'address': '1 Main Street',
+            'genres': rng.sample(['Jazz', 'Blues', 'Soul', 'Funk'], 2), 'seeking_talent': 'y',
+        }
+    artist_id = rng.randint(1, num_artists)
+    return 'POST', '/artists/{}/edit'.format(artist_id), {
+        'name': 'Artist {}'.format(artist_id), 'city': 'Austin', 'state': 'TX',
+        'genres': rng.sample(['Jazz', 'Blues', 'Soul', 'Funk'], 2),
+    }
+
+
+class Recorder(object):
+    """Samples of the run, bucketed per interval."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.started = time.monotonic()
+        self.buckets = defaultdict(lambda: {'latencies': [], 'errors': 0, 'pool': []})
+        self._lock = threading.Lock()
+
+    def record(self, latency, error, pool):
+        bucket = int((time.monotonic() - self.started) // self.interval)
+        with self._lock:
+            samples = self.buckets[bucket]
+            samples['latencies'].append(latency)
+            samples['errors'] += error
+            if pool is not None:
+                samples['pool'].append(pool)
+
+
+def summarize(latencies, errors, pool, seconds):
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        'requests': count,
+        'requests_per_s': round(count / seconds, 1),
+        'error_rate': round(errors / count, 4) if count else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50), 2) if count else None,
+        'p95_ms': round(percentile(latencies, 0.95), 2) if count else None,
+        'p99_ms': round(percentile(latencies, 0.99), 2) if count else None,
+        'pool_max_checkedout': max((used for used, _ in pool), default=None),
+        'pool_saturation': round(max((used / capacity for used, capacity in pool if capacity), default=0), 2)
+        if pool else None,
+    }
+
+
+def client(host, port, deadline, recorder, write_ratio, num_venues, num_artists, seed_value):
+    rng = random.Random(seed_value)
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    while time.monotonic() < deadline:
+        if rng.random() < write_ratio:
+            method, path, form = write_requests(rng, num_venues, num_artists)
+        else:
+            method, path, form = read_requests(rng, num_venues, num_artists)
+        body = urllib.parse.urlencode(form, doseq=True) if form else None
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'} if form else {}
+        start = time.perf_counter()
+        pool = None
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            error = response.status >= 400
+            timings = POOL_TIMING.search(', '.join(response.headers.get_all('Server-Timing') or []))
+            if timings:
+                pool = (int(timings.group(1)), int(timings.group(2)))
+            if response.getheader('Connection', '').lower() == 'close' or response.version == 10:
+                connection.close()
+        except (OSError, http.client.HTTPException):
+            error = True
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=30)
+        recorder.record((time.perf_counter() - start) * 1000, error, pool)
+
+
+def wait_for_server(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=1)
+            connection.request('GET', '/')
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('The server at {}:{} did not start'.format(host, port))
+
+
+def seed_database(database_uri, scale):
+    from app import create_app
+    from benchmarks.seed import seed
+    from models import db
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_uri, 'TYPEAHEAD_WARM': False})
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed(*SCALES[scale])
+        db.session.remove()
+        db.engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='already running server to target; it must hold data of --scale')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='1k')
+    parser.add_argument('--database-uri', help='database to seed and serve, it is dropped and recreated '
+                                               '(default: a temporary SQLite file)')
+    parser.add_argument('--workers', type=int, default=4, help='server worker processes')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--concurrency', type=int, default=16, help='client threads')
+    parser.add_argument('--duration', type=float, default=30, help='seconds')
+    parser.add_argument('--write-ratio', type=float, default=0.1)
+    parser.add_argument('--interval', type=float, default=5, help='reporting interval in seconds')
+    parser.add_argument('--output', help='JSON file for the results')
+    args = parser.parse_args()
+
+    num_venues, num_artists, _ = SCALES[args.scale]
+    server = None
+    if args.url:
+        target = urllib.parse.urlsplit(args.url)
+        host, port = target.hostname, target.port or 80
+    else:
+        host, port = '127.0.0.1', args.port
+        database_uri = args.database_uri or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'load.db')
+        seed_database(database_uri, args.scale)
+        server = subprocess.Popen([sys.executable, '-m', 'benchmarks.serve', '--host', host,
+                                   '--port', str(port), '--workers', str(args.workers),
+                                   '--database-uri', database_uri],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_server(host, port)
+        recorder = Recorder(args.interval)
+        deadline = time.monotonic() + args.duration
+        threads = [threading.Thread(target=client, args=(host, port, deadline, recorder, args.write_ratio,
+                                                         num_venues, num_artists, number), daemon=True)
+                   for number in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    intervals = []
+    print('{:>8} {:>9} {:>7} {:>9} {:>9} {:>9} {:>6}'.format(
+        'time (s)', 'req/s', 'errors', 'p50 ms', 'p95 ms', 'p99 ms', 'pool'))
+    for bucket in sorted(recorder.buckets):
+        samples = recorder.buckets[bucket]
+        summary = summarize(samples['latencies'], samples['errors'], samples['pool'], args.interval)
+        summary['second'] = round(bucket * args.interval, 1)
+        intervals.append(summary)
+        print('{second:>8} {requests_per_s:>9} {error_rate:>7.2%} {p50_ms:>9} {p95_ms:>9} {p99_ms:>9} '
+              '{pool}'.format(pool='-' if summary['pool_saturation'] is None
+                              else '{:.0%}'.format(summary['pool_saturation']), **summary))
+    total = summarize(
+        [latency for samples in recorder.buckets.values() for latency in samples['latencies']],
+        sum(samples['errors'] for samples in recorder.buckets.values()),
+        [pool for samples in recorder.buckets.values() for pool in samples['pool']],
+        args.duration)
+    print('Total: {requests} requests, {requests_per_s} req/s, {error_rate:.2%} errors, '
+          'p50 {p50_ms} ms, p95 {p95_ms} ms, p99 {p99_ms} ms, pool saturation {pool_saturation}'.format(**total))
+    if args.output:
+        with open(args.output, 'w') as out:
+            json.dump({'scale': args.scale, 'workers': args.workers, 'concurrency': args.concurrency,
+                       'write_ratio': args.write_ratio, 'total': total, 'intervals': intervals}, out, indent=2)
+
+
+if __name__ == '__main__':
+    main()
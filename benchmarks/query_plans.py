@@ -0,0 +1,130 @@
+"""Show the plans and timings of the hot Show, genre and browse queries with
+and without the indexes added by migrations 0002_show_access_indexes and
+0007_browse_indexes.
+
+    python -m benchmarks.query_plans --shows 100000
+    python -m benchmarks.query_plans --database-uri postgresql://localhost/fyyur_bench --analyze
+"""
+import argparse
+import datetime
+import os
+import tempfile
+import time
+
+from sqlalchemy import bindparam, text
+
+from app import create_app
+from benchmarks.seed import seed
+from models import db
+
+INDEXES = [
+    'ix_show_venue_id_date',
+    'ix_show_artist_id_date',
+    'ix_venue_genre_genre_name_venue_id',
+    'ix_artist_genre_genre_name_artist_id',
+    'ix_venue_lower_name',
+    'ix_artist_lower_name',
+    'ix_venue_name_id',
+    'ix_venue_state_name_id',
+    'ix_artist_state_name_id',
+]
+
+QUERIES = {
+    'venue shows by date':
+        'SELECT id, artist_id, date FROM "Show" WHERE venue_id = :venue_id ORDER BY date',
+    'venue upcoming shows count':
+        'SELECT count(*) FROM "Show" WHERE venue_id = :venue_id AND date > :now',
+    'artist shows by date':
+        'SELECT id, venue_id, date FROM "Show" WHERE artist_id = :artist_id ORDER BY date',
+    'artist upcoming shows count':
+        'SELECT count(*) FROM "Show" WHERE artist_id = :artist_id AND date > :now',
+    'venues of a genre':
+        'SELECT venue_id FROM venue_genre WHERE genre_name = :genre',
+    'venue by name':
+        'SELECT id FROM "Venue" WHERE lower(name) = :name',
+    'venues of a genre by name':
+        'SELECT id, name, upcoming_shows_count FROM "Venue" '
+        'WHERE id IN (SELECT venue_id FROM venue_genre WHERE genre_name = :genre) ORDER BY name, id LIMIT 61',
+    'artists of two genres in a state by name':
+        'SELECT id, name, upcoming_shows_count FROM "Artist" '
+        'WHERE id IN (SELECT artist_id FROM artist_genre WHERE genre_name = :genre) '
+        'AND id IN (SELECT artist_id FROM artist_genre WHERE genre_name = :other_genre) '
+        'AND state = :state ORDER BY name, id LIMIT 61',
+    'artists of either genre count':
+        'SELECT count(*) FROM "Artist" '
+        'WHERE id IN (SELECT artist_id FROM artist_genre WHERE genre_name IN (:genre, :other_genre))',
+}
+
+
+def _indexes():
+    by_name = {index.name: index for table in db.metadata.tables.values() for index in table.indexes}
+    return [by_name[name] for name in INDEXES]
+
+
+def _statement(sql):
+    return text(sql).bindparams(bindparam('now', type_=db.DateTime)) if ':now' in sql else text(sql)
+
+
+def report(label, params, repeat, analyze):
+    dialect = db.engine.dialect.name
+    explain = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN ANALYZE ' if analyze else 'EXPLAIN '
+    print('=' * 78)
+    print(label)
+    with db.engine.connect() as connection:
+        connection.execute(text('ANALYZE'))
+        for name, sql in QUERIES.items():
+            statement = _statement(sql)
+            query_params = {key: value for key, value in params.items() if ':' + key in sql}
+            plan = connection.execute(_statement(explain + sql), query_params).fetchall()
+            start = time.perf_counter()
+            for _ in range(repeat):
+                connection.execute(statement, query_params).fetchall()
+            elapsed = (time.perf_counter() - start) / repeat * 1000
+            print('-' * 78)
+            print('{}: {:.3f} ms'.format(name, elapsed))
+            for row in plan:
+                print('    ' + str(row[-1] if dialect == 'sqlite' else row[0]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-uri', help='database to seed, it is dropped and recreated '
+                                               '(default: a temporary SQLite file)')
+    parser.add_argument('--venues', type=int, default=2000)
+    parser.add_argument('--artists', type=int, default=5000)
+    parser.add_argument('--shows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=50, help='executions timed per query')
+    parser.add_argument('--analyze', action='store_true', help='use EXPLAIN ANALYZE on Postgres')
+    args = parser.parse_args()
+
+    database_uri = args.database_uri
+    if database_uri is None:
+        database_uri = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'query_plans.db')
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_uri, 'TYPEAHEAD_WARM': False})
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed(args.venues, args.artists, args.shows)
+        params = {
+            'venue_id': args.venues // 2,
+            'artist_id': args.artists // 2,
+            'now': datetime.datetime.utcnow(),
+            'genre': 'Jazz',
+            'other_genre': 'Blues',
+            'state': 'CA',
+            'name': db.session.execute(text('SELECT lower(name) FROM "Venue" WHERE id = 1')).scalar(),
+        }
+        db.session.close()
+
+        for index in _indexes():
+            index.drop(bind=db.engine)
+        report('Before: no access pattern or browse indexes', params, args.repeat, args.analyze)
+        for index in _indexes():
+            index.create(bind=db.engine)
+        report('After: migrations 0002_show_access_indexes and 0007_browse_indexes', params, args.repeat,
+               args.analyze)
+
+
+if __name__ == '__main__':
+    main()
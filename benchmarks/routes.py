@@ -0,0 +1,233 @@
+"""Time every route of the app through the Flask test client on a seeded
+database and write latency percentiles, statement counts and peak Python
+memory per route to a JSON file.
+
+    python -m benchmarks.routes --scale 100k
+    python -m benchmarks.routes --scale 1m --database-uri postgresql://localhost/fyyur_bench
+    python -m benchmarks.routes --scale 100k --compare benchmarks/results/100k-<commit>.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import event
+
+from app import create_app
+from benchmarks.seed import SCALES, seed
+from models import db
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+# Routes timed in this order: reads first, then the writes, which change the data.
+# Ids are picked in the middle of the seeded ranges.
+
+
+def next_id_path(pattern, ids):
+    # A path taking the next of `ids` on every call, e.g. for deletes; reported as `pattern`.
+    ids = iter(ids)
+
+    def path():
+        return pattern.replace('<id>', str(next(ids)))
+    path.pattern = pattern
+    return path
+
+
+def routes(num_venues, num_artists):
+    venue_id = num_venues // 2
+    artist_id = num_artists // 2
+    venue_form = {'name': 'Benchmark Venue', 'city': 'Austin', 'state': 'TX', 'address': '1 Main Street',
+                  'phone': '326-123-0000', 'genres': ['Jazz', 'Blues'],
+                  'facebook_link': 'https://www.facebook.com/benchmark', 'seeking_talent': 'y'}
+    artist_form = {'name': 'Benchmark Artist', 'city': 'Austin', 'state': 'TX', 'phone': '326-123-0000',
+                   'genres': ['Jazz', 'Soul'], 'facebook_link': 'https://www.facebook.com/benchmark'}
+    return [
+        ('GET', '/', None),
+        ('GET', '/venues', None),
+        ('GET', '/venues/{}'.format(venue_id), None),
+        ('GET', '/artists', None),
+        ('GET', '/artists/{}'.format(artist_id), None),
+        ('GET', '/shows', None),
+        ('GET', '/venues/{}/shows.ics'.format(venue_id), None),
+        ('GET', '/artists/{}/shows.ics'.format(artist_id), None),
+        ('GET', '/shows.csv', None),
+        ('POST', '/venues/search', lambda: {'search_term': 'music'}),
+        ('POST', '/venues/search', lambda: {'search_term': 'a'}),
+        ('POST', '/artists/search', lambda: {'search_term': 'band'}),
+        ('POST', '/artists/search', lambda: {'search_term': 'a'}),
+        ('GET', '/venues/typeahead?q=mus', None),
+        ('GET', '/artists/typeahead?q=b', None),
+        ('GET', '/genres/Jazz/venues', None),
+        ('GET', '/artists/browse?genre=Jazz&genre=Blues', None),
+        ('GET', '/artists/browse?genre=Jazz&genre=Blues&match=any&state=CA&seeking=y', None),
+        ('GET', '/venues/create', None),
+        ('GET', '/artists/create', None),
+        ('GET', '/shows/create', None),
+        ('GET', '/venues/{}/edit'.format(venue_id), None),
+        ('GET', '/artists/{}/edit'.format(artist_id), None),
+        ('POST', '/venues/create', lambda: venue_form),
+        ('POST', '/artists/create', lambda: artist_form),
+        ('POST', '/shows/create', lambda: {'venue_id': venue_id, 'artist_id': artist_id,
+                                           'start_time': '2035-01-01 20:00:00'}),
+        ('POST', '/venues/{}/edit'.format(venue_id), lambda: venue_form),
+        ('POST', '/artists/{}/edit'.format(artist_id), lambda: artist_form),
+        ('DELETE', next_id_path('/venues/<id>', range(num_venues, 0, -1)), None),
+        ('DELETE', next_id_path('/artists/<id>', range(num_artists, 0, -1)), None),
+    ]
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_route(client, method, path, data, iterations, warmup, statements, headers=None):
+    def request():
+        url = path() if callable(path) else path
+        return client.open(url, method=method, data=data() if data else None, headers=headers)
+
+    for _ in range(warmup):
+        request()
+
+    latencies = []
+    queries = []
+    status = None
+    for _ in range(iterations):
+        statements['count'] = 0
+        start = time.perf_counter()
+        response = request()
+        latencies.append((time.perf_counter() - start) * 1000)
+        queries.append(statements['count'])
+        status = response.status_code
+        size = len(response.get_data())
+
+    tracemalloc.start()
+    request()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'status': status,
+        'iterations': iterations,
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'max_ms': round(latencies[-1], 3),
+        'queries': max(queries),
+        'bytes': size,
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def compare(baseline, results, threshold):
+    """Print the routes whose p50 or statement count regressed against `baseline`."""
+    regressions = 0
+    for name, result in results['routes'].items():
+        before = baseline['routes'].get(name)
+        if before is None:
+            continue
+        change = (result['p50_ms'] - before['p50_ms']) / max(before['p50_ms'], 1e-9)
+        more_queries = result['queries'] > before['queries']
+        if change > threshold or more_queries:
+            regressions += 1
+        print('{:<34} p50 {:>9.3f} -> {:>9.3f} ms ({:+.0%})  queries {:>4} -> {:<4}{}'.format(
+            name, before['p50_ms'], result['p50_ms'], change, before['queries'], result['queries'],
+            '  REGRESSION' if change > threshold or more_queries else ''))
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=sorted(SCALES), default='1k')
+    parser.add_argument('--database-uri', help='database to seed, it is dropped and recreated '
+                                               '(default: a temporary SQLite file)')
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--with-cache', action='store_true', help='keep the page cache enabled')
+    parser.add_argument('--accept-encoding', help='Accept-Encoding header sent, e.g. "gzip" to time compressed '
+                                                  'responses (default: none, uncompressed)')
+    parser.add_argument('--output', help='JSON results file (default: benchmarks/results/<scale>-<commit>.json)')
+    parser.add_argument('--compare', help='earlier JSON results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative p50 slowdown reported as a regression (default: 0.2)')
+    args = parser.parse_args()
+
+    database_uri = args.database_uri
+    if database_uri is None:
+        database_uri = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'routes.db')
+    # The database is seeded after the app is created: no typeahead to warm yet.
+    config = {'SQLALCHEMY_DATABASE_URI': database_uri, 'WTF_CSRF_ENABLED': False, 'TYPEAHEAD_WARM': False}
+    if not args.with_cache:
+        config['CACHE_TYPE'] = 'null'
+    app = create_app(config)
+    num_venues, num_artists, num_shows = SCALES[args.scale]
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        started = time.perf_counter()
+        seed(num_venues, num_artists, num_shows)
+        db.session.remove()
+        print('Seeded {} shows in {:.1f}s'.format(num_shows, time.perf_counter() - started))
+
+        statements = {'count': 0}
+
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def count_statement(*args):
+            statements['count'] += 1
+
+        engine_dialect = db.engine.dialect.name
+
+    results = {
+        'commit': git_commit(),
+        'scale': args.scale,
+        'database': engine_dialect,
+        'venues': num_venues,
+        'artists': num_artists,
+        'shows': num_shows,
+        'accept_encoding': args.accept_encoding,
+        'routes': {},
+    }
+    client = app.test_client()
+    for method, path, data in routes(num_venues, num_artists):
+        name = '{} {}'.format(method, path if not callable(path) else path.pattern)
+        if data and 'search_term' in data():
+            name += ' ({})'.format(data()['search_term'])
+        result = run_route(client, method, path, data, args.iterations, args.warmup, statements,
+                           headers={'Accept-Encoding': args.accept_encoding} if args.accept_encoding else None)
+        results['routes'][name] = result
+        print('{:<34} {status}  p50 {p50_ms:>9.3f}  p95 {p95_ms:>9.3f}  p99 {p99_ms:>9.3f} ms  '
+              '{queries:>4} queries  {bytes:>8} B  {peak_kib:>9.1f} KiB'.format(name, **result))
+
+    output = args.output or os.path.join(RESULTS_DIR, '{}-{}.json'.format(args.scale, results['commit']))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as out:
+        json.dump(results, out, indent=2)
+    print('Results written to ' + output)
+
+    failed = [name for name, result in results['routes'].items() if result['status'] >= 500]
+    if args.compare:
+        with open(args.compare) as source:
+            regressions = compare(json.load(source), results, args.threshold)
+        failed += ['{} regressions'.format(regressions)] if regressions else []
+    if failed:
+        print('Failed: ' + ', '.join(failed))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import datetime
+import random
+
+from counters import UPCOMING_COUNTERS, refresh_counters
+from forms import VenueForm
+from models import db, Venue, Artist, Show, Genre, artist_genre, venue_genre
+
+# ----------------------------------------------------------------------------#
+# Synthetic data.
+# ----------------------------------------------------------------------------#
+
+GENRES = [name for name, _ in VenueForm.genres.kwargs['choices']]
+STATES = [name for name, _ in VenueForm.state.kwargs['choices']]
+CITIES = ['San Francisco', 'New York', 'Chicago', 'Austin', 'Seattle', 'Denver',
+          'Boston', 'Atlanta', 'Portland', 'Nashville', 'Detroit', 'Miami']
+WORDS = ['The', 'Musical', 'Hop', 'Park', 'Square', 'Live', 'Dueling', 'Pianos',
+         'Bar', 'Wild', 'Sax', 'Band', 'Guns', 'Petals', 'Coffee', 'Hall', 'Club']
+
+BATCH_SIZE = 5000
+
+# Named dataset sizes: (venues, artists, shows).
+SCALES = {
+    '1k': (100, 250, 1000),
+    '100k': (2000, 5000, 100000),
+    '1m': (20000, 50000, 1000000),
+}
+
+
+def _name(rng, index):
+    return '{} {} {}'.format(rng.choice(WORDS), rng.choice(WORDS), index)
+
+
+def _insert(table, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(table.insert(), rows[start:start + BATCH_SIZE])
+
+
+def seed(num_venues, num_artists, num_shows, seed_value=0):
+    """Fill an empty database with reproducible venues, artists, genres and shows.
+
+    Shows are spread over two years centred on now, so that roughly half of
+    them are upcoming.
+    """
+    rng = random.Random(seed_value)
+    now = datetime.datetime.utcnow()
+
+    _insert(Genre.__table__, [{'name': name} for name in GENRES])
+    _insert(Venue.__table__, [{
+        'id': venue_id,
+        'name': _name(rng, venue_id),
+        'city': rng.choice(CITIES),
+        'state': rng.choice(STATES),
+        'address': '{} Main Street'.format(venue_id),
+        'phone': '326-123-{:04d}'.format(venue_id % 10000),
+        'image_link': 'https://images.example.com/venues/{}.jpg'.format(venue_id),
+        'facebook_link': 'https://www.facebook.com/venue{}'.format(venue_id),
+        'website': 'https://venue{}.example.com'.format(venue_id),
+        'seeking_talent': rng.random() < 0.5,
+        'seeking_description': 'We are looking for local artists to play on weekends.',
+    } for venue_id in range(1, num_venues + 1)])
+    _insert(Artist.__table__, [{
+        'id': artist_id,
+        'name': _name(rng, artist_id),
+        'city': rng.choice(CITIES),
+        'state': rng.choice(STATES),
+        'phone': '326-456-{:04d}'.format(artist_id % 10000),
+        'image_link': 'https://images.example.com/artists/{}.jpg'.format(artist_id),
+        'facebook_link': 'https://www.facebook.com/artist{}'.format(artist_id),
+        'website': 'https://artist{}.example.com'.format(artist_id),
+        'seeking_venue': rng.random() < 0.5,
+        'seeking_description': 'Looking for shows to perform at in the area.',
+    } for artist_id in range(1, num_artists + 1)])
+    _insert(venue_genre, [{'venue_id': venue_id, 'genre_name': name}
+                          for venue_id in range(1, num_venues + 1)
+                          for name in rng.sample(GENRES, rng.randint(1, 3))])
+    _insert(artist_genre, [{'artist_id': artist_id, 'genre_name': name}
+                           for artist_id in range(1, num_artists + 1)
+                           for name in rng.sample(GENRES, rng.randint(1, 3))])
+    for start in range(0, num_shows, BATCH_SIZE):
+        _insert(Show.__table__, [{
+            'id': show_id,
+            'venue_id': rng.randint(1, num_venues),
+            'artist_id': rng.randint(1, num_artists),
+            'date': now + datetime.timedelta(minutes=rng.randint(-525600, 525600)),
+        } for show_id in range(start + 1, min(start + BATCH_SIZE, num_shows) + 1)])
+    for model in UPCOMING_COUNTERS:
+        refresh_counters(model)
+    db.session.commit()
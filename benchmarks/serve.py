@@ -0,0 +1,51 @@
+"""Serve the app from several pre-forked worker processes sharing one
+listening socket, each handling requests in threads.
+
+    python -m benchmarks.serve --workers 4 --database-uri postgresql://localhost/fyyur_bench
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+
+from werkzeug.serving import make_server
+
+
+def serve(sock, database_uri, threaded):
+    from app import create_app
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_uri} if database_uri else None)
+    host, port = sock.getsockname()[:2]
+    make_server(host, port, app, threaded=threaded, fd=sock.fileno()).serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--no-threads', dest='threaded', action='store_false',
+                        help='handle one request at a time in each worker')
+    parser.add_argument('--database-uri', help='database to serve instead of the configured one')
+    args = parser.parse_args()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=serve, args=(sock, args.database_uri, args.threaded), daemon=True)
+               for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    print('Serving on http://{}:{} with {} workers'.format(args.host, args.port, args.workers), flush=True)
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Measure how long a fresh worker process takes to import and create the
+app and to serve its first request, over several runs.
+
+    python -m benchmarks.startup --runs 20
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.routes import percentile
+
+# Runs in a fresh interpreter; prints the timings as JSON.
+WORKER = '''
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'LOG_FILE': None, 'CACHE_TYPE': 'null',
+                  'TYPEAHEAD_WARM': False})
+created = time.perf_counter()
+app.test_client().get('/')
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (served - created) * 1000,
+    'total_ms': (served - started) * 1000,
+    'modules': len(sys.modules),
+    'deferred': [name for name in ('alembic', 'babel', 'dateutil', 'wtforms') if name not in sys.modules],
+}))
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    runs = [json.loads(subprocess.run([sys.executable, '-c', WORKER], cwd=root, check=True,
+                                      stdout=subprocess.PIPE, universal_newlines=True).stdout)
+            for _ in range(args.runs)]
+    for key in ('import_ms', 'create_app_ms', 'first_request_ms', 'total_ms'):
+        values = sorted(run[key] for run in runs)
+        print('{:<18} p50 {:>8.1f} ms  p95 {:>8.1f} ms'.format(key, percentile(values, 0.50), percentile(values, 0.95)))
+    print('{} modules loaded, not loaded: {}'.format(runs[-1]['modules'], ', '.join(runs[-1]['deferred']) or '-'))
+
+
+if __name__ == '__main__':
+    main()
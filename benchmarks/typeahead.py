@@ -0,0 +1,57 @@
+"""Measure the typeahead prefix index over synthetic venue and artist names:
+its memory per 100k names, build time, lookup and update latencies.
+
+    python -m benchmarks.typeahead --names 100000
+"""
+import argparse
+import random
+import time
+
+from benchmarks.routes import percentile
+from benchmarks.seed import WORDS, _name
+from typeahead import PrefixIndex
+
+
+def _timed_us(calls):
+    timings = []
+    for call, args in calls:
+        started = time.perf_counter()
+        call(*args)
+        timings.append((time.perf_counter() - started) * 1e6)
+    return sorted(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--names', type=int, default=100000)
+    parser.add_argument('--lookups', type=int, default=20000)
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    names = [(row_id, _name(rng, row_id)) for row_id in range(1, args.names + 1)]
+    started = time.perf_counter()
+    index = PrefixIndex(names)
+    build_ms = (time.perf_counter() - started) * 1000
+    memory = index.memory_bytes()
+    print('{} names indexed in {:.0f} ms, {:.1f} MB, {:.1f} MB per 100k names'.format(
+        len(index), build_ms, memory / 1e6, memory / 1e6 * 100000 / len(index)))
+
+    # Prefixes of 1 to 6 letters of the name words, and of the numbers.
+    words = [word.lower() for word in WORDS] + [str(row_id) for row_id in range(1, args.names + 1, 97)]
+    prefixes = [word[:rng.randint(1, 6)] for word in (rng.choice(words) for _ in range(args.lookups))]
+    lookups = _timed_us((index.lookup, (prefix, args.limit)) for prefix in prefixes)
+    print('lookup    p50 {:>7.1f} us  p99 {:>7.1f} us'.format(percentile(lookups, 0.50), percentile(lookups, 0.99)))
+
+    # Renames, then deletes and re-adds, of random rows.
+    row_ids = [rng.randint(1, args.names) for _ in range(1000)]
+    renames = _timed_us((index.add, (row_id, _name(rng, row_id))) for row_id in row_ids)
+    print('rename    p50 {:>7.1f} us  p99 {:>7.1f} us'.format(percentile(renames, 0.50), percentile(renames, 0.99)))
+    discards = _timed_us((index.discard, ([row_id],)) for row_id in row_ids)
+    print('delete    p50 {:>7.1f} us  p99 {:>7.1f} us'.format(percentile(discards, 0.50), percentile(discards, 0.99)))
+    adds = _timed_us((index.add, (row_id, _name(rng, row_id))) for row_id in row_ids)
+    print('create    p50 {:>7.1f} us  p99 {:>7.1f} us'.format(percentile(adds, 0.50), percentile(adds, 0.99)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+import functools
+import operator
+import threading
+from collections import defaultdict
+
+from flask import current_app, g
+from sqlalchemy import func, select
+
+from counters import awaiting_sweep
+from models import db, Venue, Artist, artist_genre, venue_genre
+from pagination import keyset_page
+from read_models import search_result, rows
+from versions import bump, version_columns
+
+# ----------------------------------------------------------------------------#
+# Browsing by genre, state and seeking flag.
+# ----------------------------------------------------------------------------#
+
+# The genre links of each browsable model, and its seeking flag.
+GENRE_LINKS = {
+    Venue: venue_genre.c.venue_id,
+    Artist: artist_genre.c.artist_id,
+}
+SEEKING = {
+    Venue: Venue.seeking_talent,
+    Artist: Artist.seeking_venue,
+}
+# The version of the genre links, states and seeking flags of each model.
+FILTERS_VERSION = {
+    Venue: 'Venue.filters',
+    Artist: 'Artist.filters',
+}
+
+
+def filters_changed(model):
+    """Rebuild the genre bitmaps of `model` in every worker once the current
+    transaction, which links or unlinks genres, creates, deletes or changes
+    the state or seeking flag of rows, commits."""
+    bump(FILTERS_VERSION[model])
+
+
+def _table_version(model):
+    # Read once per request, by the validator and the bitmaps.
+    versions = g.setdefault('browse_versions', {})
+    if model not in versions:
+        versions[model] = db.session.query(
+            *version_columns(model.__tablename__), func.min(model.next_show_date),
+            version_columns(FILTERS_VERSION[model])[0]).one()
+    return versions[model]
+
+
+def browse_version(model):
+    """Validator of the browse pages of `model`. Genre links, states and
+    seeking flags are edited through the rows, which bumps the table version."""
+    version, changed_at, next_show_date, _ = _table_version(model)
+    if awaiting_sweep(next_show_date):
+        return None
+    return str(version), changed_at
+
+
+def browse_filters(args, genre_name=None):
+    """The filters of the request `args`: genre (repeated), match ('all' or
+    'any'), state and seeking ('y' or 'n'), and the genre of a genre page."""
+    return {
+        "genres": ([genre_name] if genre_name else []) + args.getlist('genre'),
+        "match_all": args.get('match') != 'any',
+        "state": args.get('state') or None,
+        "seeking": {'y': True, 'n': False}.get(args.get('seeking')),
+    }
+
+
+def _criteria(model, genres, match_all, state, seeking):
+    key = GENRE_LINKS[model]
+    genre_name = key.table.c.genre_name
+    criteria = []
+    # Each genre is a range of the (genre_name, id) index of its links.
+    if genres and match_all:
+        criteria += [model.id.in_(select(key).where(genre_name == name)) for name in genres]
+    elif genres:
+        criteria.append(model.id.in_(select(key).where(genre_name.in_(genres))))
+    if state:
+        criteria.append(model.state == state)
+    if seeking is not None:
+        # A NULL flag is not seeking.
+        criteria.append(SEEKING[model].is_(True) if seeking else SEEKING[model].isnot(True))
+    return criteria
+
+
+def browse(model, genres=(), match_all=True, state=None, seeking=None, page_size=60, after=None, before=None):
+    """A page of the `model` rows with all of the `genres` (any of them when
+    not `match_all`), in `state` and whose seeking flag is `seeking`; empty
+    or None filters are not applied. Rows are ordered by name, and carry
+    their number of upcoming shows.
+
+    Returns the response dict rendered by the browse templates. The number of
+    matching rows is counted from the genre bitmaps when they are enabled.
+    """
+    genres = list(dict.fromkeys(name for name in genres if name))
+    criteria = _criteria(model, genres, match_all, state, seeking)
+    if current_app.config['GENRE_BITMAPS']:
+        count = genre_bitmaps.get(model).count(genres, match_all, state, seeking)
+    else:
+        count = db.session.query(func.count(model.id)).filter(*criteria).scalar()
+    page, previous_cursor, next_cursor = [], None, None
+    if count:
+        page, previous_cursor, next_cursor = keyset_page(
+            rows(search_result(model)).filter(*criteria),
+            [model.name, model.id],
+            page_size,
+            after=after,
+            before=before
+        )
+    return {
+        "count": count,
+        "data": page,
+        "previous_cursor": previous_cursor,
+        "next_cursor": next_cursor,
+    }
+
+
+# ----------------------------------------------------------------------------#
+# Genre bitmaps.
+# ----------------------------------------------------------------------------#
+
+def _bitmap(ids):
+    # An int with the bit of each id set.
+    ids = list(ids)
+    bits = bytearray(max(ids, default=0) // 8 + 1)
+    for row_id in ids:
+        bits[row_id >> 3] |= 1 << (row_id & 7)
+    return int.from_bytes(bits, 'little')
+
+
+class Bitmaps(object):
+    """The ids of the rows of a model, and of those of each genre, state and
+    with the seeking flag set, as bitmaps."""
+
+    def __init__(self, model, version):
+        self.version = version
+        states = defaultdict(list)
+        seeking = []
+        table_rows = db.session.query(model.id, model.state, SEEKING[model]).all()
+        for row_id, state, flag in table_rows:
+            states[state].append(row_id)
+            if flag:
+                seeking.append(row_id)
+        genres = defaultdict(list)
+        key = GENRE_LINKS[model]
+        for row_id, genre_name in db.session.query(key, key.table.c.genre_name):
+            genres[genre_name].append(row_id)
+        self.all = _bitmap(row_id for row_id, _, _ in table_rows)
+        self.states = {state: _bitmap(ids) for state, ids in states.items()}
+        self.seeking = _bitmap(seeking)
+        self.genres = {genre_name: _bitmap(ids) for genre_name, ids in genres.items()}
+
+    def count(self, genres=(), match_all=True, state=None, seeking=None):
+        bitmap = self.all
+        if genres:
+            combine = operator.and_ if match_all else operator.or_
+            bitmap &= functools.reduce(combine, [self.genres.get(name, 0) for name in genres])
+        if state:
+            bitmap &= self.states.get(state, 0)
+        if seeking is not None:
+            bitmap &= self.seeking if seeking else ~self.seeking
+        return bin(bitmap).count('1')
+
+
+class GenreBitmaps(object):
+    """Per-process bitmaps of the venue and artist ids by genre, state and
+    seeking flag. The number of rows matching a combined filter is then the
+    popcount of their AND / OR, instead of a count over the genre links.
+
+    They are rebuilt, in two queries, after filters_changed() is called for
+    the model by any process.
+    """
+
+    def __init__(self, app=None):
+        self._bitmaps = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('GENRE_BITMAPS', True)
+        self._bitmaps = {}
+        app.extensions['genre_bitmaps'] = self
+
+    def get(self, model):
+        _, _, _, version = _table_version(model)
+        with self._lock:
+            bitmaps = self._bitmaps.get(model)
+            if bitmaps is None or bitmaps.version != version:
+                bitmaps = self._bitmaps[model] = Bitmaps(model, version)
+        return bitmaps
+
+
+genre_bitmaps = GenreBitmaps()
@@ -0,0 +1,187 @@
+import datetime as datetime_now
+import functools
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from flask import g, make_response, request, session
+
+# ----------------------------------------------------------------------------#
+# Backends.
+# ----------------------------------------------------------------------------#
+
+
+class LRUCache(object):
+    """Bounded in-process cache, least recently used entries are evicted first."""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SharedCache(object):
+    """Cache stored in a key/value server shared by every worker.
+
+    `client` needs redis-style get(key), set(key, value, ex=seconds) and
+    delete(*keys) methods, e.g. a redis.Redis instance or a LocalClient.
+    """
+
+    def __init__(self, client, prefix='fyyur:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return None if value is None else pickle.loads(value)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=max(1, int(ttl)) if ttl else None)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+
+class LocalClient(object):
+    """In-process stand-in for a shared cache server, for tests and local runs."""
+
+    def __init__(self):
+        self._values = LRUCache(max_entries=float('inf'))
+
+    def get(self, key):
+        return self._values.get(key)
+
+    def set(self, key, value, ex=None):
+        self._values.set(key, value, ex)
+
+    def delete(self, *keys):
+        self._values.delete(*keys)
+
+
+# ----------------------------------------------------------------------------#
+# Page cache.
+# ----------------------------------------------------------------------------#
+
+
+class PageCache(object):
+    """Caches rendered GET pages by namespace until a write invalidates them.
+
+    Every namespace ('venues', 'venue:4', ...) has a generation token kept in
+    the backend; invalidating the namespace replaces the token, which orphans
+    every page cached under it (all query strings) at once, in every worker.
+    Pages of validated views are also keyed by the version of the data they
+    render, from their validator. The in-process backend only caches those:
+    its generation tokens are not seen by the other workers, the data
+    version is.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.default_ttl = None
+        self.versioned_only = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        cache_type = app.config.get('CACHE_TYPE', 'lru')
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 300)
+        if cache_type == 'lru':
+            self.backend = LRUCache(app.config.get('CACHE_MAX_ENTRIES', 512))
+        elif cache_type == 'redis':
+            import redis
+            self.backend = SharedCache(redis.Redis.from_url(app.config['CACHE_REDIS_URL']))
+        elif cache_type == 'local':
+            self.backend = SharedCache(LocalClient())
+        else:
+            self.backend = None
+        self.versioned_only = cache_type == 'lru'
+        app.extensions['page_cache'] = self
+
+    def _generation(self, namespace):
+        key = 'generation:' + namespace
+        generation = self.backend.get(key)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            self.backend.set(key, generation)
+        return generation
+
+    def invalidate(self, *namespaces):
+        if self.backend is None:
+            return
+        for namespace in namespaces:
+            self.backend.set('generation:' + namespace, uuid.uuid4().hex)
+
+    def expire_at(self, moment):
+        """Do not keep the page being rendered past `moment` (a UTC datetime),
+        e.g. when its first upcoming show becomes a past show."""
+        if moment is not None:
+            g.cache_expires_at = min(moment, getattr(g, 'cache_expires_at', moment))
+
+    def _ttl(self):
+        ttl = self.default_ttl
+        expires_at = getattr(g, 'cache_expires_at', None)
+        if expires_at is not None:
+            ttl = min(ttl, (expires_at - datetime_now.datetime.utcnow()).total_seconds())
+        return ttl
+
+    def bypass(self):
+        """Neither read nor store the page being rendered."""
+        g.cache_bypass = True
+
+    def cached(self, namespace):
+        """Cache a GET view under `namespace`, formatted with the view arguments."""
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(**kwargs):
+                # Pages carrying flashed messages belong to a single visitor.
+                if self.backend is None or request.method != 'GET' or session.get('_flashes') \
+                        or g.get('cache_bypass') or (self.versioned_only and 'page_version' not in g):
+                    return view(**kwargs)
+                name = namespace.format(**kwargs)
+                key = 'page:{}:{}:{}:{}'.format(name, self._generation(name), g.get('page_version', ''),
+                                                request.query_string.decode())
+                page = self.backend.get(key)
+                if page is not None:
+                    return make_response(page)
+                response = make_response(view(**kwargs))
+                ttl = self._ttl()
+                if response.status_code == 200 and ttl > 0:
+                    self.backend.set(key, response.get_data(as_text=True), ttl)
+                return response
+            return wrapper
+        return decorator
+
+
+page_cache = PageCache()
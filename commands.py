@@ -0,0 +1,67 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from assets import build_assets
+from counters import refresh_counters, sweep_counters, inconsistent_counters, UPCOMING_COUNTERS
+from importer import import_cli
+from models import db
+from search import create_search_indexes
+
+# ----------------------------------------------------------------------------#
+# Commands.
+# ----------------------------------------------------------------------------#
+
+
+@click.command('create-search-indexes')
+@with_appcontext
+def create_search_indexes_command():
+    """Create or rebuild the venue and artist name search indexes."""
+    create_search_indexes()
+    click.echo('Search indexes are up to date.')
+
+
+@click.command('build-assets')
+@click.option('--no-bundle', is_flag=True, help='Keep the stylesheets and scripts of each layout separate.')
+@with_appcontext
+def build_assets_command(no_bundle):
+    """Fingerprint and precompress the static files into static/dist."""
+    manifest = build_assets(current_app.static_folder, current_app.static_url_path, bundle=not no_bundle)
+    click.echo('Built {} assets. Restart the app to serve them.'.format(len(manifest['assets'])))
+
+
+@click.command('sweep-show-counters')
+@with_appcontext
+def sweep_show_counters_command():
+    """Move started shows from upcoming to past in the venue and artist counters.
+
+    Meant to be run periodically, e.g. every minute from cron.
+    """
+    swept = sweep_counters()
+    db.session.commit()
+    click.echo('{} venues and artists swept.'.format(swept))
+
+
+@click.command('rebuild-show-counters')
+@click.option('--check-only', is_flag=True, help='Report inconsistent counters without rebuilding them.')
+@with_appcontext
+def rebuild_show_counters_command(check_only):
+    """Check the venue and artist upcoming show counters against Show and rebuild them."""
+    for model in UPCOMING_COUNTERS:
+        inconsistent = inconsistent_counters(model)
+        for row_id, stored, actual in inconsistent:
+            click.echo('{} {}: {} upcoming shows counted, {} found'.format(model.__name__, row_id, stored, actual))
+        if not check_only:
+            # Only the wrong rows are updated, the others keep their updated_at.
+            rebuilt = refresh_counters(model, [row_id for row_id, _, _ in inconsistent])
+            click.echo('{} {} counters rebuilt.'.format(rebuilt, model.__name__))
+    db.session.commit()
+
+
+def init_app(app):
+    """Add the commands, and the migration ones, to the flask command."""
+    from flask_migrate import Migrate
+    Migrate(app, db)
+    for command in (create_search_indexes_command, import_cli, build_assets_command,
+                    sweep_show_counters_command, rebuild_show_counters_command):
+        app.cli.add_command(command)
@@ -0,0 +1,192 @@
+import zlib
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header, parse_cache_control_header, parse_options_header
+
+# ----------------------------------------------------------------------------#
+# Response compression.
+# ----------------------------------------------------------------------------#
+
+# Pages and data responses compress well; images and fonts already are.
+COMPRESSIBLE_TYPES = {
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/csv',
+    'text/calendar',
+    'text/javascript',
+    'application/javascript',
+    'application/json',
+    'image/svg+xml',
+}
+
+
+class _Gzip(object):
+
+    def __init__(self, level):
+        # A gzip header and trailer around the deflate stream.
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _Brotli(object):
+
+    def __init__(self, brotli, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware(object):
+    """WSGI middleware compressing compressible responses with the best of
+    brotli and gzip the client accepts.
+
+    Responses with a Content-Length are compressed whole, unless smaller than
+    `min_size`. Streamed ones are compressed chunk by chunk, each flushed so
+    that the client still receives it as soon as the app yields it. Responses
+    already carrying a Content-Encoding, such as the precompressed static
+    files, pass through.
+    """
+
+    def __init__(self, app, min_size=500, level=6, brotli_quality=4, brotli=None):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.brotli = brotli
+
+    def _negotiate(self, environ):
+        accepted = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING'))
+        if self.brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def _compressor(self, encoding):
+        if encoding == 'br':
+            return _Brotli(self.brotli, self.brotli_quality)
+        return _Gzip(self.level)
+
+    @staticmethod
+    def _compressible(headers):
+        mimetype, _ = parse_options_header(headers.get('Content-Type'))
+        return mimetype in COMPRESSIBLE_TYPES and 'Content-Encoding' not in headers \
+            and 'no-transform' not in parse_cache_control_header(headers.get('Cache-Control'))
+
+    def __call__(self, environ, start_response):
+        encoding = self._negotiate(environ)
+        captured = {}
+
+        # The headers are held back until the body is compressed; Flask calls
+        # start_response before returning the body and never uses write().
+        def capture_start_response(status, headers, exc_info=None):
+            captured.update(status=status, headers=Headers(headers), exc_info=exc_info)
+            return _unsupported_write
+
+        app_iter = self.app(environ, capture_start_response)
+        status, headers, exc_info = captured['status'], captured['headers'], captured['exc_info']
+        code = int(status.split(None, 1)[0])
+        compressible = self._compressible(headers)
+        if compressible or code == 304:
+            headers['Vary'] = _add_vary(headers.get('Vary'))
+        length = headers.get('Content-Length', type=int)
+        compress = encoding is not None and compressible and code >= 200 and code not in (204, 206, 304) \
+            and (length is None or length >= self.min_size)
+        if compress or (encoding is not None and code == 304):
+            # The compressed body is another representation of the same page.
+            etag = headers.get('ETag')
+            if etag is not None and not etag.startswith('W/'):
+                headers['ETag'] = 'W/' + etag
+        if not compress:
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return app_iter
+
+        headers['Content-Encoding'] = encoding
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            # The headers of the GET, whose compressed length is not known here.
+            headers.pop('Content-Length', None)
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return app_iter
+        if length is None:
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return self._stream(app_iter, self._compressor(encoding))
+
+        compressor = self._compressor(encoding)
+        try:
+            body = b''.join(compressor.compress(chunk) for chunk in app_iter) + compressor.finish()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+        headers['Content-Length'] = str(len(body))
+        start_response(status, headers.to_wsgi_list(), exc_info)
+        return [body]
+
+    @staticmethod
+    def _stream(app_iter, compressor):
+        try:
+            for chunk in app_iter:
+                data = compressor.compress(chunk) + compressor.flush() if chunk else b''
+                if data:
+                    yield data
+            yield compressor.finish()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+
+def _unsupported_write(data):
+    raise RuntimeError('The compression middleware does not support write().')
+
+
+def _add_vary(vary):
+    if not vary:
+        return 'Accept-Encoding'
+    if vary.strip() == '*' or 'accept-encoding' in [value.strip().lower() for value in vary.split(',')]:
+        return vary
+    return vary + ', Accept-Encoding'
+
+
+class Compression(object):
+    """Wraps the app in the CompressionMiddleware configured from COMPRESS_*
+    settings. Brotli needs the optional brotli package, gzip is always used."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS', True)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+        app.config.setdefault('COMPRESS_LEVEL', 6)
+        app.config.setdefault('COMPRESS_BROTLI_QUALITY', 4)
+        app.extensions['compression'] = self
+        if not app.config['COMPRESS']:
+            return
+        try:
+            import brotli
+        except ImportError:
+            brotli = None
+        app.wsgi_app = CompressionMiddleware(app.wsgi_app,
+                                             min_size=app.config['COMPRESS_MIN_SIZE'],
+                                             level=app.config['COMPRESS_LEVEL'],
+                                             brotli_quality=app.config['COMPRESS_BROTLI_QUALITY'],
+                                             brotli=brotli)
+
+
+compression = Compression()
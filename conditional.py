@@ -0,0 +1,80 @@
+import functools
+import hashlib
+import os
+
+from flask import current_app, g, make_response, request, session
+from werkzeug.http import is_resource_modified
+
+# ----------------------------------------------------------------------------#
+# Conditional GETs.
+# ----------------------------------------------------------------------------#
+
+
+class ConditionalGet(object):
+    """Answers If-None-Match / If-Modified-Since requests for pages with
+    304 Not Modified, from a validator checked before the page is rendered
+    or read from the page cache.
+
+    The ETag of a page hashes its URL, the version its validator returns and
+    the templates, so that a release changing them changes every ETag. The
+    version is also part of the page's page cache key.
+    """
+
+    def __init__(self, app=None):
+        self.release = ''
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CONDITIONAL_GET', True)
+        self.release = self._templates_digest(os.path.join(app.root_path, app.template_folder))
+        app.extensions['conditional_get'] = self
+
+    @staticmethod
+    def _templates_digest(template_folder):
+        digest = hashlib.sha1()
+        for directory, directories, files in sorted(os.walk(template_folder)):
+            directories.sort()
+            for name in sorted(files):
+                with open(os.path.join(directory, name), 'rb') as source:
+                    digest.update(name.encode())
+                    digest.update(source.read())
+        return digest.hexdigest()
+
+    def validated(self, validator):
+        """Validate GETs of a view through `validator`, called with the view
+        arguments. It returns the (version, last modified UTC datetime) of the
+        data the page renders, or None when the page cannot be validated."""
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(**kwargs):
+                # Pages carrying flashed messages belong to a single visitor.
+                if request.method not in ('GET', 'HEAD') or session.get('_flashes'):
+                    return view(**kwargs)
+                validated = validator(**kwargs)
+                if validated is None:
+                    return view(**kwargs)
+                version, last_modified = validated
+                # The page cache keys the page by it too: a body cached for an
+                # older version is never sent, under this ETag or by a worker
+                # that missed the invalidation.
+                g.page_version = version
+                if not current_app.config['CONDITIONAL_GET']:
+                    return view(**kwargs)
+                etag = hashlib.sha1('{}:{}:{}'.format(
+                    self.release, request.full_path, version).encode()).hexdigest()
+                if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                    response = make_response(view(**kwargs))
+                else:
+                    response = current_app.response_class(status=304)
+                if response.status_code in (200, 304):
+                    response.set_etag(etag)
+                    response.last_modified = last_modified
+                    # Cached copies are revalidated before each use.
+                    response.cache_control.no_cache = True
+                return response
+            return wrapper
+        return decorator
+
+
+conditional_get = ConditionalGet()
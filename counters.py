@@ -0,0 +1,93 @@
+import datetime as datetime_now
+
+from sqlalchemy import case, func, or_, select
+
+from models import db, Venue, Artist, Show
+
+# ----------------------------------------------------------------------------#
+# Upcoming show counters.
+# ----------------------------------------------------------------------------#
+
+# Venue and Artist carry the number of their upcoming shows and the date of
+# the next one. Creating a show bumps them, deleting shows recomputes them, and
+# the periodic sweep recomputes the rows whose next show has started.
+UPCOMING_COUNTERS = {
+    Venue: Show.venue_id,
+    Artist: Show.artist_id,
+}
+
+
+def _upcoming_shows(model, current_time):
+    show_key = UPCOMING_COUNTERS[model]
+    return {
+        'upcoming_shows_count': select(func.count(Show.id))
+        .where(show_key == model.id, Show.date > current_time)
+        .scalar_subquery(),
+        'next_show_date': select(func.min(Show.date))
+        .where(show_key == model.id, Show.date > current_time)
+        .scalar_subquery(),
+    }
+
+
+def count_show(venue_id, artist_id, date):
+    """Account for a new show in its venue's and artist's counters.
+
+    Returns whether it counted, i.e. the show is upcoming.
+    """
+    if date <= datetime_now.datetime.utcnow():
+        return False
+    for model, row_id in ((Venue, venue_id), (Artist, artist_id)):
+        db.session.query(model).filter(model.id == row_id).update({
+            model.upcoming_shows_count: model.upcoming_shows_count + 1,
+            model.next_show_date: case(
+                (model.next_show_date.is_(None), date),
+                (model.next_show_date > date, date),
+                else_=model.next_show_date
+            ),
+        }, synchronize_session=False)
+    return True
+
+
+def awaiting_sweep(next_show_date):
+    """Whether the next show of counters has started, so that they, and the
+    pages rendering them, change before the sweep updates the row."""
+    return next_show_date is not None and next_show_date <= datetime_now.datetime.utcnow()
+
+
+def refresh_counters(model, ids=None):
+    """Recompute the counters of `model` rows from Show, all of them by default.
+
+    Returns the number of updated rows.
+    """
+    query = db.session.query(model)
+    if ids is not None:
+        ids = list(ids)
+        if not ids:
+            return 0
+        query = query.filter(model.id.in_(ids))
+    return query.update(_upcoming_shows(model, datetime_now.datetime.utcnow()),
+                        synchronize_session=False)
+
+
+def sweep_counters():
+    """Move shows that have started from upcoming to past.
+
+    Only rows whose next show date has passed are recomputed.
+    """
+    current_time = datetime_now.datetime.utcnow()
+    swept = 0
+    for model in UPCOMING_COUNTERS:
+        swept += db.session.query(model).filter(model.next_show_date <= current_time) \
+            .update(_upcoming_shows(model, current_time), synchronize_session=False)
+    return swept
+
+
+def inconsistent_counters(model):
+    """Return the (id, stored count, actual count) of rows whose counter, or
+    next show date, is wrong."""
+    actual = _upcoming_shows(model, datetime_now.datetime.utcnow())
+    return db.session.query(model.id, model.upcoming_shows_count, actual['upcoming_shows_count']) \
+        .filter(or_(model.upcoming_shows_count != actual['upcoming_shows_count'],
+                    model.next_show_date.is_distinct_from(actual['next_show_date']))) \
+        .order_by(model.id) \
+        .all()
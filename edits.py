@@ -0,0 +1,49 @@
+import datetime as datetime_now
+
+from genres import resolve_genres
+from models import db
+
+# ----------------------------------------------------------------------------#
+# Edits.
+# ----------------------------------------------------------------------------#
+
+
+def _same(stored, submitted):
+    # An empty form field matches a NULL column.
+    return stored == submitted or (stored in (None, '') and submitted in (None, ''))
+
+
+def apply_edit(row, values, genre_names):
+    """Set the `values` that differ from `row`, loaded with its genres, and
+    link or unlink only the genres that were added or removed.
+
+    Returns the names of the changed fields, 'genres' included. When it is
+    empty nothing was changed and there is nothing to write, otherwise the
+    row's updated_at is bumped too.
+    """
+    changed = set()
+    for key, value in values.items():
+        if not _same(getattr(row, key), value):
+            setattr(row, key, value)
+            changed.add(key)
+
+    names = list(dict.fromkeys(name for name in genre_names if name))
+    current = {genre.name: genre for genre in row.genres}
+    removed = [genre for name, genre in current.items() if name not in names]
+    added = [name for name in names if name not in current]
+    for genre in removed:
+        row.genres.remove(genre)
+    if added:
+        row.genres.extend(resolve_genres(added))
+    if removed or added:
+        changed.add('genres')
+    if changed:
+        row.updated_at = datetime_now.datetime.utcnow()
+    return changed
+
+
+def touch(model, ids):
+    """Bump the updated_at of the `model` rows `ids`, a list or a query of
+    ids, whose pages render something changed in another row."""
+    return db.session.query(model).filter(model.id.in_(ids)) \
+        .update({model.updated_at: datetime_now.datetime.utcnow()}, synchronize_session=False)
@@ -0,0 +1,142 @@
+import csv
+import datetime
+import io
+import itertools
+
+from models import Venue, Artist, Show
+from read_models import SHOW_EXPORT, SHOW_LISTING_ORDER, rows
+
+# ----------------------------------------------------------------------------#
+# Show exports.
+# ----------------------------------------------------------------------------#
+
+# Shows are fetched, formatted and sent this many at a time: memory stays flat
+# however many shows are exported, and each chunk reaches the client (through
+# the compression middleware too) as soon as it is written.
+CHUNK_ROWS = 500
+
+CSV_COLUMNS = ['id', 'start_time', 'venue_id', 'venue_name', 'venue_city', 'venue_state',
+               'artist_id', 'artist_name']
+
+
+def export_shows(*criteria):
+    """The shows matching `criteria` by start time, streamed from a
+    server-side cursor (on Postgres) CHUNK_ROWS rows at a time."""
+    return rows(SHOW_EXPORT) \
+        .join(Venue, Show.venue_id == Venue.id) \
+        .join(Artist, Show.artist_id == Artist.id) \
+        .filter(*criteria) \
+        .order_by(*SHOW_LISTING_ORDER) \
+        .yield_per(CHUNK_ROWS)
+
+
+def _utc(value):
+    moment = datetime.datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def show_date_range(start=None, end=None):
+    """Criteria on the show dates from `start` to `end`, ISO dates or date
+    times (UTC unless they have an offset), both optional; a date alone as
+    the end includes its whole day.
+
+    Raises ValueError for anything else.
+    """
+    criteria = []
+    if start:
+        criteria.append(Show.date >= _utc(start))
+    if end:
+        end_time = _utc(end)
+        if len(end) == len('YYYY-MM-DD'):
+            end_time += datetime.timedelta(days=1)
+        criteria.append(Show.date < end_time)
+    return criteria
+
+
+def _chunks(shows):
+    shows = iter(shows)
+    while True:
+        chunk = list(itertools.islice(shows, CHUNK_ROWS))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ----------------------------------------------------------------------------#
+# iCalendar (RFC 5545).
+# ----------------------------------------------------------------------------#
+
+def _ical_text(value):
+    return value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,') \
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def _ical_time(value):
+    # Show dates are stored in UTC.
+    return value.strftime('%Y%m%dT%H%M%SZ')
+
+
+def _ical_line(name, value):
+    # Content lines are folded at 75 octets, between UTF-8 characters.
+    data = '{}:{}'.format(name, value).encode()
+    parts = []
+    limit = 75
+    while len(data) > limit:
+        cut = limit
+        while data[cut] & 0xC0 == 0x80:
+            cut -= 1
+        parts.append(data[:cut])
+        data = data[cut:]
+        limit = 74  # after the leading space
+    parts.append(data)
+    return b'\r\n '.join(parts).decode() + '\r\n'
+
+
+def _ical_event(show, domain):
+    location = ', '.join(part for part in (show.venue_name, show.venue_address, show.venue_city,
+                                           show.venue_state) if part)
+    return ''.join([
+        'BEGIN:VEVENT\r\n',
+        _ical_line('UID', 'show-{}@{}'.format(show.id, domain)),
+        _ical_line('DTSTAMP', _ical_time(show.updated_at)),
+        _ical_line('DTSTART', _ical_time(show.start_time)),
+        _ical_line('SUMMARY', _ical_text('{} at {}'.format(show.artist_name, show.venue_name))),
+        _ical_line('LOCATION', _ical_text(location)),
+        'END:VEVENT\r\n',
+    ])
+
+
+def ical_calendar(name, shows, domain):
+    """Stream `shows` as the events of an iCalendar named `name`, whose
+    event UIDs are unique within `domain`."""
+    yield ''.join([
+        'BEGIN:VCALENDAR\r\n',
+        'VERSION:2.0\r\n',
+        'PRODID:-//Fyyur//Shows//EN\r\n',
+        'CALSCALE:GREGORIAN\r\n',
+        _ical_line('X-WR-CALNAME', _ical_text(name or '')),
+    ])
+    for chunk in _chunks(shows):
+        yield ''.join(_ical_event(show, domain) for show in chunk)
+    yield 'END:VCALENDAR\r\n'
+
+
+# ----------------------------------------------------------------------------#
+# CSV.
+# ----------------------------------------------------------------------------#
+
+def csv_file(shows):
+    """Stream `shows` as CSV lines, after a header line."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for chunk in _chunks(shows):
+        writer.writerows([show.id, show.start_time.isoformat(), show.venue_id, show.venue_name, show.venue_city,
+                          show.venue_state, show.artist_id, show.artist_name] for show in chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,75 @@
+import threading
+
+from sqlalchemy import insert
+
+from models import db, Genre
+
+# ----------------------------------------------------------------------------#
+# Genre registry.
+# ----------------------------------------------------------------------------#
+
+# Names of the genres known to exist in the database, loaded once per process.
+# Genres are never deleted, so the set can only miss names created by another
+# process; those are caught by the conflict handling of the bulk insert.
+_genre_names = None
+_genre_names_lock = threading.Lock()
+
+
+def known_genre_names():
+    global _genre_names
+    with _genre_names_lock:
+        if _genre_names is None:
+            _genre_names = frozenset(name for name, in db.session.query(Genre.name))
+        return _genre_names
+
+
+def invalidate_genre_names():
+    global _genre_names
+    with _genre_names_lock:
+        _genre_names = None
+
+
+def genre_exists(name):
+    # Genres created by another process since the names were loaded are looked up.
+    return name in known_genre_names() or db.session.query(Genre.name).filter(Genre.name == name).first() is not None
+
+
+def insert_missing_genres(names):
+    """Insert the genres of `names` that do not exist yet, in one statement,
+    and return the number of genres inserted."""
+    names = list(dict.fromkeys(names))
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+
+    if dialect_insert is not None:
+        statement = dialect_insert(Genre.__table__).on_conflict_do_nothing(index_elements=['name'])
+    else:
+        existing = {name for name, in db.session.query(Genre.name).filter(Genre.name.in_(names))}
+        names = [name for name in names if name not in existing]
+        statement = insert(Genre.__table__)
+    if not names:
+        return 0
+    # A single multi-row INSERT: its row count leaves out the conflicting names.
+    return db.session.execute(statement.values([{'name': name} for name in names])).rowcount
+
+
+def resolve_genres(names):
+    """Return the Genre rows for `names` in the submitted order, creating missing ones.
+
+    Unknown names are inserted in one statement, then every requested row is
+    fetched with a single IN query.
+    """
+    names = list(dict.fromkeys(name for name in names if name))
+    if not names:
+        return []
+    missing = [name for name in names if name not in known_genre_names()]
+    if missing:
+        insert_missing_genres(missing)
+        invalidate_genre_names()
+    genres = {genre.name: genre for genre in Genre.query.filter(Genre.name.in_(names))}
+    return [genres[name] for name in names if name in genres]
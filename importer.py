@@ -0,0 +1,322 @@
+import csv
+import io
+import itertools
+import json
+import os
+import time
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import func, text
+from werkzeug.datastructures import MultiDict
+
+from browse import filters_changed
+from cache import page_cache
+from counters import refresh_counters
+from forms import VenueForm, ArtistForm, ShowForm
+from genres import resolve_genres, invalidate_genre_names, insert_missing_genres
+from models import db, Venue, Artist, Show, Genre, artist_genre, venue_genre
+from versions import VERSIONED_TABLES, bump
+
+# ----------------------------------------------------------------------------#
+# Sources.
+# ----------------------------------------------------------------------------#
+
+# Genres are a list in JSON lines files and ';' separated in CSV files.
+CSV_LIST_SEPARATOR = ';'
+
+
+def read_rows(path, file_format=None):
+    """Yield the records of a CSV (with a header row) or JSON lines file one by one."""
+    if file_format is None:
+        file_format = 'csv' if path.lower().endswith('.csv') else 'jsonl'
+    with open(path, newline='', encoding='utf-8') as source:
+        if file_format == 'csv':
+            for row in csv.DictReader(source):
+                if row.get('genres'):
+                    row['genres'] = [name.strip() for name in row['genres'].split(CSV_LIST_SEPARATOR)]
+                yield row
+        else:
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _formdata(row):
+    formdata = MultiDict()
+    for key, value in row.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = 'y' if value else ''
+        if isinstance(value, (list, tuple)):
+            for item in value:
+                formdata.add(key, str(item))
+        else:
+            formdata.add(key, str(value))
+    return formdata
+
+
+def _errors(form):
+    return '; '.join('{}: {}'.format(name, ', '.join(errors)) for name, errors in form.errors.items())
+
+
+# ----------------------------------------------------------------------------#
+# Record kinds.
+# ----------------------------------------------------------------------------#
+
+def _optional_id(row):
+    return int(row['id']) if row.get('id') not in (None, '') else None
+
+
+def _venue_values(form, row):
+    return {
+        'id': _optional_id(row),
+        'name': form.name.data,
+        'city': form.city.data,
+        'state': form.state.data,
+        'address': form.address.data,
+        'phone': form.phone.data,
+        'image_link': form.image_link.data,
+        'facebook_link': form.facebook_link.data,
+        'website': form.website_link.data,
+        'seeking_talent': form.seeking_talent.data,
+        'seeking_description': form.seeking_description.data,
+    }
+
+
+def _artist_values(form, row):
+    return {
+        'id': _optional_id(row),
+        'name': form.name.data,
+        'city': form.city.data,
+        'state': form.state.data,
+        'phone': form.phone.data,
+        'image_link': form.image_link.data,
+        'facebook_link': form.facebook_link.data,
+        'website': form.website_link.data,
+        'seeking_venue': form.seeking_venue.data,
+        'seeking_description': form.seeking_description.data,
+    }
+
+
+def _show_values(form, row):
+    return {
+        'venue_id': int(form.venue_id.data),
+        'artist_id': int(form.artist_id.data),
+        'date': form.start_time.data,
+    }
+
+
+class ImportKind(object):
+
+    def __init__(self, model, form_class, values, genre_table=None, genre_key=None):
+        self.model = model
+        self.table = model.__table__
+        self.form_class = form_class
+        self.values = values
+        self.genre_table = genre_table
+        self.genre_key = genre_key
+
+    def validate(self, row):
+        """Return (values, genre names) for a valid row, or raise ValueError."""
+        if self.form_class is None:
+            name = (row.get('name') or '').strip()
+            if not name:
+                raise ValueError('name: This field is required.')
+            return {'name': name}, []
+        form = self.form_class(formdata=_formdata(row), meta={'csrf': False})
+        if not form.validate():
+            raise ValueError(_errors(form))
+        values = self.values(form, row)
+        genres = form.genres.data if self.genre_table is not None else []
+        return values, genres
+
+
+KINDS = {
+    'venues': ImportKind(Venue, VenueForm, _venue_values, venue_genre, 'venue_id'),
+    'artists': ImportKind(Artist, ArtistForm, _artist_values, artist_genre, 'artist_id'),
+    'shows': ImportKind(Show, ShowForm, _show_values),
+    'genres': ImportKind(Genre, None, None),
+}
+
+
+# ----------------------------------------------------------------------------#
+# Loading.
+# ----------------------------------------------------------------------------#
+
+def _copy(table, rows):
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['\\N' if row[column] is None else row[column] for column in columns])
+    buffer.seek(0)
+    cursor = db.session.connection().connection.cursor()
+    cursor.copy_expert('COPY "{}" ({}) FROM STDIN WITH (FORMAT csv, NULL \'\\N\')'.format(
+        table.name, ', '.join('"{}"'.format(column) for column in columns)), buffer)
+
+
+def _load(table, rows, use_copy):
+    if not rows:
+        return
+    if use_copy:
+        _copy(table, rows)
+        # The session does not see COPY.
+        if table.name in VERSIONED_TABLES:
+            bump(table.name)
+    else:
+        db.session.execute(table.insert(), rows)
+
+
+def _allocate_ids(table, count):
+    if db.engine.dialect.name == 'postgresql':
+        return list(db.session.execute(
+            text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :count)"),
+            {'table': '"{}"'.format(table.name), 'count': count}).scalars())
+    # Other databases have no sequence to draw from: the import must be the only writer.
+    start = db.session.query(func.max(table.c.id)).scalar() or 0
+    return list(range(start + 1, start + count + 1))
+
+
+def _sync_id_sequence(table):
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(text(
+            "SELECT setval(pg_get_serial_sequence(:table, 'id'), coalesce(max(id), 1)) FROM \"{}\"".format(table.name)),
+            {'table': '"{}"'.format(table.name)})
+
+
+def _load_batch(kind, batch, use_copy):
+    # Returns the numbers of rows loaded and rejected; genres that already
+    # exist are neither.
+    if kind.model is Genre:
+        inserted = insert_missing_genres([values['name'] for values, _ in batch])
+        invalidate_genre_names()
+        return inserted, 0
+    if kind.model is Show:
+        # Rows referencing venues or artists that do not exist are rejected.
+        venue_ids = {row_id for row_id, in db.session.query(Venue.id).filter(
+            Venue.id.in_({values['venue_id'] for values, _ in batch}))}
+        artist_ids = {row_id for row_id, in db.session.query(Artist.id).filter(
+            Artist.id.in_({values['artist_id'] for values, _ in batch}))}
+        rows = [values for values, _ in batch
+                if values['venue_id'] in venue_ids and values['artist_id'] in artist_ids]
+        _load(kind.table, rows, use_copy)
+        refresh_counters(Venue, venue_ids)
+        refresh_counters(Artist, artist_ids)
+        page_cache.invalidate(*['venue:%d' % row_id for row_id in venue_ids] +
+                              ['artist:%d' % row_id for row_id in artist_ids])
+        return len(rows), len(batch) - len(rows)
+
+    missing_ids = [values for values, _ in batch if values['id'] is None]
+    for values, row_id in zip(missing_ids, _allocate_ids(kind.table, len(missing_ids))):
+        values['id'] = row_id
+    _load(kind.table, [values for values, _ in batch], use_copy)
+    genres = {genre.name for genre in resolve_genres(
+        itertools.chain.from_iterable(genre_names for _, genre_names in batch))}
+    _load(kind.genre_table, [{kind.genre_key: values['id'], 'genre_name': name}
+                             for values, genre_names in batch
+                             for name in dict.fromkeys(genre_names) if name in genres], use_copy)
+    filters_changed(kind.model)
+    return len(batch), 0
+
+
+def _write_checkpoint(checkpoint, rows):
+    with open(checkpoint + '.tmp', 'w') as out:
+        json.dump({'rows': rows}, out)
+    os.replace(checkpoint + '.tmp', checkpoint)
+
+
+class ImportReport(object):
+
+    def __init__(self, kind_name, skipped):
+        self.kind_name = kind_name
+        self.skipped = skipped
+        self.read = 0  # rows of this run, after the skipped ones
+        self.loaded = 0
+        self.rejected = 0
+        self.started = time.perf_counter()
+
+    @property
+    def rate(self):
+        return self.read / max(time.perf_counter() - self.started, 1e-9)
+
+    def progress(self):
+        return '{}: {} rows read, {} loaded, {} rejected, {:.0f} rows/s'.format(
+            self.kind_name, self.read, self.loaded, self.rejected, self.rate)
+
+
+def import_file(kind_name, path, file_format=None, batch_size=1000, use_copy=False,
+                checkpoint=None, restart=False, echo=click.echo):
+    """Stream the records of `path` into the database, batch_size rows per
+    transaction, resuming after the last committed batch of a previous run."""
+    kind = KINDS[kind_name]
+    checkpoint = checkpoint or path + '.checkpoint'
+    use_copy = use_copy and db.engine.dialect.name == 'postgresql'
+    skipped = 0
+    if not restart and os.path.exists(checkpoint):
+        with open(checkpoint) as source:
+            skipped = json.load(source)['rows']
+        echo('Resuming after row {} from {}'.format(skipped, checkpoint))
+
+    report = ImportReport(kind_name, skipped)
+    source = enumerate(itertools.islice(read_rows(path, file_format), skipped, None), skipped + 1)
+    explicit_ids = False
+    while True:
+        chunk = list(itertools.islice(source, batch_size))
+        if not chunk:
+            break
+        batch = []
+        for row_number, row in chunk:
+            try:
+                values, genre_names = kind.validate(row)
+            except (ValueError, TypeError) as error:
+                report.rejected += 1
+                echo('Row {} rejected: {}'.format(row_number, error), err=True)
+                continue
+            explicit_ids = explicit_ids or values.get('id') is not None
+            batch.append((values, genre_names))
+        report.read += len(chunk)
+        if batch:
+            loaded, rejected = _load_batch(kind, batch, use_copy)
+            report.loaded += loaded
+            report.rejected += rejected
+        db.session.commit()
+        _write_checkpoint(checkpoint, skipped + report.read)
+        echo(report.progress())
+    if explicit_ids and kind.model in (Venue, Artist):
+        _sync_id_sequence(kind.table)
+        db.session.commit()
+    page_cache.invalidate(kind_name)
+    if kind.model is Show:
+        page_cache.invalidate('venues', 'artists')
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    return report
+
+
+# ----------------------------------------------------------------------------#
+# Commands.
+# ----------------------------------------------------------------------------#
+
+import_cli = AppGroup('import', help='Bulk load venues, artists, shows or genres from CSV or JSON lines files.')
+
+
+def _import_command(kind_name):
+    @import_cli.command(kind_name)
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'file_format', type=click.Choice(['csv', 'jsonl']),
+                  help='File format, guessed from the extension by default.')
+    @click.option('--batch-size', default=1000, show_default=True, help='Rows per transaction.')
+    @click.option('--copy', 'use_copy', is_flag=True, help='Load with COPY (Postgres only).')
+    @click.option('--checkpoint', help='Checkpoint file, PATH.checkpoint by default.')
+    @click.option('--restart', is_flag=True, help='Ignore an existing checkpoint.')
+    def command(path, file_format, batch_size, use_copy, checkpoint, restart):
+        report = import_file(kind_name, path, file_format, batch_size, use_copy, checkpoint, restart)
+        click.echo('Done. ' + report.progress())
+    command.__doc__ = 'Import {} from PATH.'.format(kind_name)
+    return command
+
+
+for _kind_name in KINDS:
+    _import_command(_kind_name)
@@ -0,0 +1,178 @@
+import heapq
+import json
+import logging
+import re
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('fyyur.sql')
+
+# Literals and placeholders are folded so that statements differing only by
+# their parameters, or by the length of an IN list, share one shape.
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%\(\w+\)s|:\w+|\?")
+_PLACEHOLDER_LISTS = re.compile(r'\?(?:\s*,\s*\?)+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def statement_shape(statement):
+    shape = _LITERALS.sub('?', statement)
+    shape = _PLACEHOLDER_LISTS.sub('?', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestQueries(object):
+    """Statements issued while serving one request."""
+
+    def __init__(self, slowest):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = []
+        self.shapes = Counter()
+        self._keep = slowest
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+        entry = (duration, self.count, statement)
+        if len(self.slowest) < self._keep:
+            heapq.heappush(self.slowest, entry)
+        else:
+            heapq.heappushpop(self.slowest, entry)
+
+    def repeated(self, threshold):
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+class QueryInstrumentation(object):
+    """Counts and times the SQL statements of every request.
+
+    The totals, and the usage of the connection pool when it is a queue pool,
+    are sent in a Server-Timing header and a JSON log line on the
+    'fyyur.sql' logger, along with the slowest statements and the statement
+    shapes repeated at least QUERY_REPEAT_THRESHOLD times (N+1 patterns).
+    With QUERY_BUDGET_STRICT, a request exceeding the budget declared with
+    @query_budget, or repeating a statement shape, raises QueryBudgetExceeded.
+    Streamed responses are accounted for when they are closed, and have no
+    Server-Timing header.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('QUERY_INSTRUMENTATION', True)
+        app.config.setdefault('QUERY_SLOWEST', 3)
+        app.config.setdefault('QUERY_REPEAT_THRESHOLD', 5)
+        app.config.setdefault('QUERY_BUDGET_STRICT', False)
+        if not app.config['QUERY_INSTRUMENTATION']:
+            return
+        app.extensions['query_instrumentation'] = self
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    def _before_request(self):
+        g.request_queries = RequestQueries(current_app.config['QUERY_SLOWEST'])
+
+    def _after_request(self, response):
+        queries = g.get('request_queries')
+        if queries is None:
+            return response
+        app = current_app._get_current_object()
+        view = app.view_functions.get(request.endpoint)
+        details = {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+        }
+        budget = getattr(view, 'query_budget', None)
+        if response.is_streamed:
+            # A streamed body is read from the database after this, its
+            # statements are reported once the response is closed, without
+            # the Server-Timing headers.
+            response.call_on_close(lambda: self._report(app, queries, details, budget))
+            return response
+        del g.request_queries
+        elapsed, pool = self._report(app, queries, details, budget)
+        response.headers.add('Server-Timing', 'db;dur={:.2f};desc="{} queries"'.format(
+            queries.duration * 1000, queries.count))
+        response.headers.add('Server-Timing', 'app;dur={:.2f}'.format(elapsed))
+        if pool is not None:
+            response.headers.add('Server-Timing', 'pool;desc="checkedout={} capacity={}"'.format(*pool))
+        return response
+
+    def _report(self, app, queries, details, budget):
+        # Log the statements of a request and check them against its budget.
+        elapsed = (time.perf_counter() - queries.started) * 1000
+        repeated = queries.repeated(app.config['QUERY_REPEAT_THRESHOLD'])
+        pool = self._pool_usage(app)
+        logger.info(json.dumps(dict(
+            details,
+            queries=queries.count,
+            db_ms=round(queries.duration * 1000, 2),
+            total_ms=round(elapsed, 2),
+            pool=None if pool is None else {'checkedout': pool[0], 'capacity': pool[1]},
+            slowest=[{'ms': round(duration * 1000, 2), 'statement': statement}
+                     for duration, _, statement in sorted(queries.slowest, reverse=True)],
+            repeated=[{'count': count, 'shape': shape} for shape, count in repeated],
+        )))
+        for shape, count in repeated:
+            logger.warning('Possible N+1 on %s: %d x %s', details['path'], count, shape)
+
+        if budget is not None and queries.count > budget:
+            self._over_budget(app, '{} issued {} queries, its budget is {}'.format(
+                details['endpoint'], queries.count, budget))
+        if repeated:
+            self._over_budget(app, '{} repeated a statement {} times: {}'.format(
+                details['endpoint'], repeated[0][1], repeated[0][0]))
+        return elapsed, pool
+
+    def _pool_usage(self, app):
+        # Connections checked out of the engine's pool and the most it can hand
+        # out; None for pools that do not queue (SQLite's default ones).
+        pool = app.extensions['sqlalchemy'].db.get_engine(app).pool
+        if not hasattr(pool, 'checkedout') or not hasattr(pool, '_max_overflow'):
+            return None
+        return pool.checkedout(), pool.size() + max(pool._max_overflow, 0)
+
+    def _over_budget(self, app, message):
+        if app.config['QUERY_BUDGET_STRICT']:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+def query_budget(queries):
+    """Declare the number of statements a view may issue per request."""
+    def decorator(view):
+        view.query_budget = queries
+        return view
+    return decorator
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'request_queries' in g:
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'request_queries' in g:
+        started = conn.info.get('query_started')
+        if started:
+            g.request_queries.record(statement, time.perf_counter() - started.pop())
+
+
+query_instrumentation = QueryInstrumentation()
@@ -0,0 +1,179 @@
+import atexit
+import datetime
+import json
+import logging
+import queue
+import random
+import threading
+import uuid
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import g, has_request_context, request
+from flask.logging import default_handler
+
+# ----------------------------------------------------------------------------#
+# Logging pipeline.
+# ----------------------------------------------------------------------------#
+
+# Request threads only put records on a bounded in-memory queue; a background
+# listener thread formats them as JSON lines and writes them to a size-rotated
+# file, so a slow disk never stalls a request. When the queue is full records
+# are dropped and counted rather than waited for.
+
+
+class RequestContextFilter(logging.Filter):
+    """Tag records with the request they were logged from.
+
+    Runs in the thread that logs, while the request context is still there.
+    """
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.method = request.method
+            record.path = request.path
+            record.endpoint = request.endpoint
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of the records below WARNING of some loggers.
+
+    `rates` maps logger names to the fraction to keep; it applies to their
+    child loggers too.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        name = record.name
+        while name:
+            if name in self.rates:
+                return random.random() < self.rates[name]
+            name = name.rpartition('.')[0]
+        return True
+
+
+class BoundedQueueHandler(QueueHandler):
+    """A QueueHandler that drops records when its queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record):
+        # The message and traceback are rendered here, the rest of the
+        # formatting happens in the listener thread.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if self.dropped:
+            record.dropped = self.dropped
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    CONTEXT = ('request_id', 'method', 'path', 'endpoint', 'dropped')
+
+    def format(self, record):
+        entry = {
+            'time': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'location': '{}:{}'.format(record.pathname, record.lineno),
+        }
+        for key in self.CONTEXT:
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class LogPipeline(object):
+    """Sends the records of the app logger and of the 'fyyur' loggers through
+    a bounded queue to a rotating JSON lines file, and gives every request an
+    id (the incoming X-Request-ID header or a new one, echoed in the response).
+    """
+
+    def __init__(self, app=None):
+        self.handler = None
+        self.listener = None
+        atexit.register(self.stop)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('LOG_FILE', 'fyyur.log')
+        app.config.setdefault('LOG_LEVEL', 'INFO')
+        app.config.setdefault('LOG_MAX_BYTES', 10 * 1024 * 1024)
+        app.config.setdefault('LOG_BACKUP_COUNT', 5)
+        app.config.setdefault('LOG_QUEUE_SIZE', 10000)
+        app.config.setdefault('LOG_SAMPLING', {})
+        app.extensions['log_pipeline'] = self
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        if self.handler is not None:
+            # Another app was created in this process; the loggers are shared.
+            self.stop()
+            for logger in (app.logger, logging.getLogger('fyyur')):
+                logger.removeHandler(self.handler)
+            self.handler = self.listener = None
+        if not app.config['LOG_FILE']:
+            return
+
+        file_handler = RotatingFileHandler(app.config['LOG_FILE'], maxBytes=app.config['LOG_MAX_BYTES'],
+                                           backupCount=app.config['LOG_BACKUP_COUNT'], delay=True)
+        file_handler.setFormatter(JSONFormatter())
+        self.handler = BoundedQueueHandler(queue.Queue(app.config['LOG_QUEUE_SIZE']))
+        self.handler.addFilter(SamplingFilter(app.config['LOG_SAMPLING']))
+        self.handler.addFilter(RequestContextFilter())
+        self.listener = QueueListener(self.handler.queue, file_handler)
+        for logger in (app.logger, logging.getLogger('fyyur')):
+            logger.setLevel(app.config['LOG_LEVEL'])
+            logger.addHandler(self.handler)
+        if not app.debug:
+            # Flask's own handler writes to stderr from the request thread.
+            app.logger.removeHandler(default_handler)
+        self.listener.start()
+
+    @property
+    def dropped(self):
+        return self.handler.dropped if self.handler is not None else 0
+
+    def stop(self):
+        """Write out the queued records and stop the listener thread."""
+        if self.listener is not None and self.listener._thread is not None:
+            self.listener.stop()
+
+    def _before_request(self):
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+
+    def _after_request(self, response):
+        if 'request_id' in g:
+            response.headers['X-Request-ID'] = g.request_id
+        return response
+
+
+log_pipeline = LogPipeline()
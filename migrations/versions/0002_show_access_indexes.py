@@ -0,0 +1,61 @@
+"""Index the Show access patterns and key the genre association tables
+
+Revision ID: 0002_show_access_indexes
+Revises: 0001_initial_schema
+Create Date: 2026-10-18 06:30:12.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_show_access_indexes'
+down_revision = '0001_initial_schema'
+branch_labels = None
+depends_on = None
+
+ASSOCIATION_TABLES = (
+    ('artist_genre', 'artist_id'),
+    ('venue_genre', 'venue_id'),
+)
+
+
+def _deduplicate(table, key):
+    # Rows without a key or repeated links cannot be kept under a primary key.
+    op.execute('DELETE FROM {0} WHERE {1} IS NULL OR genre_name IS NULL'.format(table, key))
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DELETE FROM {0} a USING {0} b WHERE a.ctid < b.ctid '
+                   'AND a.{1} = b.{1} AND a.genre_name = b.genre_name'.format(table, key))
+    else:
+        op.execute('DELETE FROM {0} WHERE rowid NOT IN '
+                   '(SELECT min(rowid) FROM {0} GROUP BY {1}, genre_name)'.format(table, key))
+
+
+def upgrade():
+    for table, key in ASSOCIATION_TABLES:
+        _deduplicate(table, key)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(key, existing_type=sa.Integer(), nullable=False)
+            batch_op.alter_column('genre_name', existing_type=sa.String(length=120), nullable=False)
+            batch_op.create_primary_key('{}_pkey'.format(table), [key, 'genre_name'])
+        op.create_index('ix_{}_genre_name'.format(table), table, ['genre_name'])
+
+    op.create_index('ix_show_venue_id_date', 'Show', ['venue_id', 'date'])
+    op.create_index('ix_show_artist_id_date', 'Show', ['artist_id', 'date'])
+    op.create_index('ix_venue_lower_name', 'Venue', [sa.text('lower(name)')])
+    op.create_index('ix_artist_lower_name', 'Artist', [sa.text('lower(name)')])
+
+
+def downgrade():
+    op.drop_index('ix_artist_lower_name', table_name='Artist')
+    op.drop_index('ix_venue_lower_name', table_name='Venue')
+    op.drop_index('ix_show_artist_id_date', table_name='Show')
+    op.drop_index('ix_show_venue_id_date', table_name='Show')
+
+    for table, key in reversed(ASSOCIATION_TABLES):
+        op.drop_index('ix_{}_genre_name'.format(table), table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint('{}_pkey'.format(table), type_='primary')
+            batch_op.alter_column('genre_name', existing_type=sa.String(length=120), nullable=True)
+            batch_op.alter_column(key, existing_type=sa.Integer(), nullable=True)
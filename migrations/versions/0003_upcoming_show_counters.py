@@ -0,0 +1,53 @@
+"""Upcoming show counters on Venue and Artist
+
+Revision ID: 0003_upcoming_show_counters
+Revises: 0002_show_access_indexes
+Create Date: 2026-10-18 07:02:44.170935
+
+"""
+import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+from search import restore_name_indexes
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_upcoming_show_counters'
+down_revision = '0002_show_access_indexes'
+branch_labels = None
+depends_on = None
+
+COUNTED_TABLES = (
+    ('Venue', 'venue_id'),
+    ('Artist', 'artist_id'),
+)
+
+
+def upgrade():
+    show = sa.table('Show', sa.column('id'), sa.column('date'), sa.column('venue_id'), sa.column('artist_id'))
+    current_time = datetime.datetime.utcnow()
+    for table_name, show_key in COUNTED_TABLES:
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.add_column(sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+            batch_op.add_column(sa.Column('next_show_date', sa.DateTime(), nullable=True))
+            batch_op.create_index(op.f('ix_{}_next_show_date'.format(table_name)), ['next_show_date'], unique=False)
+
+        table = sa.table(table_name, sa.column('id'), sa.column('upcoming_shows_count'), sa.column('next_show_date'))
+        upcoming = sa.and_(show.c[show_key] == table.c.id, show.c.date > current_time)
+        op.execute(table.update().values(
+            upcoming_shows_count=sa.select(sa.func.count(show.c.id)).where(upcoming).scalar_subquery(),
+            next_show_date=sa.select(sa.func.min(show.c.date)).where(upcoming).scalar_subquery(),
+        ))
+
+
+def downgrade():
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    for table_name, _ in reversed(COUNTED_TABLES):
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_index(op.f('ix_{}_next_show_date'.format(table_name)))
+            batch_op.drop_column('next_show_date')
+            batch_op.drop_column('upcoming_shows_count')
+        if sqlite:
+            restore_name_indexes(op.get_bind(), table_name)
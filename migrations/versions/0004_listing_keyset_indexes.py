@@ -0,0 +1,25 @@
+"""Indexes for the keyset paginated /shows and /artists listings
+
+Revision ID: 0004_listing_keyset_indexes
+Revises: 0003_upcoming_show_counters
+Create Date: 2026-10-18 07:41:09.602311
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_listing_keyset_indexes'
+down_revision = '0003_upcoming_show_counters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_show_date_id', 'Show', ['date', 'id'])
+    op.create_index('ix_artist_name_id', 'Artist', ['name', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_artist_name_id', table_name='Artist')
+    op.drop_index('ix_show_date_id', table_name='Show')
@@ -0,0 +1,54 @@
+"""Delete the shows and genre links of venues and artists in the database
+
+Revision ID: 0005_cascade_deletes
+Revises: 0004_listing_keyset_indexes
+Create Date: 2026-10-18 08:02:44.190218
+
+"""
+from itertools import groupby
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_cascade_deletes'
+down_revision = '0004_listing_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+# (table, column, referred table), grouped by table so that SQLite recreates
+# each table once.
+FOREIGN_KEYS = (
+    ('Show', 'artist_id', 'Artist'),
+    ('Show', 'venue_id', 'Venue'),
+    ('artist_genre', 'artist_id', 'Artist'),
+    ('venue_genre', 'venue_id', 'Venue'),
+)
+# The names Postgres gave the constraints of 0001_initial_schema, and the
+# names given to the unnamed ones reflected from SQLite.
+NAMING_CONVENTION = {'fk': '%(table_name)s_%(column_0_name)s_fkey'}
+
+
+def _delete_orphans():
+    # SQLite did not enforce the foreign keys, rows may reference deleted parents.
+    for table, column, referred in FOREIGN_KEYS:
+        op.execute('DELETE FROM "{0}" WHERE {1} NOT IN (SELECT id FROM "{2}")'.format(table, column, referred))
+
+
+def _replace_foreign_keys(ondelete):
+    for table, foreign_keys in groupby(FOREIGN_KEYS, key=lambda foreign_key: foreign_key[0]):
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+            for _, column, referred in foreign_keys:
+                name = '{}_{}_fkey'.format(table, column)
+                batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(name, referred, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        _delete_orphans()
+    _replace_foreign_keys('CASCADE')
+
+
+def downgrade():
+    _replace_foreign_keys(None)
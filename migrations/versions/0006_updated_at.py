@@ -0,0 +1,46 @@
+"""updated_at on Venue, Artist and Show, for conditional GETs
+
+Revision ID: 0006_updated_at
+Revises: 0005_cascade_deletes
+Create Date: 2026-10-18 11:02:17.348211
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from search import SEARCHABLE_TABLES, restore_name_indexes
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_updated_at'
+down_revision = '0005_cascade_deletes'
+branch_labels = None
+depends_on = None
+
+TIMESTAMPED_TABLES = ('Venue', 'Artist', 'Show')
+
+
+def upgrade():
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    for table_name in TIMESTAMPED_TABLES:
+        if sqlite:
+            # SQLite only adds columns with a constant default, and recreating
+            # Venue and Artist would lose their expression and search indexes.
+            op.add_column(table_name, sa.Column('updated_at', sa.DateTime(), nullable=False,
+                                                server_default='1970-01-01 00:00:00'))
+            table = sa.table(table_name, sa.column('updated_at'))
+            op.execute(table.update().values(updated_at=sa.func.current_timestamp()))
+        else:
+            op.add_column(table_name, sa.Column('updated_at', sa.DateTime(), nullable=False,
+                                                server_default=sa.func.current_timestamp()))
+        op.create_index(op.f('ix_{}_updated_at'.format(table_name)), table_name, ['updated_at'], unique=False)
+
+
+def downgrade():
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    for table_name in reversed(TIMESTAMPED_TABLES):
+        op.drop_index(op.f('ix_{}_updated_at'.format(table_name)), table_name=table_name)
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_column('updated_at')
+        if sqlite and table_name in SEARCHABLE_TABLES:
+            restore_name_indexes(op.get_bind(), table_name)
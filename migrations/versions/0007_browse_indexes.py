@@ -0,0 +1,39 @@
+"""Indexes for browsing venues and artists by genre, state and name
+
+Revision ID: 0007_browse_indexes
+Revises: 0006_updated_at
+Create Date: 2026-10-18 12:20:41.905317
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_browse_indexes'
+down_revision = '0006_updated_at'
+branch_labels = None
+depends_on = None
+
+ASSOCIATION_TABLES = (
+    ('artist_genre', 'artist_id'),
+    ('venue_genre', 'venue_id'),
+)
+
+
+def upgrade():
+    # The ids of a genre are read from the index alone.
+    for table, key in ASSOCIATION_TABLES:
+        op.drop_index('ix_{}_genre_name'.format(table), table_name=table)
+        op.create_index('ix_{}_genre_name_{}'.format(table, key), table, ['genre_name', key])
+    op.create_index('ix_venue_name_id', 'Venue', ['name', 'id'])
+    op.create_index('ix_venue_state_name_id', 'Venue', ['state', 'name', 'id'])
+    op.create_index('ix_artist_state_name_id', 'Artist', ['state', 'name', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_artist_state_name_id', table_name='Artist')
+    op.drop_index('ix_venue_state_name_id', table_name='Venue')
+    op.drop_index('ix_venue_name_id', table_name='Venue')
+    for table, key in reversed(ASSOCIATION_TABLES):
+        op.drop_index('ix_{}_genre_name_{}'.format(table, key), table_name=table)
+        op.create_index('ix_{}_genre_name'.format(table), table, ['genre_name'])
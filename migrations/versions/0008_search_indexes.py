@@ -0,0 +1,35 @@
+"""Venue and artist name search indexes
+
+Revision ID: 0008_search_indexes
+Revises: 0007_browse_indexes
+Create Date: 2026-10-18 14:05:12.630418
+
+"""
+from alembic import op
+
+from search import drop_search_ddl, search_ddl
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_search_indexes'
+down_revision = '0007_browse_indexes'
+branch_labels = None
+depends_on = None
+
+SEARCHABLE_TABLES = ('Venue', 'Artist')
+
+
+def upgrade():
+    # pg_trgm GIN indexes on lower(name) on Postgres, external content FTS5
+    # trigram tables kept in sync with name by triggers on SQLite.
+    dialect = op.get_bind().dialect.name
+    for table_name in SEARCHABLE_TABLES:
+        for statement in search_ddl(table_name, dialect):
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table_name in reversed(SEARCHABLE_TABLES):
+        for statement in drop_search_ddl(table_name, dialect):
+            op.execute(statement)
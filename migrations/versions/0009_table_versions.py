@@ -0,0 +1,37 @@
+"""Per-table versions and change times, for validating the listings
+
+Revision ID: 0009_table_versions
+Revises: 0008_search_indexes
+Create Date: 2026-10-18 16:12:08.412077
+
+"""
+import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_table_versions'
+down_revision = '0008_search_indexes'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ('Venue', 'Artist', 'Show')
+
+
+def upgrade():
+    table_version = op.create_table(
+        'table_version',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('changed_at', sa.DateTime(), server_default=sa.func.current_timestamp(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    current_time = datetime.datetime.utcnow()
+    op.bulk_insert(table_version, [{'name': name, 'version': 0, 'changed_at': current_time}
+                                   for name in VERSIONED_TABLES])
+
+
+def downgrade():
+    op.drop_table('table_version')
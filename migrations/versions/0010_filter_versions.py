@@ -0,0 +1,32 @@
+"""Versions of the venue and artist genre links, states and seeking flags
+
+Revision ID: 0010_filter_versions
+Revises: 0009_table_versions
+Create Date: 2026-10-18 17:02:51.117240
+
+"""
+import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_filter_versions'
+down_revision = '0009_table_versions'
+branch_labels = None
+depends_on = None
+
+FILTER_VERSIONS = ('Venue.filters', 'Artist.filters')
+
+
+def upgrade():
+    table_version = sa.table('table_version', sa.column('name'), sa.column('version'), sa.column('changed_at'))
+    current_time = datetime.datetime.utcnow()
+    op.bulk_insert(table_version, [{'name': name, 'version': 0, 'changed_at': current_time}
+                                   for name in FILTER_VERSIONS])
+
+
+def downgrade():
+    table_version = sa.table('table_version', sa.column('name'))
+    op.execute(table_version.delete().where(table_version.c.name.in_(FILTER_VERSIONS)))
@@ -1,9 +1,11 @@
-from flask_sqlalchemy import SQLAlchemy
+import datetime as datetime_now
+
+from routing import RoutingSQLAlchemy
 
 # ----------------------------------------------------------------------------#
 # Models.
 # ----------------------------------------------------------------------------#
-db = SQLAlchemy()
+db = RoutingSQLAlchemy()
 
 
 class Venue(db.Model):
@@ -19,7 +21,19 @@ class Venue(db.Model):
     website = db.Column(db.String(120))
     seeking_talent = db.Column(db.Boolean)
     seeking_description = db.Column(db.String)
-    shows = db.relationship('Show', backref='venue', lazy=True, cascade="all, delete-orphan")
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_date = db.Column(db.DateTime, index=True)
+    # Bumped on every change to the row, and by writes elsewhere that change
+    # the page rendering it; the conditional GETs of its pages validate on it.
+    updated_at = db.Column(db.DateTime, nullable=False, index=True, default=datetime_now.datetime.utcnow,
+                           onupdate=datetime_now.datetime.utcnow, server_default=db.func.current_timestamp())
+    # The database deletes the shows and genre links of a deleted venue.
+    shows = db.relationship('Show', backref='venue', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+    __table_args__ = (
+        db.Index('ix_venue_lower_name', db.func.lower(name)),
+        db.Index('ix_venue_name_id', name, id),
+        db.Index('ix_venue_state_name_id', state, name, id),
+    )
 
 
 class Artist(db.Model):
@@ -34,30 +48,63 @@ class Artist(db.Model):
     website = db.Column(db.String(120))
     seeking_venue = db.Column(db.Boolean)
     seeking_description = db.Column(db.String)
-    shows = db.relationship('Show', backref='artist', lazy=True, cascade="all, delete-orphan")
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_date = db.Column(db.DateTime, index=True)
+    # See Venue.updated_at.
+    updated_at = db.Column(db.DateTime, nullable=False, index=True, default=datetime_now.datetime.utcnow,
+                           onupdate=datetime_now.datetime.utcnow, server_default=db.func.current_timestamp())
+    # The database deletes the shows and genre links of a deleted artist.
+    shows = db.relationship('Show', backref='artist', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+    __table_args__ = (
+        db.Index('ix_artist_lower_name', db.func.lower(name)),
+        db.Index('ix_artist_name_id', name, id),
+        db.Index('ix_artist_state_name_id', state, name, id),
+    )
 
 
 class Show(db.Model):
     __tablename__ = 'Show'
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.DateTime, nullable=False)
-    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id'), nullable=False)
-    venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id'), nullable=False)
+    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), nullable=False)
+    venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id', ondelete='CASCADE'), nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, index=True, default=datetime_now.datetime.utcnow,
+                           onupdate=datetime_now.datetime.utcnow, server_default=db.func.current_timestamp())
+    __table_args__ = (
+        db.Index('ix_show_venue_id_date', 'venue_id', 'date'),
+        db.Index('ix_show_artist_id_date', 'artist_id', 'date'),
+        db.Index('ix_show_date_id', 'date', 'id'),
+    )
 
 
 artist_genre = db.Table('artist_genre',
-                        db.Column('artist_id', db.Integer, db.ForeignKey('Artist.id')),
-                        db.Column('genre_name', db.String(120), db.ForeignKey('Genre.name')))
+                        db.Column('artist_id', db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'),
+                                  primary_key=True),
+                        db.Column('genre_name', db.String(120), db.ForeignKey('Genre.name'), primary_key=True),
+                        db.Index('ix_artist_genre_genre_name_artist_id', 'genre_name', 'artist_id'))
 
 venue_genre = db.Table('venue_genre',
-                       db.Column('venue_id', db.Integer, db.ForeignKey('Venue.id')),
-                       db.Column('genre_name', db.String(120), db.ForeignKey('Genre.name')))
+                       db.Column('venue_id', db.Integer, db.ForeignKey('Venue.id', ondelete='CASCADE'),
+                                 primary_key=True),
+                       db.Column('genre_name', db.String(120), db.ForeignKey('Genre.name'), primary_key=True),
+                       db.Index('ix_venue_genre_genre_name_venue_id', 'genre_name', 'venue_id'))
 
 
 class Genre(db.Model):
     __tablename__ = 'Genre'
     name = db.Column(db.String(120), primary_key=True)
     artist_genres = db.relationship('Artist', secondary=artist_genre,
-                                    backref=db.backref('genres', lazy=True))
+                                    backref=db.backref('genres', lazy=True, passive_deletes=True))
     venue_genres = db.relationship('Venue', secondary=venue_genre,
-                                   backref=db.backref('genres', lazy=True))
+                                   backref=db.backref('genres', lazy=True, passive_deletes=True))
+
+
+class TableVersion(db.Model):
+    # A counter and the time of the last change of a table, bumped by every
+    # transaction writing to it (see versions.py). The listings validate on
+    # them instead of scanning the table.
+    __tablename__ = 'table_version'
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime_now.datetime.utcnow,
+                           server_default=db.func.current_timestamp())
@@ -0,0 +1,99 @@
+import base64
+import datetime
+import json
+
+from sqlalchemy import and_, false, or_, tuple_
+
+# ----------------------------------------------------------------------------#
+# Keyset pagination.
+# ----------------------------------------------------------------------------#
+
+# A page is located by the sort key of the row just before (or after) it
+# instead of an OFFSET, so every page is an index range scan of page_size
+# rows however deep the visitor goes. NULLs in a key column sort after every
+# value (as Postgres does), and a cursor can hold them.
+
+
+def encode_cursor(values):
+    values = [value.isoformat() if isinstance(value, datetime.datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, key_columns):
+    """Return the sort key encoded in `token`, or None if it is not a valid cursor."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if len(values) != len(key_columns):
+            return None
+        return [None if value is None
+                else datetime.datetime.fromisoformat(value)
+                if column.type.python_type is datetime.datetime else column.type.python_type(value)
+                for value, column in zip(values, key_columns)]
+    except (ValueError, TypeError, NotImplementedError):
+        return None
+
+
+def _nullable(column):
+    column = getattr(column, 'element', column.expression)
+    return getattr(column, 'nullable', True)
+
+
+def _beyond(key_columns, key, forward):
+    # The rows after (or, not `forward`, before) `key` in the order of
+    # `key_columns`, NULLs last. Where no NULL can occur it is a row value
+    # comparison, which the index on the key columns serves.
+    column, value = key_columns[0], key[0]
+    rest_columns, rest_key = key_columns[1:], key[1:]
+    if value is not None and not any(_nullable(rest) for rest in rest_columns):
+        if not forward:
+            return tuple_(*key_columns) < tuple_(*key)
+        if _nullable(column):
+            return or_(tuple_(*key_columns) > tuple_(*key), column.is_(None))
+        return tuple_(*key_columns) > tuple_(*key)
+    if value is None:
+        tie = column.is_(None)
+        beyond = false() if forward else column.isnot(None)
+    else:
+        tie = column == value
+        beyond = or_(column > value, column.is_(None)) if forward else column < value
+    if not rest_columns:
+        return beyond
+    return or_(beyond, and_(tie, _beyond(rest_columns, rest_key, forward)))
+
+
+def _ordering(key_columns, forward):
+    return [(column.asc() if forward else column.desc()) if not _nullable(column)
+            else column.asc().nulls_last() if forward else column.desc().nulls_first()
+            for column in key_columns]
+
+
+def keyset_page(query, key_columns, page_size, after=None, before=None):
+    """Fetch the page of `query` that follows the `after` cursor or precedes
+    the `before` cursor, ordered by `key_columns` (which must be unique).
+
+    Returns (rows, previous page cursor, next page cursor); a cursor is None
+    when there is no such page.
+    """
+    after_key = decode_cursor(after, key_columns) if after else None
+    before_key = decode_cursor(before, key_columns) if before and after_key is None else None
+
+    if before_key is not None:
+        rows = query.filter(_beyond(key_columns, before_key, forward=False)) \
+            .order_by(*_ordering(key_columns, forward=False)) \
+            .limit(page_size + 1) \
+            .all()
+        has_previous, has_next = len(rows) > page_size, True
+        rows = rows[:page_size][::-1]
+    else:
+        if after_key is not None:
+            query = query.filter(_beyond(key_columns, after_key, forward=True))
+        rows = query.order_by(*_ordering(key_columns, forward=True)).limit(page_size + 1).all()
+        has_previous, has_next = after_key is not None, len(rows) > page_size
+        rows = rows[:page_size]
+
+    def cursor(row):
+        return encode_cursor([row._mapping[column] for column in key_columns])
+
+    previous_cursor = cursor(rows[0]) if rows and has_previous else None
+    next_cursor = cursor(rows[-1]) if rows and has_next else None
+    return rows, previous_cursor, next_cursor
@@ -0,0 +1,114 @@
+from models import db, Venue, Artist, Show, artist_genre, venue_genre
+
+# ----------------------------------------------------------------------------#
+# Read models.
+# ----------------------------------------------------------------------------#
+
+# The columns each page renders, labelled with the names its template uses.
+# Queried through `rows`, they load as SQLAlchemy Row named tuples: no ORM
+# instances or identity map, and none of the columns the page does not show,
+# such as seeking_description on the listings.
+
+VENUE_LISTING = (
+    Venue.city,
+    Venue.state,
+    Venue.id,
+    Venue.name,
+    Venue.upcoming_shows_count.label('num_upcoming_shows'),
+    Venue.next_show_date,
+)
+
+ARTIST_LISTING = (
+    Artist.id,
+    Artist.name,
+)
+
+SHOW_START_TIME = Show.date.label('start_time')
+
+SHOW_LISTING = (
+    Show.id,
+    SHOW_START_TIME,
+    Show.venue_id,
+    Venue.name.label('venue_name'),
+    Show.artist_id,
+    Artist.name.label('artist_name'),
+    Artist.image_link.label('artist_image_link'),
+)
+
+# Keyset order of the shows listing, through the labelled column the rows carry.
+SHOW_LISTING_ORDER = [SHOW_START_TIME, Show.id]
+
+# The shows exported to calendars and CSV files.
+SHOW_EXPORT = (
+    Show.id,
+    SHOW_START_TIME,
+    Show.updated_at,
+    Show.venue_id,
+    Venue.name.label('venue_name'),
+    Venue.address.label('venue_address'),
+    Venue.city.label('venue_city'),
+    Venue.state.label('venue_state'),
+    Show.artist_id,
+    Artist.name.label('artist_name'),
+)
+
+VENUE_DETAIL = (
+    Venue.id,
+    Venue.name,
+    Venue.address,
+    Venue.city,
+    Venue.state,
+    Venue.phone,
+    Venue.website,
+    Venue.facebook_link,
+    Venue.seeking_talent,
+    Venue.seeking_description,
+    Venue.image_link,
+)
+
+ARTIST_DETAIL = (
+    Artist.id,
+    Artist.name,
+    Artist.city,
+    Artist.state,
+    Artist.phone,
+    Artist.website,
+    Artist.facebook_link,
+    Artist.seeking_venue,
+    Artist.seeking_description,
+    Artist.image_link,
+)
+
+# The shows listed on a venue page, and on an artist page.
+VENUE_SHOWS = (
+    Show.date.label('start_time'),
+    Artist.id.label('artist_id'),
+    Artist.name.label('artist_name'),
+    Artist.image_link.label('artist_image_link'),
+)
+
+ARTIST_SHOWS = (
+    Show.date.label('start_time'),
+    Venue.id.label('venue_id'),
+    Venue.name.label('venue_name'),
+    Venue.image_link.label('venue_image_link'),
+)
+
+
+def search_result(model):
+    return (
+        model.id,
+        model.name,
+        model.upcoming_shows_count.label('num_upcoming_shows'),
+    )
+
+
+def rows(projection):
+    """A query of the `projection` columns."""
+    return db.session.query(*projection)
+
+
+def genre_names(model, row_id):
+    """The genre names of a venue or artist, read from its links alone."""
+    links = {Venue: venue_genre.c.venue_id, Artist: artist_genre.c.artist_id}[model]
+    return [name for name, in db.session.query(links.table.c.genre_name).filter(links == row_id)]
@@ -0,0 +1,115 @@
+import datetime as datetime_now
+import random
+import sqlite3
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import event, orm
+from sqlalchemy.engine import Engine
+
+# ----------------------------------------------------------------------------#
+# Connection pools and read replicas.
+# ----------------------------------------------------------------------------#
+
+# Views marked @read_only read from one of the replica binds (the
+# SQLALCHEMY_BINDS named 'replica...'), picked per request. Everything else,
+# and every flush or INSERT/UPDATE/DELETE, goes to the primary. A client that
+# wrote something reads from the primary for the next DB_REPLICA_LAG seconds,
+# so it sees its own changes, and pages rendered from a replica are not
+# cached for longer than that.
+
+READ_AFTER_WRITE_COOKIE = 'fyyur_primary'
+
+
+def read_only(view):
+    """Let a view read from a replica."""
+    view.read_only = True
+    return view
+
+
+def replica_binds(app):
+    return sorted(key for key in (app.config['SQLALCHEMY_BINDS'] or {}) if key.startswith('replica'))
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite only enforces foreign keys, and their ON DELETE CASCADE, when asked.
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
+
+class RoutingSession(SignallingSession):
+
+    def __init__(self, db, **options):
+        self.db = db
+        SignallingSession.__init__(self, db, **options)
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        replica = g.get('db_replica') if has_request_context() else None
+        if self._flushing or getattr(clause, 'is_dml', False):
+            if has_request_context():
+                g.db_written = True
+        elif replica is not None:
+            return self.db.get_engine(self.app, bind=replica)
+        return SignallingSession.get_bind(self, mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """SQLAlchemy with pool settings from the DB_POOL_* config and reads
+    routed to replicas."""
+
+    def init_app(self, app):
+        app.config.setdefault('DB_POOL_SIZE', 5)
+        app.config.setdefault('DB_MAX_OVERFLOW', 10)
+        app.config.setdefault('DB_POOL_TIMEOUT', 30)
+        app.config.setdefault('DB_POOL_RECYCLE', -1)
+        app.config.setdefault('DB_POOL_PRE_PING', False)
+        app.config.setdefault('DB_STATEMENT_TIMEOUT', 0)
+        app.config.setdefault('DB_REPLICA_LAG', 5)
+        SQLAlchemy.init_app(self, app)
+        if not event.contains(Engine, 'connect', _enable_sqlite_foreign_keys):
+            event.listen(Engine, 'connect', _enable_sqlite_foreign_keys)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def apply_driver_hacks(self, app, sa_url, options):
+        sa_url, options = SQLAlchemy.apply_driver_hacks(self, app, sa_url, options)
+        options['pool_recycle'] = app.config['DB_POOL_RECYCLE']
+        options['pool_pre_ping'] = app.config['DB_POOL_PRE_PING']
+        if sa_url.drivername == 'sqlite':
+            # SQLite connections are not queued and have no statement timeout.
+            return sa_url, options
+        options['pool_size'] = app.config['DB_POOL_SIZE']
+        options['max_overflow'] = app.config['DB_MAX_OVERFLOW']
+        options['pool_timeout'] = app.config['DB_POOL_TIMEOUT']
+        if app.config['DB_STATEMENT_TIMEOUT'] and sa_url.drivername.startswith('postgresql'):
+            connect_args = options.setdefault('connect_args', {})
+            connect_args['options'] = '-c statement_timeout={:d}'.format(app.config['DB_STATEMENT_TIMEOUT'])
+        return sa_url, options
+
+    def _before_request(self):
+        app = self.get_app()
+        view = app.view_functions.get(request.endpoint)
+        replicas = replica_binds(app)
+        if not replicas or not getattr(view, 'read_only', False):
+            return
+        page_cache = app.extensions.get('page_cache')
+        if request.cookies.get(READ_AFTER_WRITE_COOKIE):
+            # Cached pages may predate the visitor's own write.
+            if page_cache is not None:
+                page_cache.bypass()
+            return
+        g.db_replica = random.choice(replicas)
+        if page_cache is not None:
+            page_cache.expire_at(datetime_now.datetime.utcnow() +
+                                 datetime_now.timedelta(seconds=app.config['DB_REPLICA_LAG']))
+
+    def _after_request(self, response):
+        app = self.get_app()
+        if g.pop('db_written', False) and replica_binds(app):
+            response.set_cookie(READ_AFTER_WRITE_COOKIE, '1', max_age=app.config['DB_REPLICA_LAG'], httponly=True)
+        return response
@@ -0,0 +1,169 @@
+import math
+
+from sqlalchemy import DDL, event, func, inspect, table, column, literal_column
+
+from models import db, Venue, Artist
+from read_models import search_result
+
+# ----------------------------------------------------------------------------#
+# Search indexes.
+# ----------------------------------------------------------------------------#
+
+# On Postgres names are matched through a pg_trgm GIN index on lower(name),
+# which serves the '%term%' pattern and gives a similarity score to rank on.
+# On SQLite (local testing) an external content FTS5 table with the trigram
+# tokenizer mirrors the name column and is kept in sync by triggers.
+SEARCHABLE = {
+    Venue: 'venue',
+    Artist: 'artist',
+}
+
+# Trigram tokens need at least three characters, shorter terms fall back to LIKE.
+MIN_FTS_TERM_LENGTH = 3
+
+
+SEARCHABLE_TABLES = {model.__tablename__: model for model in SEARCHABLE}
+
+
+def _fts_triggers(table_name):
+    fts = SEARCHABLE[SEARCHABLE_TABLES[table_name]] + '_fts'
+    return [
+        'CREATE TRIGGER IF NOT EXISTS {0}_ai AFTER INSERT ON "{1}" BEGIN '
+        'INSERT INTO {0}(rowid, name) VALUES (new.id, new.name); END'.format(fts, table_name),
+        'CREATE TRIGGER IF NOT EXISTS {0}_ad AFTER DELETE ON "{1}" BEGIN '
+        "INSERT INTO {0}({0}, rowid, name) VALUES ('delete', old.id, old.name); END".format(fts, table_name),
+        'CREATE TRIGGER IF NOT EXISTS {0}_au AFTER UPDATE OF name ON "{1}" BEGIN '
+        "INSERT INTO {0}({0}, rowid, name) VALUES ('delete', old.id, old.name); "
+        'INSERT INTO {0}(rowid, name) VALUES (new.id, new.name); END'.format(fts, table_name),
+    ]
+
+
+def search_ddl(table_name, dialect):
+    """The statements creating the search index of `table_name` on `dialect`.
+
+    This is the one copy of the search DDL: create_all, create_search_indexes
+    and the migrations all run these.
+    """
+    prefix = SEARCHABLE[SEARCHABLE_TABLES[table_name]]
+    fts = prefix + '_fts'
+    if dialect == 'postgresql':
+        return [
+            'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+            'CREATE INDEX IF NOT EXISTS ix_{0}_name_trgm ON "{1}" '
+            'USING gin (lower(name) gin_trgm_ops)'.format(prefix, table_name),
+        ]
+    if dialect == 'sqlite':
+        return [
+            "CREATE VIRTUAL TABLE IF NOT EXISTS {0} USING fts5("
+            "name, content='{1}', content_rowid='id', tokenize='trigram')".format(fts, table_name),
+            *_fts_triggers(table_name),
+            "INSERT INTO {0}({0}) VALUES ('rebuild')".format(fts),
+        ]
+    return []
+
+
+def drop_search_ddl(table_name, dialect):
+    """The statements dropping the search index of `table_name` on `dialect`."""
+    prefix = SEARCHABLE[SEARCHABLE_TABLES[table_name]]
+    fts = prefix + '_fts'
+    if dialect == 'postgresql':
+        return ['DROP INDEX IF EXISTS ix_{}_name_trgm'.format(prefix)]
+    if dialect == 'sqlite':
+        return ['DROP TRIGGER IF EXISTS {}_{}'.format(fts, trigger) for trigger in ('au', 'ad', 'ai')] \
+            + ['DROP TABLE IF EXISTS {}'.format(fts)]
+    return []
+
+
+def restore_name_indexes(connection, table_name):
+    """Recreate the lower(name) index and search triggers of `table_name`.
+
+    SQLite does not carry them over when a batch migration recreates the table.
+    """
+    model = SEARCHABLE_TABLES[table_name]
+    prefix = SEARCHABLE[model]
+    for index in model.__table__.indexes:
+        if index.name == 'ix_{}_lower_name'.format(prefix):
+            index.create(connection, checkfirst=True)
+    if inspect(connection).has_table(prefix + '_fts'):
+        for statement in _fts_triggers(table_name):
+            connection.execute(DDL(statement))
+
+
+def is_search_object(name, type_):
+    """Whether `name` is a search table or index, which the models do not declare.
+
+    env.py leaves them out of autogenerate, together with the FTS5 shadow tables.
+    """
+    for prefix in SEARCHABLE.values():
+        if type_ == 'table' and (name == prefix + '_fts' or name.startswith(prefix + '_fts_')):
+            return True
+        if type_ == 'index' and name == 'ix_{}_name_trgm'.format(prefix):
+            return True
+    return False
+
+
+def _register_search_ddl():
+    for model in SEARCHABLE:
+        for dialect in ('postgresql', 'sqlite'):
+            for statement in search_ddl(model.__tablename__, dialect):
+                event.listen(model.__table__, 'after_create',
+                             DDL(statement).execute_if(dialect=dialect))
+
+
+_register_search_ddl()
+
+
+def create_search_indexes():
+    """Create (or rebuild) the search indexes on an existing database."""
+    dialect = db.engine.dialect.name
+    with db.engine.begin() as connection:
+        for table_name in SEARCHABLE_TABLES:
+            for statement in search_ddl(table_name, dialect):
+                connection.execute(DDL(statement))
+
+
+# ----------------------------------------------------------------------------#
+# Queries.
+# ----------------------------------------------------------------------------#
+
+def _fts_phrase(term):
+    return '"{}"'.format(term.replace('"', '""'))
+
+
+def search(model, search_term, page=1, per_page=20):
+    """Rank `model` rows whose name contains `search_term`, one page at a time.
+
+    Returns the response dict rendered by the search templates, with the
+    number of upcoming shows of each hit read from its counter.
+    """
+    prefix = SEARCHABLE[model]
+    term = search_term.lower()
+    dialect = db.engine.dialect.name
+
+    query = db.session.query(model.id)
+    if dialect == 'sqlite' and len(term) >= MIN_FTS_TERM_LENGTH:
+        fts = table(prefix + '_fts', column('rowid'), column('rank'))
+        query = query.join(fts, fts.c.rowid == model.id) \
+            .filter(literal_column(fts.name).op('MATCH')(_fts_phrase(term)))
+        ranking = [fts.c.rank, model.name, model.id]
+    else:
+        query = query.filter(func.lower(model.name).contains(term, autoescape=True))
+        if dialect == 'postgresql':
+            ranking = [func.similarity(func.lower(model.name), term).desc(), model.name, model.id]
+        else:
+            ranking = [model.name, model.id]
+
+    count = query.with_entities(func.count(model.id)).scalar()
+    page = max(1, min(page, math.ceil(count / per_page) or 1))
+
+    rows = query.with_entities(*search_result(model)) \
+        .order_by(*ranking) \
+        .limit(per_page) \
+        .offset((page - 1) * per_page) \
+        .all()
+    return {
+        "count": count,
+        "page": page,
+        "pages": math.ceil(count / per_page),
+        "data": rows
+    }
@@ -0,0 +1,98 @@
+from flask import Blueprint, current_app, render_template, request, flash, abort, stream_with_context
+
+from cache import page_cache
+from conditional import conditional_get
+from counters import count_show
+from edits import touch
+from exports import csv_file, export_shows, show_date_range
+from instrumentation import query_budget
+from models import db, Venue, Artist, Show
+from pagination import keyset_page
+from read_models import SHOW_LISTING, SHOW_LISTING_ORDER, rows
+from routing import read_only
+from versions import version_columns
+
+bp = Blueprint('shows', __name__)
+
+
+#  Shows
+#  ----------------------------------------------------------------
+
+def shows_version():
+    # The listing renders shows and the names of their venues and artists.
+    row = db.session.query(*[column for model in (Show, Venue, Artist)
+                             for column in version_columns(model.__tablename__)]).one()
+    changed_at = max((value for value in row[1::2] if value is not None), default=None)
+    return ':'.join(str(version) for version in row[::2]), changed_at
+
+
+@bp.route('/shows')
+@read_only
+@query_budget(2)
+@conditional_get.validated(shows_version)
+@page_cache.cached('shows')
+def shows():
+    # displays list of shows at /shows
+    show_rows, previous_cursor, next_cursor = keyset_page(
+        rows(SHOW_LISTING)
+        .join(Venue, Show.venue_id == Venue.id)
+        .join(Artist, Show.artist_id == Artist.id),
+        SHOW_LISTING_ORDER,
+        current_app.config['LISTING_PAGE_SIZE'],
+        after=request.args.get('after'),
+        before=request.args.get('before')
+    )
+    return render_template('pages/shows.html', shows=show_rows,
+                           previous_cursor=previous_cursor, next_cursor=next_cursor)
+
+
+@bp.route('/shows.csv')
+@read_only
+@query_budget(2)
+@conditional_get.validated(shows_version)
+def shows_csv():
+    # The shows from/to the dates, e.g. ?from=2026-01-01&to=2026-12-31, streamed from the database.
+    try:
+        criteria = show_date_range(request.args.get('from'), request.args.get('to'))
+    except ValueError:
+        abort(400)
+    response = current_app.response_class(stream_with_context(csv_file(export_shows(*criteria))),
+                                          mimetype='text/csv')
+    response.headers['Content-Disposition'] = 'attachment; filename=shows.csv'
+    return response
+
+
+@bp.route('/shows/create')
+def create_shows():
+    # renders form. do not touch.
+    from forms import ShowForm
+    form = ShowForm()
+    return render_template('forms/new_show.html', form=form)
+
+
+@bp.route('/shows/create', methods=['POST'])
+def create_show_submission():
+    import dateutil.parser
+    try:
+        artist_id = int(request.form.get('artist_id'))
+        venue_id = int(request.form.get('venue_id'))
+        start_time = dateutil.parser.parse(request.form.get('start_time'))
+        db.session.add(Show(artist_id=artist_id,
+                            venue_id=venue_id,
+                            date=start_time)
+                       )
+        if not count_show(venue_id, artist_id, start_time):
+            # Past shows are not counted, but their venue and artist pages list them.
+            touch(Venue, [venue_id])
+            touch(Artist, [artist_id])
+        db.session.commit()
+        page_cache.invalidate('shows', 'venues', 'venue:%d' % venue_id, 'artist:%d' % artist_id)
+        flash('Show was successfully listed!')
+        # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
+    except:
+        flash('An error occurred. Show could not be listed.')
+        db.session.rollback()
+        current_app.logger.exception('Could not create show')
+    finally:
+        db.session.close()
+    return render_template('pages/home.html')
@@ -1,14 +1,16 @@
 window.addEventListener('DOMContentLoaded', () => {
-    document.querySelector('#delete_venue').addEventListener('click', e => {
-        let r = confirm("Are you sure?");
-        if (r === true) {
-            delete_venu(e.target.dataset['id']);
-        }
+    document.querySelectorAll('[data-delete-url]').forEach(button => {
+        button.addEventListener('click', e => {
+            let r = confirm("Are you sure?");
+            if (r === true) {
+                delete_record(e.target.dataset['deleteUrl']);
+            }
+        });
     });
 });
 
-function delete_venu(venue_id) {
-    fetch('/venues/' + venue_id, {
+function delete_record(url) {
+    fetch(url, {
         method: 'DELETE',
     }).then(response => {
         if (response.redirected) {
@@ -0,0 +1,68 @@
+import datetime as datetime_now
+
+import pytest
+
+from app import create_app
+from counters import UPCOMING_COUNTERS, refresh_counters
+from genres import invalidate_genre_names
+from models import db, Venue, Artist, Show, Genre
+
+
+def _create_app(tmp_path, **config):
+    settings = {
+        'TESTING': True,
+        # Requests that raise still tear down their session.
+        'PRESERVE_CONTEXT_ON_EXCEPTION': False,
+        'SECRET_KEY': 'test',
+        'WTF_CSRF_ENABLED': False,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///{}'.format(tmp_path / 'fyyur.db'),
+        'LOG_FILE': None,
+        'TYPEAHEAD_WARM': False,
+    }
+    settings.update(config)
+    # Each test has a new database: forget the genre names of the last one.
+    invalidate_genre_names()
+    return create_app(settings)
+
+
+def _seed(app):
+    """A few venues and artists, with past and upcoming shows."""
+    with app.app_context():
+        db.create_all()
+        now = datetime_now.datetime.utcnow()
+        genres = [Genre(name=name) for name in ('Jazz', 'Rock', 'Folk')]
+        venues = [Venue(name='Venue %d' % i, city='San Francisco', state='CA', genres=genres[:2]) for i in range(4)]
+        artists = [Artist(name='Artist %d' % i, city='New York', state='NY', genres=genres[1:]) for i in range(3)]
+        db.session.add_all(venues + artists)
+        db.session.flush()
+        for i in range(12):
+            db.session.add(Show(venue_id=venues[i % 4].id, artist_id=artists[i % 3].id,
+                                date=now + datetime_now.timedelta(days=i - 6)))
+        for model in UPCOMING_COUNTERS:
+            refresh_counters(model)
+        db.session.commit()
+        db.session.remove()
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Create apps with extra settings on one seeded database (in tmp_path)."""
+    seeded = []
+
+    def make_app(**config):
+        app = _create_app(tmp_path, **config)
+        if not seeded:
+            _seed(app)
+            seeded.append(app)
+        return app
+    return make_app
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(CACHE_TYPE='null')
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app import create_app
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(code, **env):
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONPATH=ROOT, **env))
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def test_creating_the_app_defers_the_heavy_imports():
+    loaded = run_python(
+        "import sys\n"
+        "from app import create_app\n"
+        "create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'LOG_FILE': None, 'TYPEAHEAD_WARM': False})\n"
+        "print(' '.join(sorted(name for name in ('babel', 'dateutil', 'forms', 'flask_migrate', 'alembic')\n"
+        "                      if name in sys.modules)))\n")
+    assert loaded.split() == []
+
+
+class OverridingConfig(object):
+    LISTING_PAGE_SIZE = 3
+    LOG_FILE = None
+
+
+@pytest.mark.parametrize('config', [{'LISTING_PAGE_SIZE': 3, 'LOG_FILE': None}, OverridingConfig])
+def test_config_overrides_the_defaults(config):
+    app = create_app(config)
+    assert app.config['LISTING_PAGE_SIZE'] == 3
+    # The rest comes from config.py.
+    assert app.config['SEARCH_PAGE_SIZE'] == 20
+
+
+def test_the_navigation_links_the_blueprints(client):
+    html = client.get('/artists').get_data(as_text=True)
+    assert '<a href="/venues">Venues</a>' in html
+    assert '<li  class="active" ><a href="/artists">Artists</a></li>' in html
+    assert client.get('/shows/create').status_code == 200
+
+
+def test_the_flask_command_has_the_app_commands(tmp_path):
+    result = subprocess.run([sys.executable, '-m', 'flask', '--help'], cwd=ROOT, capture_output=True, text=True,
+                            env=dict(os.environ, FLASK_APP='app', PYTHONPATH=ROOT,
+                                     DATABASE_URL='sqlite:///{}'.format(tmp_path / 'fyyur.db')))
+    assert result.returncode == 0, result.stderr
+    for command in ('db', 'import', 'build-assets', 'create-search-indexes', 'sweep-show-counters'):
+        assert '  {} '.format(command) in result.stdout
@@ -0,0 +1,91 @@
+import gzip
+import os
+import re
+import shutil
+
+import pytest
+from flask import Flask
+
+from assets import BUNDLES, Assets, build_assets
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STYLESHEET = b'body { background: url("../img/logo.png"); } .icon { background: url(data:image/png;base64,AA==); }'
+
+
+@pytest.fixture
+def static_folder(tmp_path):
+    static = tmp_path / 'static'
+    (static / 'css').mkdir(parents=True)
+    (static / 'img').mkdir()
+    (static / 'css' / 'main.css').write_bytes(STYLESHEET * 20)
+    (static / 'img' / 'logo.png').write_bytes(b'\x89PNG not really')
+    return static
+
+
+@pytest.fixture
+def built(static_folder):
+    manifest = build_assets(str(static_folder), bundle=False)
+    app = Flask(__name__, static_folder=str(static_folder))
+    Assets(app)
+    return app, manifest
+
+
+def test_build_fingerprints_and_precompresses(static_folder):
+    manifest = build_assets(str(static_folder), bundle=False)
+    css, logo = manifest['assets']['css/main.css'], manifest['assets']['img/logo.png']
+    assert re.match(r'^dist/css/main\.[0-9a-f]{12}\.css$', css)
+    assert re.match(r'^dist/img/logo\.[0-9a-f]{12}\.png$', logo)
+    # Stylesheets link the fingerprinted copies.
+    content = (static_folder / css).read_bytes()
+    assert 'url("/static/{}")'.format(logo).encode() in content
+    assert b'url(data:image/png;base64,AA==)' in content
+    # Only compressible files get encoded variants, and only when smaller.
+    assert 'gzip' in manifest['encodings'][css]
+    assert gzip.decompress((static_folder / (css + '.gz')).read_bytes()) == content
+    assert manifest['encodings'][logo] == []
+
+    # A rebuild gives the same names, a change a new one.
+    assert build_assets(str(static_folder), bundle=False)['assets']['css/main.css'] == css
+    (static_folder / 'css' / 'main.css').write_bytes(STYLESHEET)
+    assert build_assets(str(static_folder), bundle=False)['assets']['css/main.css'] != css
+
+
+def test_built_assets_are_served_encoded_and_immutable(built):
+    app, manifest = built
+    css = manifest['assets']['css/main.css']
+    client = app.test_client()
+    with app.test_request_context():
+        url = app.jinja_env.globals['asset_url']('css/main.css')
+    assert url == '/static/' + css
+
+    response = client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/css'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'max-age=31536000' in response.headers['Cache-Control']
+    assert 'Accept-Encoding' in response.headers['Vary']
+    encoded = response.data
+    response.close()
+
+    response = client.get(url)
+    assert 'Content-Encoding' not in response.headers
+    assert gzip.decompress(encoded) == response.data
+    response.close()
+
+
+def test_unbuilt_assets_link_the_plain_files(static_folder):
+    app = Flask(__name__, static_folder=str(static_folder))
+    Assets(app)
+    with app.test_request_context():
+        assert app.jinja_env.globals['asset_url']('css/main.css') == '/static/css/main.css'
+        assert app.jinja_env.globals['asset_urls']('bundles/main.css') == \
+            ['/static/' + member for member in BUNDLES['bundles/main.css']]
+
+
+def test_the_app_bundles_build(tmp_path):
+    static = tmp_path / 'static'
+    shutil.copytree(os.path.join(ROOT, 'static'), static, ignore=shutil.ignore_patterns('dist'))
+    manifest = build_assets(str(static))
+    for path in BUNDLES:
+        assert (static / manifest['assets'][path]).exists()
@@ -0,0 +1,86 @@
+import re
+
+import pytest
+
+from browse import browse, genre_bitmaps
+from models import db, Venue, Genre
+
+
+def browse_count(client, url):
+    return int(re.search(r'[Vv]enues: (\d+)</h3>', client.get(url).get_data(as_text=True)).group(1))
+
+
+def venue_form(venue, **values):
+    form = {'name': venue.name, 'city': venue.city, 'state': venue.state, 'address': venue.address or '',
+            'genres': [genre.name for genre in venue.genres]}
+    if venue.seeking_talent:
+        form['seeking_talent'] = 'y'
+    form.update(values)
+    return form
+
+
+@pytest.fixture(params=[True, False], ids=['bitmaps', 'sql'])
+def browse_app(make_app, request):
+    app = make_app(CACHE_TYPE='null', GENRE_BITMAPS=request.param)
+    with app.app_context():
+        blues = Genre(name='Blues')
+        venues = Venue.query.order_by(Venue.id).all()
+        venues[0].genres.append(blues)
+        venues[1].genres = [blues]
+        venues[1].seeking_talent = True
+        venues[2].state = 'NY'
+        db.session.commit()
+    return app
+
+
+@pytest.mark.parametrize('query, count', [
+    ('', 4),
+    ('?genre=Jazz', 3),
+    ('?genre=Jazz&genre=Blues', 1),
+    ('?genre=Jazz&genre=Blues&match=any', 4),
+    ('?state=CA', 3),
+    ('?state=CA&genre=Blues', 2),
+    ('?seeking=y', 1),
+    ('?seeking=n', 3),
+    ('?genre=Folk', 0),
+])
+def test_browse_filters(browse_app, query, count):
+    assert browse_count(browse_app.test_client(), '/venues/browse' + query) == count
+
+
+def test_browse_genre_page(browse_app):
+    client = browse_app.test_client()
+    assert browse_count(client, '/genres/Blues/venues?state=CA') == 2
+    assert client.get('/genres/Polka/venues').status_code == 404
+
+
+def test_browse_pages_are_ordered_by_name(browse_app):
+    with browse_app.test_request_context():
+        first = browse(Venue, page_size=3)
+        assert [row.name for row in first['data']] == ['Venue 0', 'Venue 1', 'Venue 2']
+        second = browse(Venue, page_size=3, after=first['next_cursor'])
+        assert [row.name for row in second['data']] == ['Venue 3']
+        assert second['count'] == 4
+
+
+def test_bitmaps_are_only_rebuilt_after_filter_changes(make_app):
+    app = make_app(CACHE_TYPE='null')
+    client = app.test_client()
+    with app.app_context():
+        venue = Venue.query.get(1)
+        # As submitted by the form.
+        venue.seeking_talent = False
+        db.session.commit()
+        phone_edit, state_edit = venue_form(venue, phone='555-0100'), venue_form(venue, state='NY')
+        db.session.remove()
+    client.get('/venues/browse')
+    bitmaps = genre_bitmaps._bitmaps[Venue]
+    # Shows bump the venue rows through their counters.
+    client.post('/shows/create', data={'venue_id': '1', 'artist_id': '1', 'start_time': '2030-01-01 20:00:00'})
+    # Nor do edits of fields the pages do not filter on.
+    client.post('/venues/1/edit', data=phone_edit)
+    assert browse_count(client, '/venues/browse?state=NY') == 0
+    assert genre_bitmaps._bitmaps[Venue] is bitmaps
+    client.post('/venues/1/edit', data=state_edit)
+    assert browse_count(client, '/venues/browse?state=NY') == 1
+    assert genre_bitmaps._bitmaps[Venue] is not bitmaps
@@ -0,0 +1,118 @@
+import datetime as datetime_now
+import re
+
+import pytest
+
+import cache
+from cache import LocalClient, PageCache, SharedCache, page_cache
+from models import db, Venue
+
+
+def queries(response):
+    return int(re.search(r'"(\d+) queries"', response.headers['Server-Timing']).group(1))
+
+
+def clear_flashes(client):
+    with client.session_transaction() as session:
+        session.pop('_flashes', None)
+
+
+def test_shared_cache_stores_pickled_values_in_the_client():
+    client = LocalClient()
+    shared = SharedCache(client)
+    shared.set('page:venues', {'body': '<html>'}, ttl=60)
+    assert shared.get('page:venues') == {'body': '<html>'}
+    assert isinstance(client.get('fyyur:page:venues'), bytes)
+    shared.delete('page:venues')
+    assert shared.get('page:venues') is None
+
+
+def test_local_client_expires_values(monkeypatch):
+    client = LocalClient()
+    client.set('key', b'value', ex=30)
+    now = cache.time.monotonic()
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now + 31)
+    assert client.get('key') is None
+
+
+def test_invalidation_is_seen_by_every_worker():
+    client = LocalClient()
+    workers = [PageCache(), PageCache()]
+    for worker in workers:
+        worker.backend = SharedCache(client)
+    generation = workers[0]._generation('venues')
+    assert workers[1]._generation('venues') == generation
+    workers[1].invalidate('venues')
+    assert workers[0]._generation('venues') != generation
+    assert workers[0]._generation('venues') == workers[1]._generation('venues')
+
+
+@pytest.mark.parametrize('cache_type', ['local', 'lru'])
+def test_cached_page_is_served_until_a_write(make_app, cache_type):
+    client = make_app(CACHE_TYPE=cache_type).test_client()
+    first = client.get('/venues')
+    cached = client.get('/venues')
+    assert cached.data == first.data
+    # Only the validator runs.
+    assert queries(cached) == 1
+    client.post('/venues/create', data={'name': 'The Musical Hop', 'city': 'San Francisco', 'state': 'CA',
+                                        'address': '1015 Folsom Street', 'genres': ['Jazz']})
+    clear_flashes(client)
+    assert b'The Musical Hop' in client.get('/venues').data
+
+
+def test_lru_cached_page_follows_other_workers_writes(make_app):
+    # The in-process cache of this worker does not see the invalidation of the
+    # worker that wrote, the page's data version changes nonetheless.
+    app = make_app(CACHE_TYPE='lru')
+    client = app.test_client()
+    page = client.get('/venues/1')
+    assert client.get('/venues/1').data == page.data
+    with app.app_context():
+        Venue.query.filter_by(id=1).update({'name': 'Renamed Hall'})
+        db.session.commit()
+    renamed = client.get('/venues/1', headers={'If-None-Match': page.headers['ETag']})
+    assert renamed.status_code == 200
+    assert b'Renamed Hall' in renamed.data
+
+
+def test_lru_cache_evicts_the_least_recently_used_entries():
+    lru = cache.LRUCache(max_entries=2)
+    lru.set('a', 1)
+    lru.set('b', 2)
+    assert lru.get('a') == 1
+    lru.set('c', 3)
+    assert (lru.get('a'), lru.get('b'), lru.get('c')) == (1, None, 3)
+
+
+def test_pages_expire_with_their_next_upcoming_show(app):
+    with app.test_request_context('/venues'):
+        assert page_cache._ttl() == 300
+        page_cache.expire_at(datetime_now.datetime.utcnow() + datetime_now.timedelta(seconds=30))
+        page_cache.expire_at(datetime_now.datetime.utcnow() + datetime_now.timedelta(hours=1))
+        assert 25 < page_cache._ttl() <= 30
+
+
+def test_pages_with_flashed_messages_are_not_cached(make_app):
+    client = make_app(CACHE_TYPE='local').test_client()
+    client.get('/venues/1')
+    client.delete('/venues/2')
+    flashed = client.get('/venues/1')
+    assert b'venue has been deleted' in flashed.data
+    assert b'venue has been deleted' not in client.get('/venues/1').data
+
+
+def test_venue_edits_invalidate_the_pages_showing_the_venue(make_app):
+    app = make_app(CACHE_TYPE='local')
+    client = app.test_client()
+    # Artist 1 played at Venue 1.
+    assert b'Venue 0' in client.get('/artists/1').data
+    with app.app_context():
+        venue = Venue.query.get(1)
+        form = {'name': 'Renamed Hall', 'city': venue.city, 'state': venue.state, 'address': '',
+                'genres': [genre.name for genre in venue.genres]}
+    client.post('/venues/1/edit', data=form)
+    clear_flashes(client)
+    page = client.get('/artists/1').data
+    assert b'Renamed Hall' in page
+    assert b'Venue 0' not in page
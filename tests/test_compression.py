@@ -0,0 +1,83 @@
+import gzip
+import zlib
+
+from flask import Flask, Response
+
+from compression import CompressionMiddleware
+
+GZIP = {'Accept-Encoding': 'gzip, deflate'}
+
+
+def test_pages_are_gzipped_for_clients_accepting_it(client):
+    plain = client.get('/venues')
+    compressed = client.get('/venues', headers=GZIP)
+    assert 'Content-Encoding' not in plain.headers
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert int(compressed.headers['Content-Length']) == len(compressed.data) < len(plain.data)
+    assert gzip.decompress(compressed.data) == plain.data
+
+
+def test_compressed_pages_have_a_weak_etag_that_validates(client):
+    compressed = client.get('/venues', headers=GZIP)
+    assert compressed.headers['ETag'].startswith('W/"')
+    assert client.get('/venues', headers=dict(GZIP, **{'If-None-Match': compressed.headers['ETag']})) \
+        .status_code == 304
+
+
+def test_small_responses_are_left_alone(client):
+    response = client.get('/venues/typeahead?q=zz', headers=GZIP)
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['Vary'] == 'Accept-Encoding'
+
+
+def test_streamed_exports_are_compressed_chunk_by_chunk(client):
+    plain = client.get('/shows.csv')
+    compressed = client.get('/shows.csv', headers=GZIP)
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in compressed.headers
+    assert gzip.decompress(compressed.data) == plain.data
+
+
+def middleware_app(response, **options):
+    app = Flask(__name__)
+    app.add_url_rule('/', 'index', lambda: response)
+    app.wsgi_app = CompressionMiddleware(app.wsgi_app, **options)
+    return app.test_client()
+
+
+def test_other_types_and_encoded_responses_pass_through():
+    image = middleware_app(Response(b'\x89PNG' * 500, mimetype='image/png')).get('/', headers=GZIP)
+    assert 'Content-Encoding' not in image.headers
+    encoded = Response(gzip.compress(b'body { }' * 500), mimetype='text/css', headers={'Content-Encoding': 'gzip'})
+    response = middleware_app(encoded).get('/', headers=GZIP)
+    assert gzip.decompress(response.data) == b'body { }' * 500
+    no_transform = Response('x' * 1000, headers={'Cache-Control': 'no-transform'})
+    assert 'Content-Encoding' not in middleware_app(no_transform).get('/', headers=GZIP).headers
+
+
+class FakeBrotli(object):
+    # Deflate standing in for the optional brotli package.
+
+    class Compressor(object):
+
+        def __init__(self, quality):
+            self._compressor = zlib.compressobj(quality)
+
+        def process(self, data):
+            return self._compressor.compress(data)
+
+        def flush(self):
+            return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        def finish(self):
+            return self._compressor.flush()
+
+
+def test_brotli_is_preferred_when_available():
+    client = middleware_app(Response('<p>page</p>' * 100), brotli=FakeBrotli)
+    response = client.get('/', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert zlib.decompress(response.data) == b'<p>page</p>' * 100
+    assert client.get('/', headers=GZIP).headers['Content-Encoding'] == 'gzip'
@@ -0,0 +1,61 @@
+import datetime as datetime_now
+
+import pytest
+from sqlalchemy import event
+
+from models import db, TableVersion
+
+
+def backdate_changes(app):
+    # Last-Modified has a one second resolution.
+    with app.app_context():
+        db.session.query(TableVersion).update(
+            {TableVersion.changed_at: datetime_now.datetime.utcnow() - datetime_now.timedelta(hours=1)})
+        db.session.commit()
+
+
+def clear_flashes(client):
+    with client.session_transaction() as session:
+        session.pop('_flashes', None)
+
+
+@pytest.mark.parametrize('url, deleted, name', [
+    ('/venues', '/venues/1', b'Venue 0'),
+    ('/artists', '/artists/1', b'Artist 0'),
+    ('/venues/browse', '/venues/1', b'Venue 0'),
+    ('/shows', '/venues/1', b'Venue 0'),
+])
+def test_listing_is_modified_by_a_delete(app, client, url, deleted, name):
+    backdate_changes(app)
+    page = client.get(url)
+    assert name in page.data
+    not_modified = client.get(url, headers={'If-Modified-Since': page.headers['Last-Modified']})
+    assert not_modified.status_code == 304
+    client.delete(deleted)
+    clear_flashes(client)
+    response = client.get(url, headers={'If-Modified-Since': page.headers['Last-Modified']})
+    assert response.status_code == 200
+    assert name not in response.data
+
+
+@pytest.mark.parametrize('url', ['/venues', '/artists', '/shows', '/venues/browse', '/artists/browse'])
+def test_listing_validators_do_not_scan_the_tables(make_app, url):
+    app = make_app()
+    client = app.test_client()
+    page = client.get(url)
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    assert client.get(url, headers={'If-None-Match': page.headers['ETag']}).status_code == 304
+    assert statements
+    assert not [statement for statement in statements if 'count(' in statement.lower()]
+
+
+def test_shows_listing_is_modified_by_a_new_show(client):
+    page = client.get('/shows')
+    assert client.get('/shows', headers={'If-None-Match': page.headers['ETag']}).status_code == 304
+    client.post('/shows/create', data={'venue_id': '1', 'artist_id': '1', 'start_time': '2030-01-01 20:00:00'})
+    clear_flashes(client)
+    response = client.get('/shows', headers={'If-None-Match': page.headers['ETag']})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != page.headers['ETag']
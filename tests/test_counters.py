@@ -0,0 +1,66 @@
+import datetime as datetime_now
+
+from counters import count_show, inconsistent_counters, refresh_counters, sweep_counters
+from models import db, Venue, Artist, Show
+
+
+def counters(model, row_id):
+    row = db.session.query(model.upcoming_shows_count, model.next_show_date).filter(model.id == row_id).one()
+    return tuple(row)
+
+
+def test_seeded_counters_are_consistent(app):
+    with app.app_context():
+        # Venue 1 has one upcoming show of the twelve, Artist 1 too.
+        assert counters(Venue, 1)[0] == 1
+        assert counters(Artist, 1)[0] == 1
+        assert inconsistent_counters(Venue) == []
+        assert inconsistent_counters(Artist) == []
+
+
+def test_created_shows_are_counted(app):
+    now = datetime_now.datetime.utcnow()
+    with app.app_context():
+        _, next_show_date = counters(Venue, 1)
+        sooner = now + datetime_now.timedelta(hours=1)
+        assert count_show(1, 1, sooner)
+        assert not count_show(1, 1, now - datetime_now.timedelta(hours=1))
+        assert counters(Venue, 1) == (2, sooner)
+        assert counters(Artist, 1) == (2, sooner)
+        assert count_show(1, 1, now + datetime_now.timedelta(days=30))
+        assert counters(Venue, 1) == (3, sooner)
+
+
+def test_the_show_form_counts_the_show(client, app):
+    client.post('/shows/create', data={'venue_id': '1', 'artist_id': '2', 'start_time': '2100-01-01 20:00:00'})
+    with app.app_context():
+        assert counters(Venue, 1)[0] == 2
+        assert counters(Artist, 2)[0] == 3
+        assert inconsistent_counters(Venue) == []
+
+
+def test_sweep_moves_started_shows_to_the_past(app):
+    with app.app_context():
+        upcoming = Show.query.filter(Show.venue_id == 1, Show.date > datetime_now.datetime.utcnow()).one()
+        # The show started, without the counters being told.
+        Show.query.filter(Show.id == upcoming.id).update(
+            {Show.date: datetime_now.datetime.utcnow() - datetime_now.timedelta(minutes=1)})
+        Venue.query.filter(Venue.id == 1).update(
+            {Venue.next_show_date: datetime_now.datetime.utcnow() - datetime_now.timedelta(minutes=1)})
+        assert [row_id for row_id, _, _ in inconsistent_counters(Venue)] == [1]
+
+        assert sweep_counters() == 1
+        assert counters(Venue, 1) == (0, None)
+        assert inconsistent_counters(Venue) == []
+        # Rows whose next show is still ahead are left alone.
+        assert sweep_counters() == 0
+
+
+def test_refresh_repairs_drifted_counters(app):
+    with app.app_context():
+        Artist.query.update({Artist.upcoming_shows_count: 7})
+        assert [row_id for row_id, stored, _ in inconsistent_counters(Artist) if stored == 7] == [1, 2, 3]
+        assert refresh_counters(Artist, [2]) == 1
+        assert [row_id for row_id, _, _ in inconsistent_counters(Artist)] == [1, 3]
+        assert refresh_counters(Artist) == 3
+        assert inconsistent_counters(Artist) == []
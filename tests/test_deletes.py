@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import event
+
+from counters import inconsistent_counters
+from models import db, Venue, Artist, Show, artist_genre, venue_genre
+
+
+def flashes(client):
+    with client.session_transaction() as session:
+        return [message for _, message in session.pop('_flashes', [])]
+
+
+@pytest.fixture
+def statements(app):
+    issued = []
+    with app.app_context():
+        listener = lambda *args: issued.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        yield issued
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+
+def test_venue_delete_cascades_in_the_database(app, client, statements):
+    with app.app_context():
+        # Artist 3 plays Venue 1's upcoming show.
+        assert Artist.query.get(3).upcoming_shows_count == 2
+    client.delete('/venues/1')
+    assert flashes(client) == ['Venue 0 venue has been deleted.']
+    # The shows and genre links are left to the database.
+    deletes = [statement for statement in statements if statement.startswith('DELETE')]
+    assert len(deletes) == 1 and deletes[0].startswith('DELETE FROM "Venue"')
+    with app.app_context():
+        assert Venue.query.get(1) is None
+        assert Show.query.filter_by(venue_id=1).count() == 0
+        assert db.session.query(venue_genre).filter(venue_genre.c.venue_id == 1).count() == 0
+        assert Artist.query.get(3).upcoming_shows_count == 1
+        assert inconsistent_counters(Artist) == []
+
+
+def test_artist_delete_cascades_in_the_database(app, client):
+    client.delete('/artists/2')
+    assert flashes(client) == ['Artist 1 artist has been deleted.']
+    with app.app_context():
+        assert Show.query.filter_by(artist_id=2).count() == 0
+        assert db.session.query(artist_genre).filter(artist_genre.c.artist_id == 2).count() == 0
+        assert Show.query.count() == 8
+        assert inconsistent_counters(Venue) == []
+
+
+def test_venues_are_deleted_in_one_batch(app, client):
+    client.post('/venues/delete', data={'venue_id': ['2', '3', '99']})
+    assert flashes(client) == ['2 venues have been deleted.']
+    with app.app_context():
+        assert sorted(venue.id for venue in Venue.query) == [1, 4]
+        assert Show.query.filter(Show.venue_id.in_([2, 3])).count() == 0
+        assert inconsistent_counters(Artist) == []
+
+
+def test_deleting_a_missing_venue(client):
+    client.delete('/venues/99')
+    assert flashes(client) == ["This venue doesn't exist."]
@@ -0,0 +1,46 @@
+import datetime as datetime_now
+import re
+
+import pytest
+
+from models import db, Show
+
+
+def queries(response):
+    return int(re.search(r'"(\d+) queries"', response.headers['Server-Timing']).group(1))
+
+
+def sections(response):
+    # The show headings of a detail page and the links listed under them.
+    html = response.get_data(as_text=True)
+    return [(heading, re.findall(r'<h5><a href="(/\w+/\d+)">', shows))
+            for heading, shows in re.findall(r'<h2 class="monospace">(.*?)</h2>(.*?)</section>', html, re.S)]
+
+
+def test_venue_page_splits_past_and_upcoming_shows(client):
+    # Venue 1 has the shows of days -6 and -2 (Artists 1 and 2) and of day 2 (Artist 3).
+    assert sections(client.get('/venues/1')) == [
+        ('1 Upcoming Show', ['/artists/3']),
+        ('2 Past Shows', ['/artists/1', '/artists/2']),
+    ]
+
+
+def test_artist_page_splits_past_and_upcoming_shows(client):
+    # Artist 1 has the shows of days -6, -3 and 0 (Venues 1, 4 and 3) and of day 3 (Venue 2).
+    assert sections(client.get('/artists/1')) == [
+        ('1 Upcoming Show', ['/venues/2']),
+        ('3 Past Shows', ['/venues/1', '/venues/4', '/venues/3']),
+    ]
+
+
+@pytest.mark.parametrize('url', ['/venues/1', '/artists/1'])
+def test_detail_query_count_does_not_grow_with_the_shows(app, client, url):
+    before = queries(client.get(url))
+    with app.app_context():
+        now = datetime_now.datetime.utcnow()
+        db.session.add_all([Show(venue_id=1, artist_id=1, date=now + datetime_now.timedelta(days=days))
+                            for days in (-20, -10, 10, 20)])
+        db.session.commit()
+    response = client.get(url)
+    assert '3 Upcoming Shows' in response.get_data(as_text=True)
+    assert queries(response) == before
@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import event
+
+from edits import apply_edit
+from models import db, Venue
+
+VENUE_1 = {'name': 'Venue 0', 'city': 'San Francisco', 'state': 'CA', 'address': '',
+           'genres': ['Jazz', 'Rock']}
+
+
+def flashes(client):
+    with client.session_transaction() as session:
+        return [message for _, message in session.pop('_flashes', [])]
+
+
+@pytest.fixture
+def writes(app):
+    with app.app_context():
+        # As saved by the form: unchecked is False, not NULL.
+        Venue.query.filter_by(id=1).update({'seeking_talent': False})
+        db.session.commit()
+        issued = []
+        listener = lambda *args: issued.append((args[2], args[3]))
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        yield lambda: [(statement, parameters) for statement, parameters in issued
+                       if statement.split()[0] in ('INSERT', 'UPDATE', 'DELETE')
+                       and 'table_version' not in statement]
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+
+def test_unchanged_submission_writes_nothing(client, writes):
+    client.post('/venues/1/edit', data=VENUE_1)
+    assert flashes(client) == ['Venue Venue 0 has no changes to save.']
+    assert writes() == []
+
+
+def test_only_the_changed_columns_are_written(client, writes):
+    client.post('/venues/1/edit', data=dict(VENUE_1, phone='415-000-1234'))
+    assert flashes(client) == ['Venue Venue 0 has been updated.']
+    (statement, parameters), = writes()
+    assert statement.startswith('UPDATE "Venue" SET phone=?, updated_at=?')
+    assert parameters[0] == '415-000-1234'
+
+
+def test_only_the_changed_genre_links_are_written(app, client, writes):
+    client.post('/venues/1/edit', data=dict(VENUE_1, genres=['Rock', 'Blues']))
+    statements = [statement.split('(')[0].split(' WHERE')[0].strip() for statement, _ in writes()]
+    assert sorted(statements) == ['DELETE FROM venue_genre', 'INSERT INTO "Genre"',
+                                  'INSERT INTO venue_genre', 'UPDATE "Venue" SET updated_at=?']
+    with app.app_context():
+        assert sorted(genre.name for genre in Venue.query.get(1).genres) == ['Blues', 'Rock']
+
+
+class Row(object):
+
+    def __init__(self, **values):
+        self.genres = []
+        self.updated_at = None
+        self.__dict__.update(values)
+
+
+def test_empty_fields_match_null_columns():
+    row = Row(phone=None, website='', name='Venue')
+    assert apply_edit(row, {'phone': '', 'website': None, 'name': 'Venue'}, []) == set()
+    assert row.updated_at is None
+    assert apply_edit(row, {'phone': '555', 'website': None, 'name': 'Venue'}, ['', '']) == {'phone'}
+    assert row.updated_at is not None
@@ -0,0 +1,86 @@
+import csv
+import datetime
+import io
+
+import pytest
+
+from exports import CSV_COLUMNS, show_date_range, _ical_line
+from models import db, Venue
+
+
+def test_venue_calendar_has_an_event_per_show(app, client):
+    with app.app_context():
+        Venue.query.filter_by(id=1).update({'name': 'Café; Bar, Club', 'address': '1 Main St'})
+        db.session.commit()
+    response = client.get('/venues/1/shows.ics')
+    assert response.mimetype == 'text/calendar'
+    text = response.get_data(as_text=True)
+    assert text.startswith('BEGIN:VCALENDAR\r\nVERSION:2.0\r\n') and text.endswith('END:VCALENDAR\r\n')
+    assert text.count('BEGIN:VEVENT\r\n') == 3
+    assert 'X-WR-CALNAME:Café\\; Bar\\, Club\r\n' in text
+    assert 'LOCATION:Café\\; Bar\\, Club\\, 1 Main St\\, San Francisco\\, CA\r\n' in text
+    assert 'UID:show-1@localhost\r\n' in text
+
+
+def test_artist_calendar_has_an_event_per_show(client):
+    text = client.get('/artists/1/shows.ics').get_data(as_text=True)
+    assert text.count('BEGIN:VEVENT\r\n') == 4
+    assert 'SUMMARY:Artist 0 at Venue 0\r\n' in text
+
+
+def test_artist_calendar_changes_with_the_venue_address(client):
+    etag = client.get('/artists/1/shows.ics').headers['ETag']
+    client.post('/venues/1/edit', data={'name': 'Venue 0', 'city': 'San Francisco', 'state': 'CA',
+                                        'address': '1 Main St', 'genres': ['Jazz', 'Rock']})
+    response = client.get('/artists/1/shows.ics', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert 'LOCATION:Venue 0\\, 1 Main St\\, San Francisco\\, CA\r\n' in response.get_data(as_text=True)
+
+
+@pytest.mark.parametrize('url', ['/venues/99/shows.ics', '/artists/99/shows.ics'])
+def test_calendars_of_missing_rows(client, url):
+    assert client.get(url).status_code == 404
+
+
+def test_long_lines_are_folded_between_characters():
+    line = _ical_line('SUMMARY', 'é' * 80)
+    parts = line[:-2].split('\r\n ')
+    assert len(parts) == 3
+    assert all(len(part.encode()) <= 75 for part in parts)
+    assert ''.join(parts) == 'SUMMARY:' + 'é' * 80
+
+
+def read_csv(response):
+    return list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+
+
+def test_shows_csv(client):
+    response = client.get('/shows.csv')
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'] == 'attachment; filename=shows.csv'
+    header, *shows = read_csv(response)
+    assert header == CSV_COLUMNS
+    assert len(shows) == 12
+    assert [show[0] for show in shows] == [str(id) for id in range(1, 13)]
+    assert shows[0][3:6] == ['Venue 0', 'San Francisco', 'CA']
+
+
+def test_shows_csv_date_range(client):
+    today = datetime.datetime.utcnow().date().isoformat()
+    # Today's show is included by from and by to.
+    assert len(read_csv(client.get('/shows.csv?from=' + today))) == 1 + 6
+    assert len(read_csv(client.get('/shows.csv?to=' + today))) == 1 + 7
+    assert read_csv(client.get('/shows.csv?from={0}&to={0}'.format(today)))[1][0] == '7'
+
+
+@pytest.mark.parametrize('query', ['from=yesterday', 'to=2026-13-01', 'from=01/02/2026'])
+def test_shows_csv_rejects_bad_dates(client, query):
+    assert client.get('/shows.csv?' + query).status_code == 400
+
+
+def test_date_range_offsets_are_converted_to_utc(app):
+    with app.app_context():
+        start, end = show_date_range('2026-01-01T10:00:00+02:00', '2026-01-31')
+        assert start.right.value == datetime.datetime(2026, 1, 1, 8)
+        assert end.right.value == datetime.datetime(2026, 2, 1)
+        assert show_date_range() == []
@@ -0,0 +1,51 @@
+import datetime
+
+import dateutil.parser
+import pytest
+
+import app as app_module
+from app import format_datetime, format_datetimes
+
+SHOW_TIME = datetime.datetime(2019, 5, 21, 21, 30)
+
+
+class CountingPattern(object):
+
+    def __init__(self, pattern, applied):
+        self.pattern = pattern
+        self.applied = applied
+
+    def apply(self, value, locale):
+        self.applied.append(value)
+        return self.pattern.apply(value, locale)
+
+
+@pytest.fixture
+def no_parsing(monkeypatch):
+    def parse(value):
+        raise AssertionError('parsed {!r}'.format(value))
+    monkeypatch.setattr(dateutil.parser, 'parse', parse)
+
+
+def test_datetimes_are_formatted_without_parsing(no_parsing):
+    assert format_datetime(SHOW_TIME, 'full') == 'Tuesday May, 21, 2019 at 9:30PM'
+    assert format_datetime(SHOW_TIME) == 'Tue 05, 21, 2019 9:30PM'
+
+
+def test_strings_are_still_parsed():
+    assert format_datetime('2019-05-21T21:30:00.000Z', 'full') == format_datetime(SHOW_TIME, 'full')
+
+
+def test_datetimes_formats_each_distinct_time_once(monkeypatch):
+    applied = []
+    pattern = app_module.datetime_pattern('full')
+    monkeypatch.setattr(app_module, 'datetime_pattern', lambda date_format: CountingPattern(pattern, applied))
+    later = SHOW_TIME + datetime.timedelta(days=1)
+    assert format_datetimes([SHOW_TIME, later, SHOW_TIME], 'full') == [
+        'Tuesday May, 21, 2019 at 9:30PM', 'Wednesday May, 22, 2019 at 9:30PM', 'Tuesday May, 21, 2019 at 9:30PM']
+    assert applied == [SHOW_TIME, later]
+
+
+@pytest.mark.parametrize('url', ['/shows', '/venues/1', '/artists/1'])
+def test_pages_pass_show_times_as_datetimes(client, no_parsing, url):
+    assert client.get(url).status_code == 200
@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import event
+
+from genres import genre_exists, invalidate_genre_names, known_genre_names, resolve_genres
+from models import db, Genre
+
+
+@pytest.fixture
+def statements(app):
+    with app.app_context():
+        invalidate_genre_names()
+        issued = []
+        listener = lambda *args: issued.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        yield issued
+        event.remove(db.engine, 'before_cursor_execute', listener)
+        invalidate_genre_names()
+
+
+def test_resolve_genres_in_the_submitted_order(statements):
+    genres = resolve_genres(['Rock', '', 'Blues', 'Jazz', 'Rock', 'Blues'])
+    assert [genre.name for genre in genres] == ['Rock', 'Blues', 'Jazz']
+    assert Genre.query.filter(Genre.name.in_(['Rock', 'Blues', 'Jazz'])).count() == 3
+    db.session.commit()
+    assert 'Blues' in known_genre_names()
+
+
+def test_resolve_genres_batches_its_statements(statements):
+    known_genre_names()
+    del statements[:]
+    resolve_genres(['Soul', 'Funk', 'Jazz'])
+    assert [statement.split()[0] for statement in statements] == ['INSERT', 'SELECT']
+
+    # Once the registry has them, known names are only fetched.
+    known_genre_names()
+    del statements[:]
+    resolve_genres(['Soul', 'Funk', 'Jazz'])
+    assert [statement.split()[0] for statement in statements] == ['SELECT']
+
+
+def test_genre_exists_sees_genres_of_other_processes(statements):
+    assert not genre_exists('Polka')
+    known_genre_names()
+    # As if inserted by another process: the registry is not told.
+    db.session.execute(Genre.__table__.insert().values(name='Polka'))
+    assert 'Polka' not in known_genre_names()
+    assert genre_exists('Polka')
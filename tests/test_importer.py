@@ -0,0 +1,80 @@
+import json
+import os
+
+from importer import import_file
+from models import Venue, Artist, Genre
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+def test_genre_import_reports_the_genres_it_inserted(app, tmp_path):
+    source = tmp_path / 'genres.csv'
+    source.write_text('name\nJazz\nBlues\nSoul\nBlues\n \n')
+    with app.app_context():
+        report = import_file('genres', str(source), echo=quiet)
+        assert (report.read, report.loaded, report.rejected) == (5, 2, 1)
+        assert Genre.query.filter(Genre.name.in_(['Blues', 'Soul'])).count() == 2
+
+
+VENUES_CSV = '''name,city,state,address,genres,facebook_link,seeking_talent
+The Musical Hop,San Francisco,CA,1015 Folsom Street,Jazz; Blues; Jazz,https://www.facebook.com/TheMusicalHop,y
+No City Hall,,CA,1 Main Street,Jazz,https://www.facebook.com/nocity,
+The Dueling Pianos Bar,New York,NY,335 Delancey Street,Classical;R&B,https://www.facebook.com/pianos,
+'''
+
+
+def test_venue_import_loads_valid_rows_with_their_genres(app, tmp_path):
+    source = tmp_path / 'venues.csv'
+    source.write_text(VENUES_CSV)
+    errors = []
+    with app.app_context():
+        report = import_file('venues', str(source), batch_size=2,
+                             echo=lambda message, err=False: err and errors.append(message))
+        assert (report.read, report.loaded, report.rejected) == (3, 2, 1)
+        assert errors == ['Row 2 rejected: city: This field is required.']
+        hop = Venue.query.filter_by(name='The Musical Hop').one()
+        assert sorted(genre.name for genre in hop.genres) == ['Blues', 'Jazz']
+        assert hop.seeking_talent is True
+        # Ids follow the seeded venues.
+        assert sorted(venue.id for venue in Venue.query.filter(Venue.id > 4)) == [5, 6]
+    assert not os.path.exists(str(source) + '.checkpoint')
+
+
+def test_show_import_rejects_unknown_references_and_counts_shows(app, tmp_path):
+    source = tmp_path / 'shows.jsonl'
+    source.write_text('\n'.join(json.dumps(row) for row in [
+        {'venue_id': 1, 'artist_id': 1, 'start_time': '2100-01-01 20:00:00'},
+        {'venue_id': 99, 'artist_id': 1, 'start_time': '2100-01-02 20:00:00'},
+        {'venue_id': 1, 'artist_id': 2, 'start_time': 'tomorrow'},
+    ]) + '\n')
+    with app.app_context():
+        report = import_file('shows', str(source), echo=quiet)
+        assert (report.read, report.loaded, report.rejected) == (3, 1, 2)
+        assert Venue.query.get(1).upcoming_shows_count == 2
+        assert Artist.query.get(1).upcoming_shows_count == 2
+
+
+def test_import_resumes_after_the_last_committed_batch(app, tmp_path):
+    source = tmp_path / 'artists.jsonl'
+    source.write_text('\n'.join(json.dumps(
+        {'name': 'Imported %d' % i, 'city': 'Austin', 'state': 'TX', 'genres': ['Folk'],
+         'facebook_link': 'https://www.facebook.com/imported%d' % i}) for i in range(5)) + '\n')
+    # A previous run committed the first two rows.
+    (tmp_path / 'artists.jsonl.checkpoint').write_text(json.dumps({'rows': 2}))
+    with app.app_context():
+        report = import_file('artists', str(source), batch_size=2, echo=quiet)
+        assert (report.skipped, report.read, report.loaded) == (2, 3, 3)
+        assert [artist.name for artist in Artist.query.filter(Artist.name.like('Imported %')).order_by(Artist.id)] \
+            == ['Imported 2', 'Imported 3', 'Imported 4']
+
+
+def test_import_command(app, tmp_path):
+    import commands
+    commands.init_app(app)
+    source = tmp_path / 'genres.jsonl'
+    source.write_text('{"name": "Zydeco"}\n')
+    result = app.test_cli_runner().invoke(args=['import', 'genres', str(source)])
+    assert result.exit_code == 0, result.output
+    assert 'Done. genres: 1 rows read, 1 loaded, 0 rejected' in result.output
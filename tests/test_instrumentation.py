@@ -0,0 +1,102 @@
+import pytest
+from flask import stream_with_context
+
+from instrumentation import QueryBudgetExceeded, query_budget, statement_shape
+from models import db, Venue
+
+
+def add_counting_view(app, budget):
+    @app.route('/count-venues')
+    @query_budget(budget)
+    def count_venues():
+        counts = [db.session.query(Venue).filter(Venue.id > i).count() for i in range(3)]
+        return str(sum(counts))
+
+
+@pytest.fixture
+def strict_app(make_app):
+    return make_app(CACHE_TYPE='null', QUERY_BUDGET_STRICT=True)
+
+
+def test_statement_shape_folds_parameters():
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?) AND name = 'x'") == \
+        statement_shape('SELECT * FROM t WHERE id IN (?) AND name = ?')
+
+
+def test_strict_over_budget_view_raises(strict_app):
+    add_counting_view(strict_app, 2)
+    with pytest.raises(QueryBudgetExceeded, match='count_venues issued 3 queries, its budget is 2'):
+        strict_app.test_client().get('/count-venues')
+
+
+def test_strict_view_within_budget(strict_app):
+    add_counting_view(strict_app, 3)
+    response = strict_app.test_client().get('/count-venues')
+    assert response.status_code == 200
+    assert 'db;dur=' in response.headers['Server-Timing']
+    assert '3 queries' in response.headers['Server-Timing']
+
+
+def test_over_budget_view_only_warns_by_default(app, caplog):
+    add_counting_view(app, 2)
+    with caplog.at_level('WARNING', logger='fyyur.sql'):
+        response = app.test_client().get('/count-venues')
+    assert response.status_code == 200
+    assert 'its budget is 2' in caplog.text
+
+
+@pytest.mark.parametrize('url', ['/venues', '/venues/1', '/artists', '/artists/1', '/shows',
+                                 '/venues/browse', '/artists/browse'])
+def test_pages_stay_within_their_budgets(strict_app, url):
+    assert strict_app.test_client().get(url).status_code == 200
+
+
+def add_streaming_view(app, budget):
+    @app.route('/stream-venues')
+    @query_budget(budget)
+    def stream_venues():
+        def names():
+            for i in range(3):
+                yield '{}\n'.format(db.session.query(Venue).filter(Venue.id > i).count())
+        return app.response_class(stream_with_context(names()))
+
+
+def test_streamed_statements_count_against_the_budget(strict_app):
+    add_streaming_view(strict_app, 2)
+    response = strict_app.test_client().get('/stream-venues')
+    assert response.get_data(as_text=True) == '4\n3\n2\n'
+    with pytest.raises(QueryBudgetExceeded, match='stream_venues issued 3 queries, its budget is 2'):
+        response.close()
+
+
+def test_streamed_statements_are_logged_when_closed(app, caplog):
+    add_streaming_view(app, 3)
+    with caplog.at_level('INFO', logger='fyyur.sql'):
+        response = app.test_client().get('/stream-venues')
+        response.get_data()
+        response.close()
+    assert '"queries": 3' in caplog.text
+    assert 'budget' not in caplog.text
+
+
+@pytest.mark.parametrize('url', ['/venues/1/shows.ics', '/artists/1/shows.ics',
+                                 '/shows.csv?from=2000-01-01&to=2100-01-01'])
+def test_streamed_exports_stay_within_their_budgets(strict_app, url):
+    response = strict_app.test_client().get(url)
+    assert response.status_code == 200
+    assert response.get_data()
+    response.close()
+
+
+def test_repeated_statements_are_reported_as_n_plus_one(make_app, caplog):
+    app = make_app(CACHE_TYPE='null', QUERY_REPEAT_THRESHOLD=3)
+
+    @app.route('/venue-names')
+    def venue_names():
+        return ' '.join(db.session.query(Venue.name).filter(Venue.id == venue_id).scalar()
+                        for venue_id in range(1, 5))
+
+    with caplog.at_level('INFO', logger='fyyur.sql'):
+        assert app.test_client().get('/venue-names').data == b'Venue 0 Venue 1 Venue 2 Venue 3'
+    assert 'Possible N+1 on /venue-names: 4 x SELECT "Venue".name' in caplog.text
+    assert '"repeated": [{"count": 4' in caplog.text
@@ -0,0 +1,64 @@
+import json
+import logging
+import queue
+import re
+
+import pytest
+
+from logs import BoundedQueueHandler, SamplingFilter, log_pipeline
+
+
+@pytest.fixture
+def logged_app(make_app, tmp_path):
+    app = make_app(CACHE_TYPE='null', LOG_FILE=str(tmp_path / 'fyyur.log'), LOG_SAMPLING={})
+
+    def entries():
+        log_pipeline.stop()
+        with open(app.config['LOG_FILE']) as log_file:
+            return [json.loads(line) for line in log_file]
+    app.log_entries = entries
+    yield app
+    log_pipeline.stop()
+
+
+def record(name, level=logging.INFO, message='message'):
+    return logging.LogRecord(name, level, __file__, 1, message, None, None)
+
+
+def test_requests_get_an_id(client):
+    assert re.match(r'^[0-9a-f]{32}$', client.get('/').headers['X-Request-ID'])
+    assert client.get('/', headers={'X-Request-ID': 'upstream-id'}).headers['X-Request-ID'] == 'upstream-id'
+
+
+def test_errors_are_written_as_json_lines_with_their_request(logged_app):
+    client = logged_app.test_client()
+    assert client.get('/venues/999', headers={'X-Request-ID': 'failing-request'}).status_code == 500
+    entry, = [entry for entry in logged_app.log_entries() if entry['level'] == 'ERROR']
+    assert entry['message'] == 'Could not load venue 999'
+    assert entry['request_id'] == 'failing-request'
+    assert (entry['method'], entry['path'], entry['endpoint']) == ('GET', '/venues/999', 'venues.show_venue')
+    assert 'Traceback' in entry['exception']
+
+
+def test_sql_statements_are_logged_from_requests(logged_app):
+    logged_app.test_client().get('/venues')
+    entry, = [entry for entry in logged_app.log_entries() if entry['logger'] == 'fyyur.sql']
+    assert json.loads(entry['message'])['path'] == '/venues'
+
+
+def test_full_queue_drops_and_counts_records():
+    handler = BoundedQueueHandler(queue.Queue(1))
+    for _ in range(3):
+        handler.handle(record('fyyur'))
+    assert handler.dropped == 2
+    handler.queue.get_nowait()
+    handler.handle(record('fyyur'))
+    assert handler.queue.get_nowait().dropped == 2
+
+
+def test_sampling_keeps_warnings_and_other_loggers():
+    sampling = SamplingFilter({'fyyur.sql': 0.0})
+    assert not sampling.filter(record('fyyur.sql'))
+    assert not sampling.filter(record('fyyur.sql.pool'))
+    assert sampling.filter(record('fyyur.sql', logging.WARNING))
+    assert sampling.filter(record('fyyur'))
@@ -0,0 +1,87 @@
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def flask_db(tmp_path):
+    # In a subprocess: env.py configures logging from alembic.ini.
+    migrations = tmp_path / 'migrations'
+    shutil.copytree(os.path.join(ROOT, 'migrations'), migrations,
+                    ignore=shutil.ignore_patterns('__pycache__'))
+    env = dict(os.environ, FLASK_APP='app', PYTHONPATH=ROOT,
+               DATABASE_URL='sqlite:///{}'.format(tmp_path / 'fyyur.db'))
+
+    def flask_db(*args):
+        result = subprocess.run([sys.executable, '-m', 'flask', 'db', *args, '-d', str(migrations)],
+                                cwd=ROOT, env=env, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        return result.stderr
+
+    flask_db.versions = migrations / 'versions'
+    flask_db.database = tmp_path / 'fyyur.db'
+    return flask_db
+
+
+def _schema_objects(database):
+    with sqlite3.connect(str(database)) as connection:
+        return {name for name, in connection.execute(
+            "SELECT name FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'")}
+
+
+def test_autogenerate_leaves_the_search_indexes_alone(flask_db):
+    flask_db('upgrade')
+    versions = set(os.listdir(flask_db.versions))
+
+    assert 'No changes in schema detected.' in flask_db('migrate', '-m', 'probe')
+    assert set(os.listdir(flask_db.versions)) == versions
+
+
+def test_downgrades_restore_the_name_indexes(flask_db):
+    flask_db('upgrade')
+    at_head = _schema_objects(flask_db.database)
+    assert {'venue_fts', 'venue_fts_ai', 'artist_fts_au', 'ix_venue_lower_name'} <= at_head
+
+    # Downgrading 0006 recreates Venue and Artist on SQLite.
+    flask_db('downgrade', '0005_cascade_deletes')
+    assert {'ix_venue_lower_name', 'ix_artist_lower_name'} <= _schema_objects(flask_db.database)
+    flask_db('upgrade')
+    assert _schema_objects(flask_db.database) == at_head
+
+
+def test_upgrade_keeps_the_data_of_the_initial_schema(flask_db):
+    flask_db('upgrade', '0001_initial_schema')
+    with sqlite3.connect(str(flask_db.database)) as connection:
+        connection.executescript('''
+            INSERT INTO "Venue" (id, name, city, state) VALUES (1, 'The Musical Hop', 'San Francisco', 'CA');
+            INSERT INTO "Artist" (id, name, city, state) VALUES (1, 'Guns N Petals', 'San Francisco', 'CA');
+            INSERT INTO "Genre" (name) VALUES ('Jazz');
+            INSERT INTO venue_genre (venue_id, genre_name) VALUES (1, 'Jazz'), (1, 'Jazz'), (NULL, 'Jazz');
+            INSERT INTO "Show" (id, date, artist_id, venue_id) VALUES
+                (1, '2000-01-01 20:00:00', 1, 1), (2, '2100-01-01 20:00:00', 1, 1);
+        ''')
+    flask_db('upgrade')
+    with sqlite3.connect(str(flask_db.database)) as connection:
+        # 0002 keys the links, dropping the repeated and incomplete ones.
+        assert connection.execute('SELECT venue_id, genre_name FROM venue_genre').fetchall() == [(1, 'Jazz')]
+        assert connection.execute(
+            'SELECT upcoming_shows_count FROM "Venue" UNION ALL SELECT upcoming_shows_count FROM "Artist"'
+        ).fetchall() == [(1,), (1,)]
+        assert connection.execute('SELECT count(*) FROM "Show"').fetchone() == (2,)
+
+
+@pytest.mark.parametrize('key, index', [('venue_id', 'ix_show_venue_id_date'),
+                                        ('artist_id', 'ix_show_artist_id_date')])
+def test_show_lookups_use_the_show_indexes(flask_db, key, index):
+    flask_db('upgrade')
+    with sqlite3.connect(str(flask_db.database)) as connection:
+        plan = ' '.join(row[-1] for row in connection.execute(
+            'EXPLAIN QUERY PLAN SELECT id, date FROM "Show" WHERE {} = 1 ORDER BY date'.format(key)))
+    assert index in plan
+    assert 'TEMP B-TREE' not in plan
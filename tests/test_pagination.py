@@ -0,0 +1,81 @@
+import datetime
+import re
+
+import pytest
+
+from models import db, Artist
+from pagination import decode_cursor, encode_cursor
+from read_models import SHOW_LISTING_ORDER
+
+
+def page_links(response):
+    html = response.get_data(as_text=True)
+    ids = [int(artist_id) for artist_id in re.findall(r'href="/artists/(\d+)"', html)]
+    previous_link = re.search(r'<li class="previous"><a href="([^"]+)"', html)
+    next_link = re.search(r'<li class="next"><a href="([^"]+)"', html)
+    return ids, previous_link and previous_link.group(1), next_link and next_link.group(1)
+
+
+@pytest.fixture
+def paged_app(make_app):
+    app = make_app(CACHE_TYPE='null', LISTING_PAGE_SIZE=2)
+    with app.app_context():
+        db.session.add_all([Artist(name=None, city='Boston', state='MA') for _ in range(2)]
+                           + [Artist(name='Artist 1', city='Boston', state='MA')])
+        db.session.commit()
+        order = [artist.id for artist in Artist.query.order_by(Artist.name.is_(None), Artist.name, Artist.id)]
+    app.artist_order = order
+    return app
+
+
+def test_cursors_round_trip_their_keys():
+    key_columns = SHOW_LISTING_ORDER
+    key = [datetime.datetime(2026, 10, 18, 20, 30), 7]
+    assert decode_cursor(encode_cursor(key), key_columns) == key
+    assert decode_cursor(encode_cursor([None, 7]), key_columns) == [None, 7]
+    assert decode_cursor('not a cursor', key_columns) is None
+    assert decode_cursor(encode_cursor([1]), key_columns) is None
+
+
+def test_pages_walk_through_rows_without_a_name(paged_app):
+    client = paged_app.test_client()
+    pages, link = [], '/artists'
+    while link:
+        ids, previous_link, link = page_links(client.get(link))
+        pages.append(ids)
+    assert [artist_id for page in pages for artist_id in page] == paged_app.artist_order
+    assert [len(page) for page in pages] == [2, 2, 2]
+
+    # And back again from the last page, which starts after a NULL name.
+    back = []
+    while previous_link:
+        ids, previous_link, _ = page_links(client.get(previous_link))
+        back = ids + back
+    assert back + pages[-1] == paged_app.artist_order
+
+
+def show_page(response):
+    html = response.get_data(as_text=True)
+    shows = re.findall(r'<h5><a href="/artists/(\d+)">.*?<h5><a href="/venues/(\d+)">', html, re.S)
+    next_link = re.search(r'<li class="next"><a href="([^"]+)"', html)
+    return [(int(artist_id), int(venue_id)) for artist_id, venue_id in shows], next_link and next_link.group(1)
+
+
+def test_shows_are_paged_by_start_time(make_app):
+    client = make_app(CACHE_TYPE='null', LISTING_PAGE_SIZE=5).test_client()
+    pages, link = [], '/shows'
+    while link:
+        response = client.get(link)
+        shows, link = show_page(response)
+        pages.append((shows, response.headers['Server-Timing']))
+    # The seeded shows, day by day: show i is at Venue i % 4 + 1 by Artist i % 3 + 1.
+    assert [show for shows, _ in pages for show in shows] == [(i % 3 + 1, i % 4 + 1) for i in range(12)]
+    assert [len(shows) for shows, _ in pages] == [5, 5, 2]
+    # Every page, however deep, takes the same statements.
+    assert len({re.search(r'"(\d+) queries"', timing).group(1) for _, timing in pages}) == 1
+
+
+@pytest.mark.parametrize('cursor', ['garbage', encode_cursor(['not a date', 1]), encode_cursor([1, 2, 3])])
+def test_invalid_cursors_start_from_the_first_page(client, cursor):
+    first = client.get('/shows').data
+    assert client.get('/shows?after=' + cursor).data == first
@@ -0,0 +1,33 @@
+import pytest
+from sqlalchemy import event
+
+from models import db, Venue, Artist, Show, Genre
+
+
+@pytest.fixture
+def loaded():
+    instances = []
+    listener = lambda target, context: instances.append(target)
+    for model in (Venue, Artist, Show, Genre):
+        event.listen(model, 'load', listener)
+    yield instances
+    for model in (Venue, Artist, Show, Genre):
+        event.remove(model, 'load', listener)
+
+
+@pytest.mark.parametrize('url', ['/venues', '/venues/1', '/artists', '/artists/1', '/shows',
+                                 '/venues/search?search_term=venue', '/artists/browse'])
+def test_read_only_pages_load_no_entities(client, loaded, url):
+    assert client.get(url).status_code == 200
+    assert loaded == []
+
+
+@pytest.mark.parametrize('url', ['/venues', '/artists', '/shows'])
+def test_listings_select_only_what_they_render(app, client, url):
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    client.get(url)
+    selected = ' '.join(statement.split('FROM')[0] for statement in statements)
+    for column in ('seeking_description', 'facebook_link', 'phone'):
+        assert column not in selected
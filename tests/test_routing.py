@@ -0,0 +1,90 @@
+import shutil
+import sqlite3
+
+import pytest
+from sqlalchemy.engine import make_url
+
+from models import db, Venue
+from routing import READ_AFTER_WRITE_COOKIE
+
+NEW_VENUE = {'name': 'The Musical Hop', 'city': 'San Francisco', 'state': 'CA',
+             'address': '1015 Folsom Street', 'genres': ['Jazz']}
+
+
+@pytest.fixture
+def replicated_app(make_app, tmp_path):
+    primary = make_app(CACHE_TYPE='null')
+    with primary.app_context():
+        db.engine.dispose()
+    # A replica lagging behind: its copy of the first venue has another name.
+    replica = tmp_path / 'replica.db'
+    shutil.copy(str(tmp_path / 'fyyur.db'), str(replica))
+    with sqlite3.connect(str(replica)) as connection:
+        connection.execute('UPDATE "Venue" SET name = ? WHERE id = 1', ('Replica Hall',))
+    return make_app(CACHE_TYPE='null', SQLALCHEMY_BINDS={'replica': 'sqlite:///{}'.format(replica)})
+
+
+def replica_venue_names(tmp_path):
+    with sqlite3.connect(str(tmp_path / 'replica.db')) as connection:
+        return {name for name, in connection.execute('SELECT name FROM "Venue"')}
+
+
+def test_read_only_views_read_a_replica(replicated_app):
+    response = replicated_app.test_client().get('/venues')
+    assert b'Replica Hall' in response.data
+    assert READ_AFTER_WRITE_COOKIE not in response.headers.get('Set-Cookie', '')
+
+
+def test_other_views_read_the_primary(replicated_app):
+    response = replicated_app.test_client().get('/venues/1/edit')
+    assert b'Venue 0' in response.data
+    assert b'Replica Hall' not in response.data
+
+
+def test_writes_go_to_the_primary(replicated_app, tmp_path):
+    response = replicated_app.test_client().post('/venues/create', data=NEW_VENUE)
+    assert READ_AFTER_WRITE_COOKIE in response.headers['Set-Cookie']
+    with replicated_app.app_context():
+        assert Venue.query.filter_by(name='The Musical Hop').count() == 1
+    assert 'The Musical Hop' not in replica_venue_names(tmp_path)
+
+
+def test_reads_after_a_write_go_to_the_primary(replicated_app):
+    writer = replicated_app.test_client()
+    writer.post('/venues/create', data=NEW_VENUE)
+    with writer.session_transaction() as session:
+        session.pop('_flashes', None)
+    written = writer.get('/venues').data
+    assert b'The Musical Hop' in written
+    assert b'Replica Hall' not in written
+    # Other visitors still read the replica.
+    assert b'The Musical Hop' not in replicated_app.test_client().get('/venues').data
+
+
+def test_pool_settings_come_from_the_config(make_app):
+    app = make_app(DB_POOL_SIZE=7, DB_MAX_OVERFLOW=3, DB_POOL_TIMEOUT=2, DB_POOL_RECYCLE=600,
+                   DB_POOL_PRE_PING=True, DB_STATEMENT_TIMEOUT=5000)
+    _, options = db.apply_driver_hacks(app, make_url('postgresql://fyyur@localhost/fyyur'), {})
+    assert options['pool_size'] == 7
+    assert options['max_overflow'] == 3
+    assert options['pool_timeout'] == 2
+    assert options['pool_recycle'] == 600
+    assert options['pool_pre_ping'] is True
+    assert options['connect_args'] == {'options': '-c statement_timeout=5000'}
+
+    # SQLite connections are not pooled in a queue.
+    _, options = db.apply_driver_hacks(app, make_url('sqlite:///fyyur.db'), {})
+    assert 'pool_size' not in options
+
+
+def test_replica_pages_are_cached_no_longer_than_the_lag(make_app, tmp_path):
+    make_app()
+    shutil.copy(str(tmp_path / 'fyyur.db'), str(tmp_path / 'replica.db'))
+    app = make_app(CACHE_TYPE='local', DB_REPLICA_LAG=30,
+                   SQLALCHEMY_BINDS={'replica': 'sqlite:///{}'.format(tmp_path / 'replica.db')})
+    pages = []
+    backend = app.extensions['page_cache'].backend
+    backend.set = lambda key, value, ttl=None: key.startswith('page:') and pages.append(ttl)
+    app.test_client().get('/venues/1')
+    ttl, = pages
+    assert 25 < ttl <= 30
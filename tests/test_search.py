@@ -0,0 +1,62 @@
+import re
+
+import pytest
+
+from models import db, Venue, Artist
+
+
+def results(response):
+    html = response.get_data(as_text=True)
+    count = int(re.search(r'Number of search results for ".*?": (\d+)</h3>', html).group(1))
+    return count, re.findall(r'<h5>(.*?)</h5>', html)
+
+
+@pytest.fixture
+def search_app(make_app):
+    app = make_app(CACHE_TYPE='null', SEARCH_PAGE_SIZE=2)
+    with app.app_context():
+        db.session.add_all([
+            Venue(name='The Musical Hop', city='San Francisco', state='CA'),
+            Venue(name='Park Square Live Music & Coffee', city='San Francisco', state='CA'),
+            Venue(name='100% Jazz "Club"', city='New York', state='NY'),
+            Artist(name='Guns N Petals', city='San Francisco', state='CA'),
+        ])
+        db.session.commit()
+    return app
+
+
+@pytest.mark.parametrize('term, count, names', [
+    ('Hop', 1, ['The Musical Hop']),
+    # Ranked: the shorter name matches more closely.
+    ('music', 2, ['The Musical Hop', 'Park Square Live Music &amp; Coffee']),
+    # Shorter than a trigram: matched with LIKE.
+    ('op', 1, ['The Musical Hop']),
+    ('100%', 1, ['100% Jazz &#34;Club&#34;']),
+    ('"club"', 1, ['100% Jazz &#34;Club&#34;']),
+    ('nothing like it', 0, []),
+])
+def test_venue_search(search_app, term, count, names):
+    client = search_app.test_client()
+    assert results(client.post('/venues/search', data={'search_term': term})) == (count, names)
+
+
+def test_search_pages(search_app):
+    client = search_app.test_client()
+    count, first = results(client.get('/venues/search?search_term=venue'))
+    _, second = results(client.get('/venues/search?search_term=venue&page=2'))
+    assert count == 4
+    assert first + second == ['Venue 0', 'Venue 1', 'Venue 2', 'Venue 3']
+
+
+def test_search_follows_renames_and_deletes(search_app):
+    client = search_app.test_client()
+    with search_app.app_context():
+        artist = Artist.query.filter_by(name='Guns N Petals').one()
+        artist.name = 'Guns N Roses'
+        db.session.commit()
+        artist_id = artist.id
+    assert results(client.post('/artists/search', data={'search_term': 'petals'})) == (0, [])
+    assert results(client.post('/artists/search', data={'search_term': 'roses'})) == (1, ['Guns N Roses'])
+
+    client.delete('/artists/{}'.format(artist_id))
+    assert results(client.post('/artists/search', data={'search_term': 'roses'})) == (0, [])
@@ -0,0 +1,54 @@
+from models import db, Venue, Artist
+from typeahead import PrefixIndex, typeahead
+
+
+def test_prefix_index_finds_word_starts():
+    index = PrefixIndex([(1, 'The Musical Hop'), (2, 'Park Square Live Music & Coffee'), (3, 'The Dueling Pianos Bar')])
+    # In the order of the matching words: 'music &...' before 'musical...'.
+    assert index.lookup('mus') == [(2, 'Park Square Live Music & Coffee'), (1, 'The Musical Hop')]
+    assert index.lookup('the d') == [(3, 'The Dueling Pianos Bar')]
+    assert index.lookup('  HOP ') == [(1, 'The Musical Hop')]
+    assert index.lookup('') == []
+
+
+def test_prefix_index_renames_and_discards():
+    index = PrefixIndex([(1, 'The Musical Hop')])
+    index.add(1, 'Jazz Corner')
+    assert index.lookup('mus') == []
+    assert index.lookup('jaz') == [(1, 'Jazz Corner')]
+    index.discard([1])
+    assert len(index) == 0
+    assert index.lookup('jaz') == []
+
+
+def test_prefix_index_leaves_out_rows_without_a_name():
+    index = PrefixIndex([(1, None), (2, 'The Musical Hop')])
+    assert len(index) == 1
+    index.add(2, None)
+    index.add(3, None)
+    assert len(index) == 0
+    assert index.lookup('the') == []
+
+
+def test_typeahead_with_a_venue_without_a_name(app, client):
+    with app.app_context():
+        db.session.add_all([Venue(name=None, city='San Francisco', state='CA'), Artist(name=None)])
+        db.session.commit()
+    response = client.get('/venues/typeahead?q=venue')
+    assert response.status_code == 200
+    assert [row['name'] for row in response.get_json()['results']] == ['Venue 0', 'Venue 1', 'Venue 2', 'Venue 3']
+    assert client.get('/artists/typeahead?q=art&limit=2').get_json()['results'] == [
+        {'id': 1, 'name': 'Artist 0'}, {'id': 2, 'name': 'Artist 1'}]
+
+
+def test_typeahead_picks_up_writes_of_other_workers(make_app):
+    app = make_app(CACHE_TYPE='null', TYPEAHEAD_SYNC_INTERVAL=0)
+    client = app.test_client()
+    assert client.get('/venues/typeahead?q=hop').get_json()['results'] == []
+    with app.app_context():
+        db.session.add(Venue(name='The Musical Hop'))
+        db.session.query(Venue).filter(Venue.id == 1).update({Venue.name: None})
+        db.session.commit()
+        assert typeahead.lookup(Venue, 'hop') == [(5, 'The Musical Hop')]
+        assert [name for _, name in typeahead.lookup(Venue, 'venue')] == ['Venue 1', 'Venue 2', 'Venue 3']
+        db.session.remove()
@@ -0,0 +1,39 @@
+import re
+
+from models import db, Venue
+
+
+def queries(response):
+    return int(re.search(r'"(\d+) queries"', response.headers['Server-Timing']).group(1))
+
+
+def areas(response):
+    # The area headings, each with the venue names listed under it.
+    html = response.get_data(as_text=True)
+    return [(area, re.findall(r'<h5>(.*?)</h5>', venues))
+            for area, venues in re.findall(r'<h3>(.*?)</h3>(.*?)</ul>', html, re.S)]
+
+
+def test_venues_are_grouped_by_area(app, client):
+    with app.app_context():
+        db.session.add_all([
+            Venue(name='The Dueling Pianos Bar', city='New York', state='NY'),
+            Venue(name='Park Square Live Music', city='San Francisco', state='CA'),
+            Venue(name='Alamo', city='Austin', state='TX'),
+        ])
+        db.session.commit()
+    assert areas(client.get('/venues')) == [
+        ('San Francisco, CA', ['Park Square Live Music', 'Venue 0', 'Venue 1', 'Venue 2', 'Venue 3']),
+        ('New York, NY', ['The Dueling Pianos Bar']),
+        ('Austin, TX', ['Alamo']),
+    ]
+
+
+def test_venues_query_count_does_not_grow_with_the_venues(app, client):
+    before = queries(client.get('/venues'))
+    with app.app_context():
+        db.session.add_all([Venue(name='Venue %d' % i, city='City %d' % i, state='WA') for i in range(10)])
+        db.session.commit()
+    response = client.get('/venues')
+    assert response.get_data(as_text=True).count('Venue ') == 14
+    assert queries(response) == before
@@ -0,0 +1,211 @@
+import bisect
+import datetime as datetime_now
+import re
+import sys
+import threading
+import time
+from array import array
+
+import click
+from flask import current_app
+from sqlalchemy import func
+
+from models import db, Venue, Artist
+
+# ----------------------------------------------------------------------------#
+# Prefix index.
+# ----------------------------------------------------------------------------#
+
+_WORD = re.compile(r'\w+')
+
+# Most results a lookup returns.
+MAX_LIMIT = 50
+
+
+def normalize(text):
+    return ' '.join(text.casefold().split())
+
+
+class PrefixIndex(object):
+    """Names of rows, sorted under each of their word starts for prefix
+    lookups by bisection: "The Musical Hop" is found by "the m", "mus" and
+    "hop".
+
+    The sorted keys and their row ids are parallel arrays. Adding or removing
+    a name moves their tails, a memmove of a few hundred microseconds per
+    word at 100k names.
+    """
+
+    def __init__(self, names=()):
+        self._keys = []
+        self._ids = array('q')
+        self._names = {}
+        self._lock = threading.Lock()
+        self.replace(names)
+
+    def __len__(self):
+        return len(self._names)
+
+    @staticmethod
+    def _word_keys(name):
+        key = normalize(name)
+        return [key[match.start():] for match in _WORD.finditer(key)]
+
+    def replace(self, names):
+        """Index the (id, name) pairs `names` instead of the current ones;
+        rows without a name are left out."""
+        names = {row_id: name for row_id, name in names if name is not None}
+        entries = sorted((key, row_id) for row_id, name in names.items() for key in self._word_keys(name))
+        keys = [key for key, _ in entries]
+        ids = array('q', [row_id for _, row_id in entries])
+        with self._lock:
+            self._keys, self._ids, self._names = keys, ids, names
+
+    def _remove(self, row_id):
+        for key in self._word_keys(self._names.pop(row_id)):
+            position = bisect.bisect_left(self._keys, key)
+            while self._ids[position] != row_id:
+                position += 1
+            del self._keys[position]
+            del self._ids[position]
+
+    def add(self, row_id, name):
+        """Index a new row, or the new name of an indexed one."""
+        if name is None:
+            self.discard([row_id])
+            return
+        with self._lock:
+            if self._names.get(row_id) == name:
+                return
+            if row_id in self._names:
+                self._remove(row_id)
+            self._names[row_id] = name
+            for key in self._word_keys(name):
+                position = bisect.bisect_right(self._keys, key)
+                self._keys.insert(position, key)
+                self._ids.insert(position, row_id)
+
+    def discard(self, row_ids):
+        with self._lock:
+            for row_id in row_ids:
+                if row_id in self._names:
+                    self._remove(row_id)
+
+    def lookup(self, prefix, limit=10):
+        """The first `limit` (id, name) pairs with a word starting with
+        `prefix`, in the order of the matching words."""
+        prefix = normalize(prefix)
+        results = []
+        if not prefix:
+            return results
+        seen = set()
+        with self._lock:
+            keys, ids = self._keys, self._ids
+            position = bisect.bisect_left(keys, prefix)
+            while position < len(keys) and len(results) < limit and keys[position].startswith(prefix):
+                row_id = ids[position]
+                if row_id not in seen:
+                    seen.add(row_id)
+                    results.append((row_id, self._names[row_id]))
+                position += 1
+        return results
+
+    def memory_bytes(self):
+        """Bytes held by the index: its arrays, keys, names and ids."""
+        with self._lock:
+            return sys.getsizeof(self._keys) + sum(map(sys.getsizeof, self._keys)) \
+                + sys.getsizeof(self._ids) + sys.getsizeof(self._names) \
+                + sum(sys.getsizeof(row_id) + sys.getsizeof(name) for row_id, name in self._names.items())
+
+
+# ----------------------------------------------------------------------------#
+# Venue and artist typeahead.
+# ----------------------------------------------------------------------------#
+
+# Rows whose updated_at is up to this old when a sync runs are read again, for
+# writes committed, or replicated, after others with a later updated_at.
+SYNC_OVERLAP = datetime_now.timedelta(seconds=60)
+
+
+class Typeahead(object):
+    """In-process prefix indexes of the venue and artist names.
+
+    Each worker warms them when it starts, and updates them as its own
+    creates, edits and deletes commit. Those of the other workers and of
+    imports are picked up by a sync, at most every TYPEAHEAD_SYNC_INTERVAL
+    seconds: the rows whose updated_at moved are indexed again, and the index
+    is rebuilt when its number of rows no longer matches the table's named ones.
+    """
+
+    def __init__(self, app=None):
+        self._indexes = {}
+        self._synced = {}  # model: (monotonic time of the last sync, latest updated_at seen)
+        self._sync_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('TYPEAHEAD_WARM', True)
+        app.config.setdefault('TYPEAHEAD_LIMIT', 10)
+        app.config.setdefault('TYPEAHEAD_SYNC_INTERVAL', 5)
+        self._indexes = {Venue: PrefixIndex(), Artist: PrefixIndex()}
+        self._synced = {}
+        app.extensions['typeahead'] = self
+        # The flask commands, migrations included, do not look names up.
+        if app.config['TYPEAHEAD_WARM'] and click.get_current_context(silent=True) is None:
+            self.warm(app)
+
+    def warm(self, app):
+        with app.app_context():
+            try:
+                for model in self._indexes:
+                    self.sync(model)
+            except Exception:
+                # The worker starts anyway, the first lookup builds them instead.
+                app.logger.warning('Could not warm the typeahead indexes.', exc_info=True)
+            finally:
+                db.session.remove()
+
+    def sync(self, model):
+        """Catch up with the changes committed by other processes, unless
+        synced within the last TYPEAHEAD_SYNC_INTERVAL seconds."""
+        index = self._indexes[model]
+        # Lookups keep using a built index while another thread syncs it.
+        if not self._sync_lock.acquire(blocking=model not in self._synced):
+            return
+        try:
+            synced_at, latest = self._synced.get(model, (None, None))
+            built = synced_at is not None
+            if built and time.monotonic() - synced_at < current_app.config['TYPEAHEAD_SYNC_INTERVAL']:
+                return
+            if built:
+                changed = db.session.query(model.id, model.name, model.updated_at)
+                if latest is not None:
+                    changed = changed.filter(model.updated_at >= latest - SYNC_OVERLAP)
+                for row_id, name, updated_at in changed:
+                    index.add(row_id, name)
+                    latest = updated_at if latest is None else max(latest, updated_at)
+                # Deleted rows, or names set to NULL.
+                built = len(index) == db.session.query(func.count(model.name)).scalar()
+            if not built:
+                latest = db.session.query(func.max(model.updated_at)).scalar()
+                index.replace(db.session.query(model.id, model.name))
+            self._synced[model] = (time.monotonic(), latest)
+        finally:
+            self._sync_lock.release()
+
+    def lookup(self, model, prefix, limit=None):
+        self.sync(model)
+        limit = current_app.config['TYPEAHEAD_LIMIT'] if limit is None else limit
+        return self._indexes[model].lookup(prefix, min(max(limit, 1), MAX_LIMIT))
+
+    def add(self, model, row_id, name):
+        """Index a created row, or the new name of an edited one, once committed."""
+        self._indexes[model].add(row_id, name)
+
+    def discard(self, model, row_ids):
+        """Drop deleted rows, once committed."""
+        self._indexes[model].discard(row_ids)
+
+
+typeahead = Typeahead()
@@ -0,0 +1,356 @@
+import datetime as datetime_now
+from itertools import groupby
+
+from flask import Blueprint, current_app, jsonify, render_template, request, flash, redirect, url_for, abort, \
+    stream_with_context
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+
+from browse import browse, browse_filters, browse_version, filters_changed
+from cache import page_cache
+from conditional import conditional_get
+from counters import refresh_counters, awaiting_sweep
+from edits import apply_edit, touch
+from exports import export_shows, ical_calendar
+from genres import genre_exists, resolve_genres
+from instrumentation import query_budget
+from models import db, Venue, Artist, Show
+from read_models import VENUE_LISTING, VENUE_DETAIL, VENUE_SHOWS, rows, genre_names
+from routing import read_only
+from search import search
+from typeahead import typeahead
+from versions import version_columns
+
+bp = Blueprint('venues', __name__)
+
+
+# Venue fields rendered by the venues listing, and by the shows listing and artist pages.
+LISTED_FIELDS = {'name', 'city', 'state'}
+SHOWN_FIELDS = {'name', 'image_link'}
+# Venue fields the browse pages filter on.
+FILTERED_FIELDS = {'state', 'seeking_talent', 'genres'}
+# Venue fields written into its artists' show calendars.
+EXPORTED_FIELDS = {'name', 'address', 'city', 'state'}
+
+
+def venue_pages(venue_id, changed=None):
+    # Pages rendering the `changed` fields of a venue, all of them by default:
+    # the listings, its own page and its artists' pages.
+    pages = ['venue:%d' % venue_id]
+    if changed is None or changed & LISTED_FIELDS:
+        pages.append('venues')
+    if changed is None or changed & SHOWN_FIELDS:
+        artist_ids = db.session.query(Show.artist_id).filter_by(venue_id=venue_id).distinct()
+        pages += ['shows'] + ['artist:%d' % row_id for row_id, in artist_ids]
+    return pages
+
+
+def venues_version():
+    # Every write to Venue, deletes included, bumps its table version.
+    version, changed_at, next_show_date = db.session.query(
+        *version_columns('Venue'), func.min(Venue.next_show_date)).one()
+    if awaiting_sweep(next_show_date):
+        return None
+    return str(version), changed_at
+
+
+def venue_version(venue_id):
+    # Writes changing a venue page bump the venue row.
+    row = db.session.query(Venue.updated_at, Venue.next_show_date).filter(Venue.id == venue_id).first()
+    if row is None or awaiting_sweep(row.next_show_date):
+        return None
+    return str(row.updated_at), row.updated_at
+
+
+def venue_form_values():
+    return {
+        "name": request.form.get('name'),
+        "city": request.form.get('city'),
+        "state": request.form.get('state'),
+        "address": request.form.get('address'),
+        "phone": request.form.get('phone'),
+        "image_link": request.form.get('image_link'),
+        "facebook_link": request.form.get('facebook_link'),
+        "website": request.form.get('website_link'),
+        "seeking_talent": request.form.get('seeking_talent') == "y",
+        "seeking_description": request.form.get('seeking_description'),
+    }
+
+
+#  Venues
+#  ----------------------------------------------------------------
+
+@bp.route('/venues')
+@read_only
+@query_budget(2)
+@conditional_get.validated(venues_version)
+@page_cache.cached('venues')
+def venues():
+    # One query for every venue and its upcoming shows counter, ordered so
+    # that venues of the same area are adjacent.
+    venue_rows = rows(VENUE_LISTING).order_by(Venue.state, Venue.city, Venue.name, Venue.id).all()
+    # The counters change when the next upcoming show starts.
+    page_cache.expire_at(min((row.next_show_date for row in venue_rows if row.next_show_date is not None),
+                             default=None))
+    data = [{
+        "city": city,
+        "state": state,
+        "venues": list(area_venues)
+    } for (city, state), area_venues in groupby(venue_rows, key=lambda row: (row.city, row.state))]
+    return render_template('pages/venues.html', areas=data)
+
+
+@bp.route('/venues/search', methods=['GET', 'POST'])
+@read_only
+@query_budget(2)
+def search_venues():
+    # seach for Hop should return "The Musical Hop".
+    # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
+    search_term = request.values.get('search_term', '').strip()
+    response = search(Venue, search_term,
+                      page=request.args.get('page', 1, type=int),
+                      per_page=current_app.config['SEARCH_PAGE_SIZE'])
+    return render_template('pages/search_venues.html', results=response,
+                           search_term=search_term)
+
+
+@bp.route('/venues/typeahead')
+@read_only
+@query_budget(4)
+def typeahead_venues():
+    # The venues with a word of their name starting with q, from the in-process index.
+    matches = typeahead.lookup(Venue, request.args.get('q', ''), request.args.get('limit', type=int))
+    return jsonify(results=[{"id": row_id, "name": name} for row_id, name in matches])
+
+
+def browse_venues_version(genre_name=None):
+    return browse_version(Venue)
+
+
+@bp.route('/venues/browse')
+@bp.route('/genres/<genre_name>/venues')
+@read_only
+@query_budget(5)
+@conditional_get.validated(browse_venues_version)
+def browse_venues(genre_name=None):
+    # Venues by genres, all or any of them, state and seeking_talent, e.g.
+    # /venues/browse?genre=Jazz&genre=Blues&match=any&state=CA&seeking=y
+    from forms import VenueForm
+    if genre_name is not None and not genre_exists(genre_name):
+        abort(404)
+    filters = browse_filters(request.args, genre_name)
+    response = browse(Venue, page_size=current_app.config['LISTING_PAGE_SIZE'],
+                      after=request.args.get('after'), before=request.args.get('before'), **filters)
+    page_args = dict(request.view_args, **{key: values for key, values in request.args.lists()
+                                           if key not in ('after', 'before')})
+    return render_template('pages/browse_venues.html', results=response, filters=filters, genre_name=genre_name,
+                           page_args=page_args,
+                           genre_choices=[name for name, _ in VenueForm.genres.kwargs['choices']],
+                           state_choices=[name for name, _ in VenueForm.state.kwargs['choices']])
+
+
+@bp.route('/venues/<int:venue_id>')
+@read_only
+@query_budget(4)
+@conditional_get.validated(venue_version)
+@page_cache.cached('venue:{venue_id}')
+def show_venue(venue_id):
+    data = {}
+    try:
+        venue = rows(VENUE_DETAIL).filter(Venue.id == venue_id).first()
+        current_time = datetime_now.datetime.utcnow()
+        # Get past and upcoming shows lists in a single pass
+        past_shows_list = []
+        upcoming_shows_list = []
+        venue_shows = rows(VENUE_SHOWS) \
+            .join(Artist, Show.artist_id == Artist.id) \
+            .filter(Show.venue_id == venue_id) \
+            .order_by(Show.date) \
+            .all()
+        for show in venue_shows:
+            if show.start_time < current_time:
+                past_shows_list.append(show)
+            elif show.start_time > current_time:
+                upcoming_shows_list.append(show)
+        if upcoming_shows_list:
+            page_cache.expire_at(upcoming_shows_list[0].start_time)
+        data = dict(
+            venue._asdict(),
+            genres=genre_names(Venue, venue_id),
+            past_shows=past_shows_list,
+            upcoming_shows=upcoming_shows_list,
+            past_shows_count=len(past_shows_list),
+            upcoming_shows_count=len(upcoming_shows_list)
+        )
+    except:
+        current_app.logger.exception('Could not load venue %s', venue_id)
+        abort(500)
+    finally:
+        db.session.close()
+    return render_template('pages/show_venue.html', venue=data)
+
+
+@bp.route('/venues/<int:venue_id>/shows.ics')
+@read_only
+@query_budget(3)
+@conditional_get.validated(venue_version)
+def venue_calendar(venue_id):
+    # Every show of the venue as calendar events, streamed from the database.
+    venue = db.session.query(Venue.name).filter(Venue.id == venue_id).first()
+    if venue is None:
+        abort(404)
+    events = ical_calendar(venue.name, export_shows(Show.venue_id == venue_id), request.host)
+    return current_app.response_class(stream_with_context(events), mimetype='text/calendar')
+
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/create', methods=['GET'])
+def create_venue_form():
+    from forms import VenueForm
+    form = VenueForm()
+    return render_template('forms/new_venue.html', form=form)
+
+
+@bp.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+    try:
+        newVenue = Venue(**venue_form_values())
+        db.session.add(newVenue)
+        newVenue.genres = resolve_genres(request.form.getlist('genres'))
+        filters_changed(Venue)
+        db.session.commit()
+        typeahead.add(Venue, newVenue.id, newVenue.name)
+        page_cache.invalidate('venues')
+        flash('Venue ' + newVenue.name + ' was successfully listed!')
+    except:
+        flash('An error occurred. Venue ' + request.form.get('name') + ' could not be listed.')
+        db.session.rollback()
+        current_app.logger.exception('Could not create venue')
+    finally:
+        db.session.close()
+    # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
+    return render_template('pages/home.html')
+
+
+#  Delete
+#  ----------------------------------------------------------------
+
+def delete_venues(venue_ids):
+    """Delete venues in one statement, the database cascading to their shows
+    and genre links. Returns the number of deleted venues."""
+    venue_ids = list(venue_ids)
+    # Their artists' pages change, and so do the counters of those with upcoming shows there.
+    artist_shows = db.session.query(Show.artist_id, func.max(Show.date)) \
+        .filter(Show.venue_id.in_(venue_ids)) \
+        .group_by(Show.artist_id) \
+        .all()
+    current_time = datetime_now.datetime.utcnow()
+    deleted = db.session.query(Venue).filter(Venue.id.in_(venue_ids)).delete(synchronize_session=False)
+    filters_changed(Venue)
+    touch(Artist, [artist_id for artist_id, _ in artist_shows])
+    refresh_counters(Artist, [artist_id for artist_id, last_show in artist_shows if last_show > current_time])
+    db.session.commit()
+    typeahead.discard(Venue, venue_ids)
+    page_cache.invalidate('venues', 'artists', 'shows', *['venue:%d' % venue_id for venue_id in venue_ids] +
+                          ['artist:%d' % artist_id for artist_id, _ in artist_shows])
+    return deleted
+
+
+@bp.route('/venues/<int:venue_id>', methods=['DELETE'])
+def delete_venue(venue_id):
+    # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
+    try:
+        name = db.session.query(Venue.name).filter_by(id=venue_id).scalar()
+        if name is not None:
+            delete_venues([venue_id])
+            flash(name + " venue has been deleted.")
+        else:
+            flash("This venue doesn't exist.")
+    except:
+        db.session.rollback()
+        current_app.logger.exception('Could not delete venue %s', venue_id)
+        flash("An error occurred. Venue could not be deleted.")
+    finally:
+        db.session.close()
+    # BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
+    # Done
+    # clicking that button delete it from the db then redirect the user to the homepage
+    # Done
+    return redirect(url_for("index"))
+
+
+@bp.route('/venues/delete', methods=['POST'])
+def delete_venue_batch():
+    # Deletes every venue of the venue_id form values.
+    try:
+        deleted = delete_venues(request.form.getlist('venue_id', type=int))
+        flash("{} venues have been deleted.".format(deleted))
+    except:
+        db.session.rollback()
+        current_app.logger.exception('Could not delete venues')
+        flash("An error occurred. Venues could not be deleted.")
+    finally:
+        db.session.close()
+    return redirect(url_for("index"))
+
+
+#  Update
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['GET'])
+@query_budget(2)
+def edit_venue(venue_id):
+    from forms import VenueForm
+    form = VenueForm()
+    venue_data = Venue.query.filter_by(id=venue_id).first()  # type: Venue
+    # Get genres list
+    genres_list = []
+    for genre in venue_data.genres:
+        genres_list.append(genre.name)
+    venue = {
+        "id": venue_data.id,
+        "name": venue_data.name,
+        "genres": genres_list,
+        "address": venue_data.address,
+        "city": venue_data.city,
+        "state": venue_data.state,
+        "phone": venue_data.phone,
+        "website": venue_data.website,
+        "facebook_link": venue_data.facebook_link,
+        "seeking_talent": venue_data.seeking_talent,
+        "seeking_description": venue_data.seeking_description,
+        "image_link": venue_data.image_link
+    }
+    return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+    try:
+        # The venue and its genres in one query; only what changed is written.
+        venue = Venue.query.options(joinedload(Venue.genres)).filter_by(id=venue_id).first()  # type: Venue
+        values = venue_form_values()
+        changed = apply_edit(venue, values, request.form.getlist('genres'))
+        if changed:
+            if changed & FILTERED_FIELDS:
+                filters_changed(Venue)
+            if changed & (SHOWN_FIELDS | EXPORTED_FIELDS):
+                # Its artists' pages and calendars render it too.
+                touch(Artist, db.session.query(Show.artist_id).filter_by(venue_id=venue_id))
+            pages = venue_pages(venue_id, changed)
+            db.session.commit()
+            if 'name' in changed:
+                typeahead.add(Venue, venue_id, values['name'])
+            page_cache.invalidate(*pages)
+            flash("Venue " + request.form.get('name') + " has been updated.")
+        else:
+            flash("Venue " + request.form.get('name') + " has no changes to save.")
+    except:
+        flash('An error occurred. Venue could not be updated.')
+        db.session.rollback()
+        current_app.logger.exception('Could not edit venue %s', venue_id)
+    finally:
+        db.session.close()
+    return redirect(url_for('venues.show_venue', venue_id=venue_id))
@@ -0,0 +1,91 @@
+import datetime as datetime_now
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from models import db, TableVersion
+
+# ----------------------------------------------------------------------------#
+# Table versions.
+# ----------------------------------------------------------------------------#
+
+# Every transaction writing to one of these tables bumps its version and
+# change time once, in the same transaction: flushes and ORM bulk statements
+# through the session events below, other writes (COPY) by calling bump().
+VERSIONED_TABLES = ('Venue', 'Artist', 'Show')
+# Versions bumped by calling bump() only: the genre links, states and seeking
+# flags of venues and artists, which the browse bitmaps are built from.
+FILTER_VERSIONS = ('Venue.filters', 'Artist.filters')
+# Deleting venues and artists deletes their shows in the database.
+CASCADES = {
+    'Venue': ('Show',),
+    'Artist': ('Show',),
+}
+
+
+def _insert_versions(target, connection, **kwargs):
+    connection.execute(target.insert(), [{'name': name} for name in VERSIONED_TABLES + FILTER_VERSIONS])
+
+
+event.listen(TableVersion.__table__, 'after_create', _insert_versions)
+
+
+def bump(*names, session=None):
+    """Count a change of the tables, or other versioned data, `names` in the
+    current transaction."""
+    session = session or db.session
+    bumped = session.info.setdefault('bumped_versions', set())
+    names = [name for name in names if name not in bumped]
+    if not names:
+        return
+    bumped.update(names)
+    table = TableVersion.__table__
+    session.execute(table.update().where(table.c.name.in_(names))
+                    .values(version=table.c.version + 1, changed_at=datetime_now.datetime.utcnow()))
+
+
+def version_columns(name):
+    """The version and change time of the table `name`, as scalar subqueries
+    to read along with other values."""
+    table = TableVersion.__table__
+    return (select(table.c.version).where(table.c.name == name).scalar_subquery(),
+            select(table.c.changed_at).where(table.c.name == name).scalar_subquery())
+
+
+def _changed_tables(names, deleted=False):
+    changed = set()
+    for name in names:
+        if name in VERSIONED_TABLES:
+            changed.add(name)
+            if deleted:
+                changed.update(CASCADES.get(name, ()))
+    return changed
+
+
+@event.listens_for(Session, 'before_flush')
+def _before_flush(session, flush_context, instances):
+    written = list(session.new) + [row for row in session.dirty if session.is_modified(row)]
+    changed = _changed_tables(type(row).__tablename__ for row in written if hasattr(row, '__tablename__'))
+    changed |= _changed_tables((type(row).__tablename__ for row in session.deleted
+                                if hasattr(row, '__tablename__')), deleted=True)
+    if changed:
+        bump(*sorted(changed), session=session)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _do_orm_execute(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if orm_execute_state.bind_mapper is not None:
+        name = orm_execute_state.bind_mapper.local_table.name
+    else:
+        name = orm_execute_state.statement.table.name
+    changed = _changed_tables([name], deleted=orm_execute_state.is_delete)
+    if changed:
+        bump(*sorted(changed), session=orm_execute_state.session)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _after_transaction_end(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('bumped_versions', None)